@@ -33,6 +33,7 @@ def load_learned_rules(company_id: str, base_dir: Optional[str] = None) -> Dict[
       - display_name
       - regex (list)
       - layout (list)
+      - example_regions (list of {page, rect} from confirmed regex examples)
     """
     if not company_id:
         return {
@@ -40,6 +41,7 @@ def load_learned_rules(company_id: str, base_dir: Optional[str] = None) -> Dict[
             "display_name": None,
             "regex": [],
             "layout": [],
+            "example_regions": [],
         }
 
     # Resolve project root if caller didn't provide it.
@@ -104,11 +106,39 @@ def load_learned_rules(company_id: str, base_dir: Optional[str] = None) -> Dict[
             }
         )
 
+    # Where confirmed values were found (regex `examples`), used to target OCR.
+    example_regions: List[Dict[str, Any]] = []
+    for r in raw.get("regex", []) or []:
+        if not isinstance(r, dict):
+            continue
+        for ex in r.get("examples", []) or []:
+            if not isinstance(ex, dict):
+                continue
+            try:
+                page = int(ex.get("page") or 1)
+            except Exception:
+                continue
+            for rect in ex.get("rects", []) or []:
+                if not isinstance(rect, dict):
+                    continue
+                example_regions.append(
+                    {
+                        "page": page,
+                        "rect": {
+                            "x0": _clamp01(rect.get("x0", 0.0)),
+                            "y0": _clamp01(rect.get("y0", 0.0)),
+                            "x1": _clamp01(rect.get("x1", 1.0)),
+                            "y1": _clamp01(rect.get("y1", 1.0)),
+                        },
+                    }
+                )
+
     return {
         "company_id": str(company_id),
         "display_name": str(display_name),
         "regex": regex_entries,
         "layout": layout_entries,
+        "example_regions": example_regions,
         "version": raw.get("version", 1),
     }
 
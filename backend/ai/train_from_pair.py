@@ -3,6 +3,7 @@ from __future__ import annotations
 from typing import Any, Dict, List, Optional, Tuple
 
 from backend.redaction.text_finder import TextFinder
+from backend.redaction.span_table import group_spans_by_page
 from backend.suggestions import build_final_rules_for_document, generate_suggestions
 from backend.ai.local_learner import update_learned_rules
 
@@ -10,22 +11,9 @@ from backend.ai.local_learner import update_learned_rules
 def _spans_to_ocr_result(spans: List[Any]) -> Dict[str, Any]:
     """
     Convert TextFinder spans into the ocr_result shape expected by backend/suggestions.py:
-      { pages_text: [...], spans_by_page: {page: [{text,x0,y0,x1,y1}, ...]} }
+      { pages_text: [...], spans_by_page: {page: SpanTable} }
     """
-    spans_by_page: Dict[int, List[Dict[str, float]]] = {}
-
-    for s in spans or []:
-        page = int(getattr(s, "page", 1) or 1)
-        text = getattr(s, "text", "") or ""
-        spans_by_page.setdefault(page, []).append(
-            {
-                "text": str(text),
-                "x0": float(getattr(s, "x0", 0.0) or 0.0),
-                "y0": float(getattr(s, "y0", 0.0) or 0.0),
-                "x1": float(getattr(s, "x1", 1.0) or 1.0),
-                "y1": float(getattr(s, "y1", 1.0) or 1.0),
-            }
-        )
+    spans_by_page = group_spans_by_page(spans)
 
     pages = sorted(spans_by_page.keys()) if spans_by_page else []
     pages_text = [
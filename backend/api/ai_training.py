@@ -5,6 +5,7 @@ from pydantic import BaseModel
 
 from backend.ai.local_learner import update_learned_rules
 from backend.ai.train_from_pair import train_from_pair
+from backend.cpu_executor import run_blocking
 
 
 router = APIRouter(prefix="/api/ai", tags=["AI-Training"])
@@ -61,10 +62,12 @@ async def train_pair(
     unredacted_bytes = await unredacted.read()
     redacted_bytes = await redacted.read()
 
-    result = train_from_pair(
-        unredacted_pdf_bytes=unredacted_bytes,
-        redacted_pdf_bytes=redacted_bytes,
-        company_hint=company_id,
+    result = await run_blocking(
+        lambda: train_from_pair(
+            unredacted_pdf_bytes=unredacted_bytes,
+            redacted_pdf_bytes=redacted_bytes,
+            company_hint=company_id,
+        )
     )
 
     return result
@@ -1,99 +1,125 @@
+from typing import Literal, get_args
+
 from fastapi import APIRouter, UploadFile, File, Query
 from fastapi.responses import JSONResponse
 
 from backend.redaction.text_finder import TextFinder
+from backend.redaction.document_analysis import analyze_document
+from backend.redaction.span_table import group_spans_by_page
+from backend.rules.ocr_regions import build_ocr_region_plan
 from backend.suggestions import build_final_rules_for_document, generate_suggestions
+from backend.cpu_executor import ExecutorSaturated, run_blocking
+from backend.barcode_engine import get_barcode_engine
 import traceback
 
-# Barcode fallback rendering (no Poppler dependency)
-import io
-import fitz  # PyMuPDF
-from PIL import Image
-
-# For pyzbar-based barcode detection
-from pdf2image import convert_from_bytes
-from pyzbar.pyzbar import decode
-import os
-
 router = APIRouter(prefix="/redact", tags=["Auto-Suggest"])
 
-def _find_poppler_path() -> str | None:
-    # Allow override via env var
-    env_path = os.environ.get("POPPLER_PATH")
-    if env_path:
-        pdfinfo = os.path.join(env_path, "pdfinfo.exe")
-        if os.path.isfile(pdfinfo):
-            return env_path
-
-    candidates = [
-        r"C:\poppler\bin",
-        r"C:\poppler\Library\bin",
-        r"C:\poppler\Library\mingw64\bin",
-        r"C:\Program Files\poppler\bin",
-        r"C:\Program Files (x86)\poppler\bin",
-        r"C:\Program Files\poppler\Library\bin",
-        r"C:\Program Files (x86)\poppler\Library\bin",
+# Query values outside these are rejected with 422 by FastAPI.
+OcrMode = Literal["full", "targeted"]
+OCR_MODES = get_args(OcrMode)
+
+def _pyzbar_suggestions(hits) -> list:
+    return [
+        {
+            "type": "barcode",
+            "rule_id": "pyzbar_barcode",
+            "label": "Barcode",
+            "group": "barcode",
+            "page": hit.page,
+            "rects": [hit.rect],
+            "text": hit.data,
+            "reason": "Detected barcode (pyzbar)"
+        }
+        for hit in hits
     ]
-    for path in candidates:
-        if os.path.isfile(os.path.join(path, "pdfinfo.exe")):
-            return path
-    return None
-
-
-def _detect_barcodes_pyzbar(pdf_bytes: bytes):
-    poppler_path = _find_poppler_path()
-    images = None
-    if poppler_path:
-        # Fast path (requires Poppler/pdfinfo)
-        images = convert_from_bytes(
-            pdf_bytes,
-            dpi=200,
-            poppler_path=poppler_path,
+
+
+def _suggest_template_candidates(
+    pdf_bytes: bytes,
+    company_id: str | None,
+    sensitivity: int,
+    progress=None,
+    ocr_mode: str = "full",
+) -> list:
+    if ocr_mode not in OCR_MODES:
+        raise ValueError(f"Unknown ocr_mode: {ocr_mode}")
+    finder = TextFinder()
+
+    # Targeted OCR needs the company up front: its layout zones and learned
+    # value locations decide which parts of scanned pages get OCR'd.
+    final_rules = None
+    ocr_regions = None
+    if ocr_mode == "targeted" and company_id:
+        final_rules = build_final_rules_for_document("", company_hint=company_id)
+        if final_rules.company_id:
+            ocr_regions = build_ocr_region_plan(final_rules) or None
+        else:
+            final_rules = None
+
+    # One pass over the PDF: words (+OCR fallback), image blocks and a
+    # shared 200-DPI raster; as each page renders, the barcode engine decodes
+    # its embedded images natively, then only candidate crops of the raster
+    # (image blocks + gradient detector) outside what those decoded.
+    barcode_engine = get_barcode_engine()
+    pyzbar_suggestions = []
+    image_cache = {}
+
+    def _scan_raster(pa, page):
+        hits = barcode_engine.detect_in_image(
+            pa.raster, pa.index + 1, pa.image_blocks, page=page, image_cache=image_cache
         )
-    else:
-        # Fallback path (requires no Poppler): render via PyMuPDF
-        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-        images = []
-        try:
-            zoom = 200 / 72.0
-            mat = fitz.Matrix(zoom, zoom)
-            for page in doc:
-                pix = page.get_pixmap(matrix=mat, alpha=False)
-                img = Image.open(io.BytesIO(pix.tobytes("png"))).convert("RGB")
-                images.append(img)
-        finally:
-            doc.close()
-
-    suggestions = []
-    page_number = 1
-
-    for img in images:
-        decoded = decode(img)
-
-        width, height = img.size
-
-        for d in decoded:
-            x, y, w, h = d.rect
-
-            norm = {
-                "x0": x / width,
-                "y0": y / height,
-                "x1": (x + w) / width,
-                "y1": (y + h) / height
-            }
+        pyzbar_suggestions.extend(_pyzbar_suggestions(hits))
+
+    analysis = analyze_document(
+        pdf_bytes,
+        finder=finder,
+        auto_ocr=True,
+        on_raster=_scan_raster,
+        progress=progress,
+        ocr_regions=ocr_regions,
+    )
+    spans_by_page = group_spans_by_page(analysis.spans)
+
+    pages_text = [
+        " ".join(s["text"] for s in spans_by_page[p] if s["text"])
+        for p in sorted(spans_by_page.keys())
+    ] if spans_by_page else [""]
+
+    full_text = " ".join(pages_text)
+
+    if final_rules is None:
+        final_rules = build_final_rules_for_document(
+            full_text,
+            company_hint=company_id,
+        )
+
+    # IMPORTANT: use pages_text key to match suggestion engine
+    ocr_result = {
+        "pages_text": pages_text,
+        "spans_by_page": spans_by_page,
+    }
 
-            suggestions.append({
+    # Rule-based suggestions (text + layout + zones)
+    suggestions = generate_suggestions([], ocr_result, final_rules, sensitivity=sensitivity)
+
+    # PyMuPDF image-block barcodes
+    pymupdf_barcodes = analysis.image_block_candidates()
+    for b in pymupdf_barcodes:
+        suggestions.append(
+            {
                 "type": "barcode",
-                "rule_id": "pyzbar_barcode",
+                "rule_id": "pymupdf_barcode",
                 "label": "Barcode",
                 "group": "barcode",
-                "page": page_number,
-                "rects": [norm],
-                "text": d.data.decode("utf-8", errors="ignore") if d.data else "",
-                "reason": "Detected barcode (pyzbar)"
-            })
+                "page": b["page"],
+                "rects": b["rects"],
+                "text": b.get("text", ""),
+                "reason": "Detected image block (PyMuPDF)"
+            }
+        )
 
-        page_number += 1
+    # pyzbar barcodes (same engine as barcode button), decoded during analysis
+    suggestions.extend(pyzbar_suggestions)
 
     return suggestions
 
@@ -103,76 +129,22 @@ async def auto_suggest_template(
     file: UploadFile = File(...),
     company_id: str | None = Query(None),
     sensitivity: int = Query(50, ge=0, le=100),
+    ocr_mode: OcrMode = Query("full"),
 ):
+    """
+    ocr_mode=targeted (with company_id): scanned pages are OCR'd only inside
+    the company's layout zones / learned value regions, at high DPI; pages
+    where that finds nothing still get full-page OCR.
+    """
     try:
         pdf_bytes = await file.read()
-
-        finder = TextFinder()
-        spans = finder.find_text_spans(pdf_bytes, use_ocr=False, auto_ocr=True)
-
-        spans_by_page: dict[int, list[dict]] = {}
-        for s in spans:
-            page = getattr(s, "page", None) or getattr(s, "page", 1)
-            text = getattr(s, "text", None) or getattr(s, "text", "")
-            x0 = getattr(s, "x0", None) or getattr(s, "x0", 0.0)
-            y0 = getattr(s, "y0", None) or getattr(s, "y0", 0.0)
-            x1 = getattr(s, "x1", None) or getattr(s, "x1", 1.0)
-            y1 = getattr(s, "y1", None) or getattr(s, "y1", 1.0)
-
-            page = int(page)
-            spans_by_page.setdefault(page, []).append(
-                {
-                    "text": text,
-                    "x0": float(x0),
-                    "y0": float(y0),
-                    "x1": float(x1),
-                    "y1": float(y1),
-                }
-            )
-
-        pages_text = [
-            " ".join(s["text"] for s in spans_by_page[p] if s["text"])
-            for p in sorted(spans_by_page.keys())
-        ] if spans_by_page else [""]
-
-        full_text = " ".join(pages_text)
-
-        final_rules = build_final_rules_for_document(
-            full_text,
-            company_hint=company_id,
+        suggestions = await run_blocking(
+            lambda: _suggest_template_candidates(pdf_bytes, company_id, sensitivity, ocr_mode=ocr_mode)
         )
-
-        # IMPORTANT: use pages_text key to match suggestion engine
-        ocr_result = {
-            "pages_text": pages_text,
-            "spans_by_page": spans_by_page,
-        }
-
-        # Rule-based suggestions (text + layout + zones)
-        suggestions = generate_suggestions([], ocr_result, final_rules, sensitivity=sensitivity)
-
-        # PyMuPDF image-block barcodes
-        pymupdf_barcodes = finder.find_barcodes(pdf_bytes)
-        for b in pymupdf_barcodes:
-            suggestions.append(
-                {
-                    "type": "barcode",
-                    "rule_id": "pymupdf_barcode",
-                    "label": "Barcode",
-                    "group": "barcode",
-                    "page": b["page"],
-                    "rects": b["rects"],
-                    "text": b.get("text", ""),
-                    "reason": "Detected image block (PyMuPDF)"
-                }
-            )
-
-        # pyzbar barcodes (same engine as barcode button)
-        pyzbar_suggestions = _detect_barcodes_pyzbar(pdf_bytes)
-        suggestions.extend(pyzbar_suggestions)
-
         return JSONResponse({"candidates": suggestions}, status_code=200)
 
+    except ExecutorSaturated:
+        raise
     except Exception as e:
         print("🔥🔥🔥 AUTO-SUGGEST ERROR 🔥🔥🔥")
         traceback.print_exc()
@@ -5,6 +5,7 @@ from fastapi import APIRouter, UploadFile, File
 from fastapi.responses import JSONResponse
 
 from backend.company_detector import CompanyDetector
+from backend.cpu_executor import ExecutorSaturated, run_blocking
 
 router = APIRouter(prefix="/company", tags=["Company Detection"])
 
@@ -14,9 +15,11 @@ detector = CompanyDetector()
 async def detect_company(file: UploadFile = File(...)):
     try:
         pdf_bytes = await file.read()
-        result = detector.detect_company_json(pdf_bytes)
+        result = await run_blocking(detector.detect_company_json, pdf_bytes)
 
         return JSONResponse(result, status_code=200)
 
+    except ExecutorSaturated:
+        raise
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
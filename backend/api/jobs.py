@@ -0,0 +1,101 @@
+# backend/api/jobs.py
+# Background job endpoints: submit long OCR / suggest / batch runs, poll
+# their progress, and download the result when done.
+
+import json
+from typing import List
+
+from fastapi import APIRouter, File, Form, HTTPException, Query, UploadFile
+from fastapi.responses import FileResponse, JSONResponse
+
+from backend.api.auto_suggest import OcrMode
+from backend.cpu_executor import run_blocking
+from backend.jobs import BATCH_MAX_FILES, JOB_DONE, get_job_manager
+
+router = APIRouter(prefix="/api/jobs", tags=["Jobs"])
+
+
+async def _submit(kind: str, params: dict, files: List[UploadFile]) -> JSONResponse:
+    # Same cap as the synchronous /api/batch/redact.
+    if len(files) > BATCH_MAX_FILES:
+        return JSONResponse(
+            {"ok": False, "message": f"Too many files in one batch (max {BATCH_MAX_FILES})"},
+            status_code=413,
+        )
+    payload = [(f.filename, await f.read()) for f in files]
+    job = await run_blocking(get_job_manager().submit, kind, params, payload)
+    return JSONResponse(job.to_public(), status_code=202)
+
+
+@router.post("/ocr")
+async def submit_ocr_job(file: UploadFile = File(...)):
+    """Same output as POST /api/ocr, produced in the background."""
+    return await _submit("ocr", {}, [file])
+
+
+@router.post("/redact-template")
+async def submit_template_job(
+    file: UploadFile = File(...),
+    company_id: str | None = Query(None),
+    sensitivity: int = Query(50, ge=0, le=100),
+    ocr_mode: OcrMode = Query("full"),
+):
+    """Same output as POST /redact/template, produced in the background."""
+    return await _submit(
+        "suggest_template",
+        {"company_id": company_id, "sensitivity": sensitivity, "ocr_mode": ocr_mode},
+        [file],
+    )
+
+
+@router.post("/batch-redact")
+async def submit_batch_job(
+    files: List[UploadFile] = File(...),
+    auto_apply: str = Form("true"),
+    scrub_metadata: str = Form("true"),
+    sensitivity: int = Form(50),
+):
+    """Same ZIP as POST /api/batch/redact, produced in the background."""
+    return await _submit(
+        "batch_redact",
+        {
+            "auto_apply": str(auto_apply).lower() == "true",
+            "scrub_metadata": str(scrub_metadata).lower() == "true",
+            "sensitivity": sensitivity,
+        },
+        files,
+    )
+
+
+@router.get("/{job_id}")
+def get_job(job_id: str):
+    job = get_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_public()
+
+
+@router.get("/{job_id}/result")
+def get_job_result(job_id: str):
+    job = get_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status != JOB_DONE or not job.result_path:
+        return JSONResponse(job.to_public(), status_code=409)
+
+    if job.result_media_type == "application/json":
+        with open(job.result_path, "r", encoding="utf-8") as f:
+            return JSONResponse(json.load(f))
+
+    return FileResponse(
+        job.result_path,
+        filename=job.result_filename or None,
+        media_type=job.result_media_type or "application/octet-stream",
+    )
+
+
+@router.delete("/{job_id}")
+def delete_job(job_id: str):
+    if not get_job_manager().delete(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"status": "ok", "deleted": job_id}
@@ -1,14 +1,13 @@
 from fastapi import APIRouter, UploadFile, File
+from backend.cpu_executor import run_cpu_bound
 from backend.ocr_engine import OCREngine
 
 router = APIRouter()
 ocr_engine = OCREngine()
 
-@router.post("/ocr")
-async def ocr_pdf(file: UploadFile = File(...)):
-    pdf_bytes = await file.read()
-    words = ocr_engine.ocr_pdf_bytes(pdf_bytes)
 
+def _ocr_words(pdf_bytes: bytes):
+    # Top-level so it can run in the shared process lane.
     return [
         {
             "page": w.page,
@@ -18,5 +17,11 @@ async def ocr_pdf(file: UploadFile = File(...)):
             "x1": w.x1,
             "y1": w.y1,
         }
-        for w in words
+        for w in ocr_engine.ocr_pdf_bytes(pdf_bytes)
     ]
+
+
+@router.post("/ocr")
+async def ocr_pdf(file: UploadFile = File(...)):
+    pdf_bytes = await file.read()
+    return await run_cpu_bound(_ocr_words, pdf_bytes)
@@ -6,9 +6,11 @@
 import json
 
 from fastapi import APIRouter, UploadFile, File, Form
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import JSONResponse, Response
 
+from backend.cpu_executor import ExecutorSaturated, run_blocking
 from backend.redaction.manual_redaction_engine import ManualRedactionEngine
+from backend.redaction.pdf_output import content_disposition
 
 router = APIRouter(prefix="/stirling", tags=["Stirling-PDF Compatible"])
 
@@ -123,17 +125,21 @@ async def stirling_redact(
             continue
 
     try:
-        out_path = manual_engine.apply_redactions(
-            pdf_bytes=pdf_bytes,
-            redactions=converted,
-            scrub_metadata=True,
-            base_filename=file.filename,
+        out_bytes = await run_blocking(
+            lambda: manual_engine.apply_redactions_to_bytes(
+                pdf_bytes=pdf_bytes,
+                redactions=converted,
+                scrub_metadata=True,
+            )
         )
+    except ExecutorSaturated:
+        raise
     except Exception as e:
         return JSONResponse({"error": f"Redaction failed: {e}"}, status_code=500)
 
-    return FileResponse(
-        out_path,
+    filename = file.filename or "redacted.pdf"
+    return Response(
+        content=out_bytes,
         media_type="application/pdf",
-        filename=file.filename or "redacted.pdf",
+        headers={"Content-Disposition": content_disposition(filename)},
     )
@@ -3,11 +3,11 @@
 
 import os
 import json
-from typing import List
+from typing import List, Optional
 
 import fitz  # PyMuPDF
 from fastapi import FastAPI, UploadFile, File, Form
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 import pytesseract
@@ -47,6 +47,9 @@ from backend.pdf_text_extractor import PDFTextExtractor
 from backend.redaction.redaction_engine import RedactionEngine
 from backend.pdf_engine import build_redacted_filename
 from backend.redaction.manual_redaction_engine import ManualRedactionEngine
+from backend.redaction.pdf_output import SAVE_PROFILES, content_disposition
+from backend.cpu_executor import run_blocking
+from backend.raster import render
 
 # ---------------------------------------------------------
 # Singletons
@@ -69,20 +72,16 @@ def health_check():
 # ---------------------------------------------------------
 # OCR endpoint (used by OCR_Fallback.js)
 # ---------------------------------------------------------
-@app.post("/api/ocr")
-async def api_ocr(file: UploadFile = File(...)):
-    pdf_bytes = await file.read()
-
+def _ocr_words_from_pdf(pdf_bytes: bytes) -> List[dict]:
     doc = fitz.open(stream=pdf_bytes, filetype="pdf")
 
     words = []
     for page_index in range(len(doc)):
         page = doc[page_index]
-        pix = page.get_pixmap()
-        img_bytes = pix.tobytes("png")
+        img = render(page, gray=True).image()
 
         ocr_result = pytesseract.image_to_data(
-            img_bytes,
+            img,
             output_type=pytesseract.Output.DICT
         )
 
@@ -100,6 +99,13 @@ async def api_ocr(file: UploadFile = File(...)):
                 "y1": ocr_result["top"][i] + ocr_result["height"][i],
             })
 
+    return words
+
+
+@app.post("/api/ocr")
+async def api_ocr(file: UploadFile = File(...)):
+    pdf_bytes = await file.read()
+    words = await run_blocking(_ocr_words_from_pdf, pdf_bytes)
     return {"words": words}
 
 
@@ -111,6 +117,7 @@ async def api_redact_manual(
     file: UploadFile = File(...),
     redactions: str = Form(...),
     scrub_metadata: bool = Form(True),
+    save_profile: Optional[str] = Form(None),
 ):
     try:
         redaction_list = json.loads(redactions)
@@ -123,17 +130,24 @@ async def api_redact_manual(
     if len(pdf_bytes) > MAX_PDF_SIZE:
         return JSONResponse({"error": "File too large"}, status_code=413)
 
-    output_path = manual_engine.apply_redactions(
-        pdf_bytes,
-        redaction_list,
-        scrub_metadata=bool(scrub_metadata),
-        base_filename=file.filename,
+    if save_profile and save_profile.strip().lower() not in SAVE_PROFILES:
+        return JSONResponse({"error": f"Unknown save_profile: {save_profile}"}, status_code=400)
+
+    # Redacted PDF stays in memory: no temp file written and read back.
+    out_bytes = await run_blocking(
+        lambda: manual_engine.apply_redactions_to_bytes(
+            pdf_bytes,
+            redaction_list,
+            scrub_metadata=bool(scrub_metadata),
+            save_profile=save_profile,
+        )
     )
 
-    return FileResponse(
-        output_path,
-        filename=os.path.basename(output_path),
+    safe_name = os.path.splitext(os.path.basename(file.filename or "document"))[0]
+    return Response(
+        content=out_bytes,
         media_type="application/pdf",
+        headers={"Content-Disposition": content_disposition(f"{safe_name}_redacted.pdf")},
     )
 
 
@@ -201,6 +215,39 @@ def api_get_template(company_id: str):
     return template
 
 
+# ---------------------------------------------------------
+# Legacy template detection / redaction (blocking; run through
+# run_blocking so extraction and redaction stay off the event loop)
+# ---------------------------------------------------------
+def _detect_template(pdf_bytes: bytes, filename: Optional[str]) -> Optional[dict]:
+    temp_path = f"temp_{filename}"
+    with open(temp_path, "wb") as f:
+        f.write(pdf_bytes)
+
+    try:
+        # Use your existing PDFTextExtractor + TemplateLoader auto-detect
+        text = extractor.extract(temp_path) if hasattr(extractor, "extract") else ""
+        return getattr(loader, "auto_detect_template", lambda _t: None)(text)
+    finally:
+        os.remove(temp_path)
+
+
+def _redact_with_detected_template(pdf_bytes: bytes, filename: Optional[str]) -> Optional[str]:
+    """Output path of the redacted PDF, or None when no template matches."""
+    temp_path = f"temp_{filename}"
+    with open(temp_path, "wb") as f:
+        f.write(pdf_bytes)
+
+    try:
+        text = extractor.extract(temp_path) if hasattr(extractor, "extract") else ""
+        template = getattr(loader, "auto_detect_template", lambda _t: None)(text)
+        if not template:
+            return None
+        return engine.redact_pdf(temp_path, template)
+    finally:
+        os.remove(temp_path)
+
+
 # ---------------------------------------------------------
 # Detect company (root) — for Template_Detect_Backend.js
 # ---------------------------------------------------------
@@ -213,16 +260,7 @@ async def company_detect(file: UploadFile = File(...)):
             status_code=413,
         )
 
-    temp_path = f"temp_{file.filename}"
-    with open(temp_path, "wb") as f:
-        f.write(pdf_bytes)
-
-    # Use your existing PDFTextExtractor + TemplateLoader auto-detect
-    text = extractor.extract(temp_path) if hasattr(extractor, "extract") else ""
-    template = getattr(loader, "auto_detect_template", lambda _t: None)(text)
-
-    os.remove(temp_path)
-
+    template = await run_blocking(_detect_template, pdf_bytes, file.filename)
     if not template:
         return {"company_id": None, "display_name": None}
 
@@ -244,15 +282,7 @@ async def api_detect_company(file: UploadFile = File(...)):
             status_code=413,
         )
 
-    temp_path = f"temp_{file.filename}"
-    with open(temp_path, "wb") as f:
-        f.write(pdf_bytes)
-
-    text = extractor.extract(temp_path) if hasattr(extractor, "extract") else ""
-    template = getattr(loader, "auto_detect_template", lambda _t: None)(text)
-
-    os.remove(temp_path)
-
+    template = await run_blocking(_detect_template, pdf_bytes, file.filename)
     if not template:
         return {"company_id": None, "display_name": None}
 
@@ -271,20 +301,10 @@ async def api_redact_single(file: UploadFile = File(...)):
     if len(pdf_bytes) > MAX_PDF_SIZE:
         return JSONResponse({"error": "File too large"}, status_code=413)
 
-    temp_path = f"temp_{file.filename}"
-    with open(temp_path, "wb") as f:
-        f.write(pdf_bytes)
-
-    text = extractor.extract(temp_path) if hasattr(extractor, "extract") else ""
-    template = getattr(loader, "auto_detect_template", lambda _t: None)(text)
-
-    if not template:
-        os.remove(temp_path)
+    output_path = await run_blocking(_redact_with_detected_template, pdf_bytes, file.filename)
+    if not output_path:
         return JSONResponse({"error": "No matching template"}, status_code=400)
 
-    output_path = engine.redact_pdf(temp_path, template)
-    os.remove(temp_path)
-
     return FileResponse(output_path, filename=os.path.basename(output_path))
 
 
@@ -297,20 +317,10 @@ async def redact_pdf(file: UploadFile = File(...)):
     if len(pdf_bytes) > MAX_PDF_SIZE:
         return JSONResponse({"error": "File too large"}, status_code=413)
 
-    temp_path = f"temp_{file.filename}"
-    with open(temp_path, "wb") as f:
-        f.write(pdf_bytes)
-
-    text = extractor.extract(temp_path) if hasattr(extractor, "extract") else ""
-    template = getattr(loader, "auto_detect_template", lambda _t: None)(text)
-
-    if not template:
-        os.remove(temp_path)
+    output_path = await run_blocking(_redact_with_detected_template, pdf_bytes, file.filename)
+    if not output_path:
         return JSONResponse({"error": "No matching template"}, status_code=400)
 
-    output_path = engine.redact_pdf(temp_path, template)
-    os.remove(temp_path)
-
     return FileResponse(output_path, filename=os.path.basename(output_path))
 
 
@@ -333,27 +343,17 @@ async def batch_redact(files: List[UploadFile] = File(...)):
             )
             continue
 
-        temp_path = f"temp_{file.filename}"
-        with open(temp_path, "wb") as f:
-            f.write(pdf_bytes)
-
-        text = extractor.extract(temp_path) if hasattr(extractor, "extract") else ""
-        template = getattr(loader, "auto_detect_template", lambda _t: None)(text)
-
-        if not template:
+        output_path = await run_blocking(_redact_with_detected_template, pdf_bytes, file.filename)
+        if not output_path:
             results.append(
                 {"file": file.filename, "status": "failed", "reason": "no template"}
             )
-            os.remove(temp_path)
             continue
 
-        output_path = engine.redact_pdf(temp_path, template)
         results.append(
             {"file": file.filename, "status": "success", "output": output_path}
         )
 
-        os.remove(temp_path)
-
     return {"results": results}
 
 
@@ -379,16 +379,23 @@ def preview_page(file: str, page: int = 0):
 # STUB: /api/redact/ocr-report
 # (basic OCR summary; shape is simple so frontend can consume)
 # ---------------------------------------------------------
+def _pages_text(pdf_bytes: bytes) -> List[str]:
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    try:
+        pages_text = []
+        for page_index in range(len(doc)):
+            page = doc[page_index]
+            text = page.get_text("text") or ""
+            pages_text.append(text)
+        return pages_text
+    finally:
+        doc.close()
+
+
 @app.post("/api/redact/ocr-report")
 async def api_redact_ocr_report(file: UploadFile = File(...)):
     pdf_bytes = await file.read()
-    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-
-    pages_text = []
-    for page_index in range(len(doc)):
-        page = doc[page_index]
-        text = page.get_text("text") or ""
-        pages_text.append(text)
+    pages_text = await run_blocking(_pages_text, pdf_bytes)
 
     return {
         "pages_text": pages_text,
@@ -0,0 +1,526 @@
+# ------------------------------------------------------------
+# backend/barcode_engine.py — Candidate-region barcode / QR detection
+# ------------------------------------------------------------
+#
+# Instead of rendering every page at 200 DPI and running pyzbar over the
+# whole raster, the engine:
+#
+#   0. decodes embedded image XObjects at their native pixel size (no page
+#      rendering) and maps hits through each placement's transform matrix
+#   1. proposes candidate regions per page
+#        - image blocks (get_image_info): embedded barcode/QR images
+#        - a cheap tile-gradient detector on a low-res grayscale render,
+#          for vector barcodes: 1D symbols are runs of tiles with strong,
+#          strongly horizontal gradients; 2D symbols are compact, roughly
+#          square groups of dense tiles
+#   2. renders only those crops (grayscale, at CROP_DPI) and decodes them
+#   3. maps the hits back to page fractions
+#
+# Steps 1-2 still cost one low-res render per page in auto mode (the
+# gradient detector needs it); only the crops are rendered at CROP_DPI.
+# detect_in_image() runs the same steps on a raster the caller already has,
+# with step 0 first when it is given the page.
+#
+# Every barcode endpoint goes through this module. Result rects keep the
+# convention the pyzbar endpoints always used: fractions of the page with
+# a top-left origin ({x0, y0, x1, y1}, y growing downwards).
+#
+# Configuration (env):
+#   BARCODE_MODE                auto     = embedded images first, then
+#                                          render the candidates outside
+#                                          what they decoded (default)
+#                               embedded = embedded images only, never render
+#                               regions  = always render candidates (1-3)
+#   BARCODE_FULL_PAGE_FALLBACK  1 = also decode the full page when no
+#                               candidate yields a symbol (default: 0)
+
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import fitz  # PyMuPDF
+import numpy as np
+from PIL import Image
+
+from backend.geometry import as_boxes, expand_boxes, merge_overlapping
+from backend.raster import Raster, as_array, gray_pixmap, render
+
+# Optional: pyzbar needs the zbar shared library at import time
+try:
+    from pyzbar.pyzbar import decode as _zbar_decode
+    HAS_PYZBAR = True
+except Exception:
+    _zbar_decode = None
+    HAS_PYZBAR = False
+
+PROBE_DPI = 100
+CROP_DPI = 300
+MAX_CROP_PIXELS = 2500 * 2500
+TILE = 8                      # probe tile size (px)
+REGION_MARGIN = 0.01          # page fraction added around every candidate
+MIN_IMAGE_SIDE = 0.02         # ignore image blocks smaller than this (page fraction)
+MAX_CANDIDATES = 12
+NATIVE_MIN_DPI = 150          # embedded images at least this sharp are never re-rendered
+MAX_NATIVE_PIXELS = 4000 * 4000
+
+MODE_AUTO = "auto"
+MODE_EMBEDDED = "embedded"
+MODE_REGIONS = "regions"
+MODES = (MODE_AUTO, MODE_EMBEDDED, MODE_REGIONS)
+
+# Tile classification on the probe render (mean |gradient| per pixel)
+BAR_ENERGY = 30.0
+BAR_ANISOTROPY = 0.7
+MATRIX_ENERGY = 45.0
+MATRIX_ANISOTROPY = 0.3
+BAR_QUIET_ZONE = 0.1          # 1D candidates grow by this share of their length per side
+
+# (x0, y0, x1, y1) page fractions, top-left origin
+Box = Tuple[float, float, float, float]
+
+
+def _full_page_fallback() -> bool:
+    return os.environ.get("BARCODE_FULL_PAGE_FALLBACK", "0").strip().lower() in ("1", "true", "yes", "on")
+
+
+def _default_mode() -> str:
+    mode = os.environ.get("BARCODE_MODE", MODE_AUTO).strip().lower()
+    if mode not in MODES:
+        print(f"[barcode_engine] WARNING: unknown BARCODE_MODE '{mode}', using '{MODE_AUTO}'")
+        return MODE_AUTO
+    return mode
+
+
+@dataclass
+class BarcodeHit:
+    page: int                  # 1-based
+    rect: Dict[str, float]     # page fractions, top-left origin
+    data: str
+    symbology: str
+
+
+# ------------------------------------------------------------
+# Vector barcode proposals (NumPy only)
+# ------------------------------------------------------------
+def _smooth3(a: np.ndarray) -> np.ndarray:
+    """3x3 mean over the tile grid (edge-padded); single tiles are too noisy."""
+    p = np.pad(a, 1, mode="edge")
+    h, w = a.shape
+    return sum(p[dy:dy + h, dx:dx + w] for dy in range(3) for dx in range(3)) / 9.0
+
+
+def gradient_candidates(gray: np.ndarray, tile: int = TILE) -> List[Box]:
+    """
+    Candidate symbol regions of a grayscale raster, as raster fractions.
+    """
+    h, w = gray.shape
+    th, tw = h // tile, w // tile
+    if th < 2 or tw < 2:
+        return []
+
+    g = gray[: th * tile, : tw * tile].astype(np.int16)
+    gx = np.abs(np.diff(g, axis=1, append=g[:, -1:]))
+    gy = np.abs(np.diff(g, axis=0, append=g[-1:, :]))
+    gx = _smooth3(gx.reshape(th, tile, tw, tile).mean(axis=(1, 3)))
+    gy = _smooth3(gy.reshape(th, tile, tw, tile).mean(axis=(1, 3)))
+
+    energy = gx + gy
+    aniso = (gx - gy) / np.maximum(energy, 1e-6)
+    bars = (energy >= BAR_ENERGY) & (np.abs(aniso) >= BAR_ANISOTROPY)
+    matrix = (energy >= MATRIX_ENERGY) & (np.abs(aniso) < MATRIX_ANISOTROPY)
+
+    out: List[Box] = []
+    for mask, is_matrix in ((bars, False), (matrix, True)):
+        rows, cols = np.nonzero(mask)
+        if not len(rows):
+            continue
+        tiles = as_boxes(np.stack([cols, rows, cols + 1, rows + 1], axis=1))
+        for x0, y0, x1, y1 in merge_overlapping(tiles).tolist():
+            bw, bh = x1 - x0, y1 - y0
+            if bw * bh < 4:
+                continue
+            filled = mask[int(y0):int(y1), int(x0):int(x1)].mean()
+            aspect = bw / bh
+            if is_matrix:
+                # QR / DataMatrix: compact, roughly square, densely textured
+                if not (0.6 <= aspect <= 1.6 and filled >= 0.6):
+                    continue
+            else:
+                # 1D: elongated along the bars' normal, or rotated by 90°
+                if not (aspect >= 1.5 or aspect <= 1 / 1.5) or filled < 0.5:
+                    continue
+                # keep the quiet zone (and sparse edge bars) inside the crop
+                if aspect >= 1.5:
+                    x0, x1 = max(0, x0 - BAR_QUIET_ZONE * bw), min(tw, x1 + BAR_QUIET_ZONE * bw)
+                else:
+                    y0, y1 = max(0, y0 - BAR_QUIET_ZONE * bh), min(th, y1 + BAR_QUIET_ZONE * bh)
+            out.append((x0 / tw, y0 / th, x1 / tw, y1 / th))
+    return out
+
+
+# ------------------------------------------------------------
+# Engine
+# ------------------------------------------------------------
+class BarcodeEngine:
+    def __init__(
+        self,
+        crop_dpi: int = CROP_DPI,
+        full_page_fallback: Optional[bool] = None,
+        mode: Optional[str] = None,
+    ):
+        self.crop_dpi = crop_dpi
+        self.full_page_fallback = _full_page_fallback() if full_page_fallback is None else full_page_fallback
+        self.mode = _default_mode() if mode is None else mode
+        if self.mode not in MODES:
+            raise ValueError(f"Unknown barcode mode: {self.mode}")
+
+    @property
+    def available(self) -> bool:
+        return HAS_PYZBAR
+
+    # -------- candidates --------
+    def _image_block_boxes(self, page: fitz.Page) -> List[Box]:
+        pw, ph = page.rect.width, page.rect.height
+        boxes: List[Box] = []
+        for info in page.get_image_info():
+            try:
+                x0, y0, x1, y1 = info["bbox"]
+            except Exception:
+                continue
+            if (x1 - x0) < MIN_IMAGE_SIDE * pw or (y1 - y0) < MIN_IMAGE_SIDE * ph:
+                continue
+            boxes.append((x0 / pw, y0 / ph, x1 / pw, y1 / ph))
+        return boxes
+
+    def _probe(self, page: fitz.Page) -> Optional[Raster]:
+        try:
+            return render(page, dpi=PROBE_DPI, gray=True)
+        except Exception as e:
+            print(f"[barcode_engine] WARNING: probe render failed on page {page.number + 1}: {e}")
+            return None
+
+    @staticmethod
+    def _finalize_candidates(boxes: List[Box]) -> np.ndarray:
+        if not boxes:
+            return as_boxes([])
+        merged = merge_overlapping(np.clip(expand_boxes(as_boxes(boxes), REGION_MARGIN), 0.0, 1.0))
+        if len(merged) > MAX_CANDIDATES:
+            areas = (merged[:, 2] - merged[:, 0]) * (merged[:, 3] - merged[:, 1])
+            merged = merged[np.argsort(-areas, kind="stable")[:MAX_CANDIDATES]]
+        return merged
+
+    def candidate_regions(self, page: fitz.Page, skip: Optional[List[Box]] = None) -> np.ndarray:
+        """
+        (N, 4) page fractions (top-left origin) worth decoding. Candidates
+        mostly inside a `skip` box (already decoded natively) are dropped.
+        """
+        boxes = self._image_block_boxes(page)
+        probe = self._probe(page)
+        if probe is not None:
+            boxes.extend(gradient_candidates(probe.array))
+        return self._drop_covered(self._finalize_candidates(boxes), skip)
+
+    @staticmethod
+    def _drop_covered(regions: np.ndarray, skip: Optional[List[Box]]) -> np.ndarray:
+        if not skip or not len(regions):
+            return regions
+
+        s = as_boxes(skip)
+        ix = np.clip(np.minimum(regions[:, None, 2], s[None, :, 2]) - np.maximum(regions[:, None, 0], s[None, :, 0]), 0, None)
+        iy = np.clip(np.minimum(regions[:, None, 3], s[None, :, 3]) - np.maximum(regions[:, None, 1], s[None, :, 1]), 0, None)
+        area = np.maximum((regions[:, 2] - regions[:, 0]) * (regions[:, 3] - regions[:, 1]), 1e-12)
+        covered = (ix * iy).sum(axis=1) / area
+        return regions[covered < 0.5]
+
+    # -------- embedded images (native resolution) --------
+    @staticmethod
+    def _native_gray(doc: fitz.Document, xref: int) -> Optional[Raster]:
+        """The image's own pixels as 8-bit gray, without rendering the page."""
+        try:
+            # None for stencil masks: no colour data to decode
+            pix = gray_pixmap(fitz.Pixmap(doc, xref))
+            if pix is None:
+                return None
+            shrink = 0
+            while (pix.width >> shrink) * (pix.height >> shrink) > MAX_NATIVE_PIXELS:
+                shrink += 1
+            if shrink:
+                pix.shrink(shrink)
+            return Raster(pix)
+        except Exception as e:
+            print(f"[barcode_engine] WARNING: failed to extract image xref {xref}: {e}")
+            return None
+
+    def _decode_xref(self, doc: fitz.Document, xref: int) -> Tuple[List[Any], int, int]:
+        raster = self._native_gray(doc, xref)
+        if raster is None or raster.width < 2 or raster.height < 2:
+            return [], 0, 0
+        return self._decode(raster.zbar_input()), raster.width, raster.height
+
+    def _embedded_hits(self, page: fitz.Page, cache: Dict[int, Tuple[List[Any], int, int]]) -> Tuple[List[BarcodeHit], List[Box]]:
+        """
+        Decode every image placed on the page at native resolution.
+
+        Returns the hits and the page boxes of placements sharp enough
+        (>= NATIVE_MIN_DPI) that rendering them again cannot help. `cache`
+        maps xref → decode result, so an image placed on many pages (e.g. a
+        letterhead) is decoded once per document.
+        """
+        pr = page.rect
+        pw, ph = pr.width, pr.height
+        hits: List[BarcodeHit] = []
+        handled: List[Box] = []
+
+        for item in page.get_images(full=True):
+            xref = item[0]
+            try:
+                placements = page.get_image_rects(xref, transform=True)
+            except Exception:
+                continue
+            placements = [
+                (bbox, matrix) for bbox, matrix in placements
+                if bbox.width >= MIN_IMAGE_SIDE * pw and bbox.height >= MIN_IMAGE_SIDE * ph
+            ]
+            if not placements:
+                continue
+
+            if xref not in cache:
+                cache[xref] = self._decode_xref(page.parent, xref)
+            decoded, iw, ih = cache[xref]
+            if not iw:
+                continue
+
+            # pixel space → unit image space → page space
+            for bbox, matrix in placements:
+                to_page = fitz.Matrix(1.0 / iw, 0, 0, 1.0 / ih, 0, 0) * matrix
+                for d in decoded:
+                    x, y, w, h = d.rect
+                    r = fitz.Rect(x, y, x + w, y + h) * to_page
+                    hits.append(
+                        BarcodeHit(
+                            page=page.number + 1,
+                            rect={
+                                "x0": (r.x0 - pr.x0) / pw,
+                                "y0": (r.y0 - pr.y0) / ph,
+                                "x1": (r.x1 - pr.x0) / pw,
+                                "y1": (r.y1 - pr.y0) / ph,
+                            },
+                            data=d.data.decode("utf-8", errors="ignore") if d.data else "",
+                            symbology=str(getattr(d, "type", "") or ""),
+                        )
+                    )
+                if min(iw / (bbox.width / 72.0), ih / (bbox.height / 72.0)) >= NATIVE_MIN_DPI:
+                    handled.append(((bbox.x0 - pr.x0) / pw, (bbox.y0 - pr.y0) / ph, (bbox.x1 - pr.x0) / pw, (bbox.y1 - pr.y0) / ph))
+
+        return hits, handled
+
+    def _embedded_pass(
+        self, page: fitz.Page, image_cache: Optional[Dict[int, Tuple[List[Any], int, int]]]
+    ) -> Tuple[List[BarcodeHit], List[Box]]:
+        """Embedded-image hits, plus the page boxes the region pass can skip."""
+        hits, handled = self._embedded_hits(page, {} if image_cache is None else image_cache)
+        # A vector barcode can share the page with a decoded image one:
+        # the region pass still runs, skipping only what was already decoded.
+        return hits, handled + [(h.rect["x0"], h.rect["y0"], h.rect["x1"], h.rect["y1"]) for h in hits]
+
+    # -------- decoding --------
+    @staticmethod
+    def _decode(img: Any) -> List[Any]:
+        """pyzbar decode of a PIL image, gray array or 8-bit (pixels, width, height) tuple."""
+        try:
+            return _zbar_decode(img)
+        except Exception as e:
+            print(f"[barcode_engine] WARNING: decode failed: {e}")
+            return []
+
+    def _hits_from_decoded(self, decoded, page_number: int, img_w: int, img_h: int, region: Box) -> List[BarcodeHit]:
+        """Map pixel rects of a crop covering `region` (page fractions) to page fractions."""
+        rx0, ry0, rx1, ry1 = region
+        sx, sy = (rx1 - rx0) / img_w, (ry1 - ry0) / img_h
+        hits = []
+        for d in decoded:
+            x, y, w, h = d.rect
+            hits.append(
+                BarcodeHit(
+                    page=page_number,
+                    rect={
+                        "x0": rx0 + x * sx,
+                        "y0": ry0 + y * sy,
+                        "x1": rx0 + (x + w) * sx,
+                        "y1": ry0 + (y + h) * sy,
+                    },
+                    data=d.data.decode("utf-8", errors="ignore") if d.data else "",
+                    symbology=str(getattr(d, "type", "") or ""),
+                )
+            )
+        return hits
+
+    def _render_crop(self, page: fitz.Page, region: Box) -> Optional[Raster]:
+        pw, ph = page.rect.width, page.rect.height
+        x0, y0, x1, y1 = region
+        clip = fitz.Rect(page.rect.x0 + x0 * pw, page.rect.y0 + y0 * ph, page.rect.x0 + x1 * pw, page.rect.y0 + y1 * ph)
+        if clip.is_empty:
+            return None
+
+        # Small crops at full CROP_DPI; cap the pixel count for huge ones.
+        dpi = float(self.crop_dpi)
+        pixels = (clip.width * dpi / 72.0) * (clip.height * dpi / 72.0)
+        if pixels > MAX_CROP_PIXELS:
+            dpi *= (MAX_CROP_PIXELS / pixels) ** 0.5
+        try:
+            return render(page, dpi=dpi, clip=clip, gray=True)
+        except Exception as e:
+            print(f"[barcode_engine] WARNING: crop render failed on page {page.number + 1}: {e}")
+            return None
+
+    @staticmethod
+    def _dedupe(hits: List[BarcodeHit]) -> List[BarcodeHit]:
+        """Same symbol seen from overlapping crops: keep the first."""
+        out: List[BarcodeHit] = []
+        for hit in hits:
+            r = hit.rect
+            dup = False
+            for o in out:
+                q = o.rect
+                if (
+                    o.page == hit.page
+                    and o.data == hit.data
+                    and r["x0"] < q["x1"] and q["x0"] < r["x1"]
+                    and r["y0"] < q["y1"] and q["y0"] < r["y1"]
+                ):
+                    dup = True
+                    break
+            if not dup:
+                out.append(hit)
+        return out
+
+    def detect_page(self, page: fitz.Page, image_cache: Optional[Dict[int, Tuple[List[Any], int, int]]] = None) -> List[BarcodeHit]:
+        if not HAS_PYZBAR:
+            return []
+
+        hits: List[BarcodeHit] = []
+        skip: List[Box] = []
+        if self.mode in (MODE_AUTO, MODE_EMBEDDED):
+            hits, skip = self._embedded_pass(page, image_cache)
+            if self.mode == MODE_EMBEDDED:
+                return self._dedupe(hits)
+
+        for region in self.candidate_regions(page, skip=skip).tolist():
+            crop = self._render_crop(page, tuple(region))
+            if crop is None:
+                continue
+            decoded = self._decode(crop.zbar_input())
+            hits.extend(self._hits_from_decoded(decoded, page.number + 1, crop.width, crop.height, tuple(region)))
+
+        if not hits and self.full_page_fallback:
+            full = self._render_crop(page, (0.0, 0.0, 1.0, 1.0))
+            if full is not None:
+                decoded = self._decode(full.zbar_input())
+                hits = self._hits_from_decoded(decoded, page.number + 1, full.width, full.height, (0.0, 0.0, 1.0, 1.0))
+
+        return self._dedupe(hits)
+
+    def detect_in_doc(self, doc: fitz.Document) -> List[BarcodeHit]:
+        hits: List[BarcodeHit] = []
+        image_cache: Dict[int, Tuple[List[Any], int, int]] = {}
+        for page in doc:
+            hits.extend(self.detect_page(page, image_cache))
+        return hits
+
+    def detect(self, pdf_bytes: bytes) -> List[BarcodeHit]:
+        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+        try:
+            return self.detect_in_doc(doc)
+        finally:
+            doc.close()
+
+    def detect_in_image(
+        self,
+        img: Image.Image,
+        page_number: int,
+        image_blocks: Optional[List[Dict[str, float]]] = None,
+        dpi: int = 200,
+        page: Optional[fitz.Page] = None,
+        image_cache: Optional[Dict[int, Tuple[List[Any], int, int]]] = None,
+    ) -> List[BarcodeHit]:
+        """
+        Same detection on an already rendered page raster (e.g. the shared
+        raster of analyze_document): candidates from `image_blocks`
+        (normalized, Y-flipped rects as TextFinder reports them) and the
+        gradient detector on a downscaled copy; crops are cut from `img`.
+        Given the `page`, embedded images are decoded natively first, as
+        in detect_page (`image_cache` is shared across a document's pages).
+        """
+        if not HAS_PYZBAR:
+            return []
+
+        hits: List[BarcodeHit] = []
+        skip: List[Box] = []
+        if page is not None and self.mode in (MODE_AUTO, MODE_EMBEDDED):
+            hits, skip = self._embedded_pass(page, image_cache)
+            if self.mode == MODE_EMBEDDED:
+                return self._dedupe(hits)
+        if img is None:
+            return self._dedupe(hits)
+
+        boxes: List[Box] = []
+        for r in image_blocks or []:
+            try:
+                x0, x1 = float(r["x0"]), float(r["x1"])
+                top, bottom = 1 - float(r["y1"]), 1 - float(r["y0"])
+            except Exception:
+                continue
+            if (x1 - x0) >= MIN_IMAGE_SIDE and (bottom - top) >= MIN_IMAGE_SIDE:
+                boxes.append((x0, top, x1, bottom))
+
+        gray_img = img if img.mode == "L" else img.convert("L")
+        factor = max(1, int(round(dpi / PROBE_DPI)))
+        small = gray_img.reduce(factor) if factor > 1 else gray_img
+        boxes.extend(gradient_candidates(np.asarray(small, dtype=np.uint8)))
+
+        # crops are slices of the shared raster (no copy until pyzbar's own)
+        gray = as_array(gray_img)
+        h, w = gray.shape
+        for region in self._drop_covered(self._finalize_candidates(boxes), skip).tolist():
+            px0, py0 = int(region[0] * w), int(region[1] * h)
+            px1, py1 = int(np.ceil(region[2] * w)), int(np.ceil(region[3] * h))
+            if px1 - px0 < 2 or py1 - py0 < 2:
+                continue
+            # exact fractions of the integer crop box
+            cbox = (px0 / w, py0 / h, px1 / w, py1 / h)
+            decoded = self._decode(gray[py0:py1, px0:px1])
+            hits.extend(self._hits_from_decoded(decoded, page_number, px1 - px0, py1 - py0, cbox))
+
+        if not hits and self.full_page_fallback:
+            hits = self._hits_from_decoded(self._decode(gray), page_number, w, h, (0.0, 0.0, 1.0, 1.0))
+
+        return self._dedupe(hits)
+
+
+# ------------------------------------------------------------
+# Suggestion payloads
+# ------------------------------------------------------------
+def barcode_suggestions(hits: List[BarcodeHit]) -> List[Dict[str, Any]]:
+    """Shape returned by the /auto-suggest-barcodes endpoints."""
+    return [
+        {
+            "id": f"barcode-{hit.page}-{hit.rect['x0']:.4f}-{hit.rect['y0']:.4f}",
+            "page": hit.page,
+            "rects": [hit.rect],
+            "selected": True,
+            "type": "barcode",
+            "group": "barcode",
+            "label": "BARCODE",
+        }
+        for hit in hits
+    ]
+
+
+_default_engine: Optional[BarcodeEngine] = None
+
+
+def get_barcode_engine() -> BarcodeEngine:
+    global _default_engine
+    if _default_engine is None:
+        _default_engine = BarcodeEngine()
+    return _default_engine
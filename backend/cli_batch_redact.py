@@ -79,12 +79,13 @@ def process_file(
                 filename.replace(".pdf", "_Redacted.pdf"),
             )
 
-            manual_engine.apply_redactions(
+            out_bytes = manual_engine.apply_redactions_to_bytes(
                 pdf_bytes=pdf_bytes,
                 redactions=redactions,
                 scrub_metadata=True,
-                base_filename=output_path,
             )
+            with open(output_path, "wb") as f:
+                f.write(out_bytes)
 
             print(f"  Saved: {output_path}")
             return True
@@ -93,12 +93,13 @@ def main():
     # Apply redactions
     # ------------------------------------------------------------
     try:
-        manual_engine.apply_redactions(
+        out_bytes = manual_engine.apply_redactions_to_bytes(
             pdf_bytes=pdf_bytes,
             redactions=redactions,
             scrub_metadata=True,
-            base_filename=args.output_pdf,
         )
+        with open(args.output_pdf, "wb") as f:
+            f.write(out_bytes)
     except Exception as e:
         raise RuntimeError(f"Manual redaction failed: {e}")
 
@@ -2,13 +2,78 @@
 # company_detector.py — Template‑driven company detection engine
 # ------------------------------------------------------------
 
-import re
-from typing import Optional, Dict, Any, List
+from collections import Counter
+from typing import Optional, Dict, Any, List, Union
 from difflib import SequenceMatcher
 
 from backend.redaction.text_finder import TextFinder
 from backend.template_loader import TemplateLoader
 
+# Fuzzy alias matching: trigram votes pick a few candidate windows the size
+# of the alias, and only those windows are compared with SequenceMatcher.
+_NGRAM = 3
+_MAX_FUZZY_WINDOWS = 8
+# Trigrams occurring more often than this carry no signal ("the", "ing", ...)
+_MAX_NGRAM_POSTINGS = 2000
+
+
+class _DocumentText:
+    """
+    Document text prepared once per detection: lower-cased copy plus a
+    lazily built trigram -> positions index for fuzzy alias lookups.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.lower = text.lower()
+        self._ngrams: Optional[Dict[str, List[int]]] = None
+
+    @property
+    def ngrams(self) -> Dict[str, List[int]]:
+        if self._ngrams is None:
+            index: Dict[str, List[int]] = {}
+            lower = self.lower
+            for i in range(len(lower) - _NGRAM + 1):
+                index.setdefault(lower[i:i + _NGRAM], []).append(i)
+            self._ngrams = index
+        return self._ngrams
+
+    def best_local_similarity(self, alias: str) -> float:
+        """
+        Best SequenceMatcher ratio between `alias` and any alias-sized
+        window of the document. Cost is bounded by the number of candidate
+        windows, not by the document length.
+        """
+        a = alias.lower()
+        n = len(a)
+        if not n:
+            return 0.0
+        if a in self.lower:
+            return 1.0
+
+        # Short documents: a single direct comparison is cheap enough.
+        if len(self.lower) <= 2 * n or n < _NGRAM:
+            return SequenceMatcher(None, a, self.lower).ratio()
+
+        votes: Counter = Counter()
+        ngrams = self.ngrams
+        for off in range(n - _NGRAM + 1):
+            positions = ngrams.get(a[off:off + _NGRAM])
+            if not positions or len(positions) > _MAX_NGRAM_POSTINGS:
+                continue
+            for pos in positions:
+                votes[pos - off] += 1
+
+        best = 0.0
+        max_start = len(self.lower) - n
+        for start, _ in votes.most_common(_MAX_FUZZY_WINDOWS):
+            start = min(max(start, 0), max_start)
+            sm = SequenceMatcher(None, a, self.lower[start:start + n])
+            if sm.quick_ratio() <= best:
+                continue
+            best = max(best, sm.ratio())
+        return best
+
 
 class CompanyDetector:
     """
@@ -27,8 +92,8 @@ class CompanyDetector:
     # ------------------------------------------------------------
     # Fuzzy match helper
     # ------------------------------------------------------------
-    def _fuzzy_match(self, a: str, b: str) -> float:
-        return SequenceMatcher(None, a.lower(), b.lower()).ratio()
+    def _fuzzy_match(self, alias: str, doc: _DocumentText) -> float:
+        return doc.best_local_similarity(alias)
 
     # ------------------------------------------------------------
     # Extract full text from PDF (with OCR fallback)
@@ -40,37 +105,27 @@ class CompanyDetector:
     # ------------------------------------------------------------
     # Score a template against the document text
     # ------------------------------------------------------------
-    def _score_template(self, template: Dict[str, Any], text: str) -> float:
+    def _score_template(self, template: Dict[str, Any], text: Union[str, _DocumentText]) -> float:
+        doc = text if isinstance(text, _DocumentText) else _DocumentText(text)
         score = 0.0
 
         # 1. Keywords
         for kw in template.get("keywords", []):
-            if kw.lower() in text.lower():
+            if kw.lower() in doc.lower:
                 score += 5
 
         # 2. Aliases (fuzzy)
         for alias in template.get("aliases", []):
-            if alias.lower() in text.lower():
+            if alias.lower() in doc.lower:
                 score += 10
             else:
-                ratio = self._fuzzy_match(alias, text)
+                ratio = self._fuzzy_match(alias, doc)
                 if ratio > 0.75:
                     score += ratio * 5
 
-        # 3. Regex rules
-        for rule in template.get("rules", []):
-            if rule.get("type") != "regex":
-                continue
-
-            pattern = rule.get("pattern")
-            flags = rule.get("flags", "i")
-
-            re_flags = 0
-            if "i" in flags: re_flags |= re.IGNORECASE
-            if "m" in flags: re_flags |= re.MULTILINE
-            if "s" in flags: re_flags |= re.DOTALL
-
-            if re.search(pattern, text, re_flags):
+        # 3. Regex rules (compiled once by the TemplateLoader for loaded templates)
+        for regex in self.template_loader.get_compiled_rules(template):
+            if regex.search(doc.text):
                 score += 15
 
         return score
@@ -79,14 +134,14 @@ class CompanyDetector:
     # Main detection entry point
     # ------------------------------------------------------------
     def detect_company(self, pdf_bytes: bytes) -> Optional[str]:
-        text = self._extract_text(pdf_bytes)
+        doc = _DocumentText(self._extract_text(pdf_bytes))
 
         templates = self.template_loader.get_all_templates()
         best_company = None
         best_score = 0.0
 
         for template in templates:
-            score = self._score_template(template, text)
+            score = self._score_template(template, doc)
             if score > best_score:
                 best_score = score
                 best_company = template.get("company_id")
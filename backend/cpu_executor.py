@@ -0,0 +1,167 @@
+# ------------------------------------------------------------
+# backend/cpu_executor.py — Shared bounded executors for blocking work
+# ------------------------------------------------------------
+#
+# Async FastAPI handlers must not run PyMuPDF / Tesseract / pyzbar work on
+# the event loop: one large upload would stall every other request on that
+# worker. Handlers go through one of two shared lanes instead:
+#
+#   - thread lane:  PyMuPDF rendering/redaction, pyzbar, pytesseract calls
+#                   (heavy lifting happens in C code or Tesseract subprocesses)
+#   - process lane: pure-Python CPU-bound work (top-level, picklable callables)
+#
+# Each lane admits at most `workers + queue` jobs. When a lane is saturated,
+# run() raises ExecutorSaturated — an HTTPException(503) with Retry-After —
+# so clients back off instead of piling requests onto the worker.
+#
+# Process pools use the "spawn" start method: forking the multi-threaded
+# server can hand a child a lock some other thread was holding (page cache,
+# OCR pool registry), which then never gets released in the child.
+#
+# Configuration (env):
+#   CPU_THREAD_WORKERS    thread lane size       (default: min(4, CPUs))
+#   CPU_PROCESS_WORKERS   process lane size      (default: min(4, CPUs))
+#   CPU_MAX_QUEUE         waiting jobs per lane  (default: 2 x lane size)
+#   CPU_RETRY_AFTER       Retry-After seconds on 503 (default: 5)
+
+import asyncio
+import functools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from fastapi import HTTPException
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        value = int(os.environ.get(name, ""))
+    except ValueError:
+        return default
+    return value if value > 0 else default
+
+
+_DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+RETRY_AFTER_SECONDS = _env_int("CPU_RETRY_AFTER", 5)
+
+
+class ExecutorSaturated(HTTPException):
+    """Raised when a lane's queue is full; FastAPI turns it into a 503."""
+
+    def __init__(self, lane: str):
+        super().__init__(
+            status_code=503,
+            detail=f"Server busy ({lane} executor saturated), retry later",
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+        )
+
+
+class BoundedExecutor:
+    """
+    A lazily created thread/process pool with admission control.
+
+    `inflight` counts running + queued jobs; new jobs are rejected once it
+    reaches max_workers + max_queue.
+    """
+
+    def __init__(self, name: str, kind: str, max_workers: int, max_queue: int):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown executor kind: {kind}")
+        self.name = name
+        self.kind = kind
+        self.max_workers = max(1, int(max_workers))
+        self.max_queue = max(0, int(max_queue))
+        self.inflight = 0
+
+        self._lock = threading.Lock()
+        self._pool: Optional[Executor] = None
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+
+    @property
+    def saturated(self) -> bool:
+        return self.inflight >= self.capacity
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            if self.kind == "thread":
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix=f"cpu-{self.name}",
+                )
+            else:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+        return self._pool
+
+    def _admit(self, force: bool) -> None:
+        with self._lock:
+            if not force and self.inflight >= self.capacity:
+                raise ExecutorSaturated(self.name)
+            self.inflight += 1
+
+    def _release(self) -> None:
+        with self._lock:
+            self.inflight -= 1
+
+    def check_capacity(self) -> None:
+        """Raise ExecutorSaturated now if the lane can't take more work."""
+        if self.saturated:
+            raise ExecutorSaturated(self.name)
+
+    async def run(self, func: Callable[..., Any], *args: Any, force: bool = False) -> Any:
+        """
+        Run func(*args) in the pool and await the result.
+
+        force=True skips admission control, for work that belongs to a
+        request that was already admitted (e.g. documents of a batch).
+        """
+        self._admit(force)
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_pool(), functools.partial(func, *args))
+        finally:
+            self._release()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+# ------------------------------------------------------------
+# Process-wide lanes
+# ------------------------------------------------------------
+_thread_workers = _env_int("CPU_THREAD_WORKERS", _DEFAULT_WORKERS)
+_process_workers = _env_int("CPU_PROCESS_WORKERS", _DEFAULT_WORKERS)
+
+thread_lane = BoundedExecutor(
+    "thread",
+    "thread",
+    max_workers=_thread_workers,
+    max_queue=_env_int("CPU_MAX_QUEUE", 2 * _thread_workers),
+)
+
+process_lane = BoundedExecutor(
+    "process",
+    "process",
+    max_workers=_process_workers,
+    max_queue=_env_int("CPU_MAX_QUEUE", 2 * _process_workers),
+)
+
+
+async def run_blocking(func: Callable[..., Any], *args: Any) -> Any:
+    """Shorthand for the thread lane (PyMuPDF / pytesseract / pyzbar work)."""
+    return await thread_lane.run(func, *args)
+
+
+async def run_cpu_bound(func: Callable[..., Any], *args: Any) -> Any:
+    """Shorthand for the process lane; func and args must be picklable."""
+    return await process_lane.run(func, *args)
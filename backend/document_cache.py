@@ -0,0 +1,236 @@
+# ------------------------------------------------------------
+# backend/document_cache.py — Extracted text/spans kept per document
+# ------------------------------------------------------------
+#
+# Auto-suggest extracts `ocr_result` (pages_text + spans_by_page) from the
+# uploaded PDF. Re-suggesting after a rule edit or a sensitivity change
+# only needs those spans and the new rule set, so the result is kept here
+# under a document id (sha256 of the PDF bytes) for a while.
+#
+# Entries are written to a `documents` table in the shared SQLite OCR cache
+# (see backend/ocr_cache.py), so a re-suggest that lands on another uvicorn
+# worker still finds them; each process keeps a small in-memory LRU in
+# front. If the database is unusable the cache stays per process. A miss
+# (expired, evicted, or another worker without the database) means the
+# client re-uploads.
+#
+# Configuration (env):
+#   DOC_CACHE_TTL_SECONDS  how long an entry lives after its last use (default 1800)
+#   DOC_CACHE_MAX_ITEMS    LRU size limit (default 32; 0 disables the cache)
+#   OCR_CACHE_DIR          directory of the shared database (see ocr_cache.py)
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from backend.ocr_cache import get_default_page_cache
+from backend.redaction.span_table import SpanRecord, SpanTable
+
+_DEFAULT_TTL_SECONDS = 1800
+_DEFAULT_MAX_ITEMS = 32
+
+
+def document_id_for(pdf_bytes: bytes) -> str:
+    return hashlib.sha256(pdf_bytes).hexdigest()
+
+
+def _dump_result(ocr_result: Dict[str, Any]) -> bytes:
+    data = dict(ocr_result)
+    data["spans_by_page"] = {
+        str(page): [[s.text, s.x0, s.y0, s.x1, s.y1] for s in spans]
+        for page, spans in (ocr_result.get("spans_by_page") or {}).items()
+    }
+    return json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+
+def _load_result(payload: bytes) -> Dict[str, Any]:
+    data = json.loads(payload)
+    data["spans_by_page"] = {
+        int(page): SpanTable(SpanRecord(*row) for row in rows)
+        for page, rows in (data.get("spans_by_page") or {}).items()
+    }
+    return data
+
+
+class DocumentResultCache:
+    """LRU + TTL cache of ocr_result dicts keyed by document id."""
+
+    def __init__(
+        self,
+        ttl_seconds: Optional[float] = None,
+        max_items: Optional[int] = None,
+        cache_dir: Optional[str] = None,
+    ):
+        if ttl_seconds is None:
+            try:
+                ttl_seconds = float(os.environ.get("DOC_CACHE_TTL_SECONDS", _DEFAULT_TTL_SECONDS))
+            except ValueError:
+                ttl_seconds = _DEFAULT_TTL_SECONDS
+        if max_items is None:
+            try:
+                max_items = int(os.environ.get("DOC_CACHE_MAX_ITEMS", _DEFAULT_MAX_ITEMS))
+            except ValueError:
+                max_items = _DEFAULT_MAX_ITEMS
+
+        self.ttl_seconds = max(0.0, float(ttl_seconds))
+        self.max_items = max(0, int(max_items))
+        self.enabled = self.max_items > 0 and self.ttl_seconds > 0
+
+        self.cache_dir = cache_dir or get_default_page_cache().cache_dir
+        self.path = os.path.join(self.cache_dir, "ocr_cache.sqlite3")
+        self.shared = self.enabled
+
+        self._lock = threading.Lock()
+        # document id -> (expires_at, ocr_result)
+        self._items: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_pid: Optional[int] = None
+
+    # ------------------------------------------------------------
+    # Shared table (one connection per process, like OCRPageCache)
+    # ------------------------------------------------------------
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if not self.shared:
+            return None
+
+        pid = os.getpid()
+        if self._conn is not None and self._conn_pid == pid:
+            return self._conn
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS documents (
+                    id      TEXT PRIMARY KEY,
+                    payload BLOB NOT NULL,
+                    expires REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_documents_expires ON documents(expires)")
+            conn.commit()
+        except Exception as e:
+            print(f"[document_cache] WARNING: shared cache disabled ({self.path}): {e}")
+            self.shared = False
+            return None
+
+        self._conn = conn
+        self._conn_pid = pid
+        return conn
+
+    def _purge_expired(self, now: float) -> None:
+        expired = [k for k, (expires, _) in self._items.items() if expires <= now]
+        for k in expired:
+            del self._items[k]
+
+    def _remember(self, document_id: str, expires: float, ocr_result: Dict[str, Any]) -> None:
+        self._items[document_id] = (expires, ocr_result)
+        self._items.move_to_end(document_id)
+        while len(self._items) > self.max_items:
+            self._items.popitem(last=False)
+
+    def get(self, document_id: str) -> Optional[Dict[str, Any]]:
+        if not self.enabled or not document_id:
+            return None
+        now = time.time()
+        # Sliding expiry: each re-suggest keeps the document alive.
+        expires = now + self.ttl_seconds
+        with self._lock:
+            self._purge_expired(now)
+            item = self._items.get(document_id)
+            ocr_result = item[1] if item is not None else None
+
+            conn = self._connect()
+            if conn is not None:
+                try:
+                    if ocr_result is None:
+                        row = conn.execute(
+                            "SELECT payload FROM documents WHERE id = ? AND expires > ?",
+                            (document_id, now),
+                        ).fetchone()
+                        if row is not None:
+                            ocr_result = _load_result(row[0])
+                    if ocr_result is not None:
+                        conn.execute("UPDATE documents SET expires = ? WHERE id = ?", (expires, document_id))
+                        conn.commit()
+                except Exception as e:
+                    print(f"[document_cache] WARNING: read failed: {e}")
+
+            if ocr_result is None:
+                return None
+            self._remember(document_id, expires, ocr_result)
+            return ocr_result
+
+    def put(self, document_id: str, ocr_result: Dict[str, Any]) -> None:
+        if not self.enabled or not document_id:
+            return
+        now = time.time()
+        expires = now + self.ttl_seconds
+        with self._lock:
+            self._purge_expired(now)
+            self._remember(document_id, expires, ocr_result)
+
+            conn = self._connect()
+            if conn is None:
+                return
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO documents (id, payload, expires) VALUES (?, ?, ?)",
+                    (document_id, _dump_result(ocr_result), expires),
+                )
+                conn.execute("DELETE FROM documents WHERE expires <= ?", (now,))
+                # Same size limit for the shared table, dropping the entries closest to expiry.
+                conn.execute(
+                    "DELETE FROM documents WHERE id NOT IN "
+                    "(SELECT id FROM documents ORDER BY expires DESC LIMIT ?)",
+                    (self.max_items,),
+                )
+                conn.commit()
+            except Exception as e:
+                print(f"[document_cache] WARNING: write failed: {e}")
+
+    def discard(self, document_id: str) -> None:
+        with self._lock:
+            self._items.pop(document_id, None)
+            conn = self._connect()
+            if conn is None:
+                return
+            try:
+                conn.execute("DELETE FROM documents WHERE id = ?", (document_id,))
+                conn.commit()
+            except Exception as e:
+                print(f"[document_cache] WARNING: discard failed: {e}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            conn = self._connect()
+            if conn is None:
+                return
+            try:
+                conn.execute("DELETE FROM documents")
+                conn.commit()
+            except Exception as e:
+                print(f"[document_cache] WARNING: clear failed: {e}")
+
+
+# ------------------------------------------------------------
+# Process-wide default instance
+# ------------------------------------------------------------
+_default_cache: Optional[DocumentResultCache] = None
+
+
+def get_document_cache() -> DocumentResultCache:
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = DocumentResultCache()
+    return _default_cache
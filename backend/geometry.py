@@ -0,0 +1,289 @@
+# ------------------------------------------------------------
+# backend/geometry.py — Batched box conversions (NumPy)
+# ------------------------------------------------------------
+#
+# Boxes are (N, 4) float64 arrays of (x0, y0, x1, y1). Three spaces are in
+# use across the backend:
+#
+#   pixel       raster coordinates of a rendered page (top-left origin)
+#   pdf         absolute PDF page coordinates as PyMuPDF reports them
+#   normalized  0..1 page fractions; "Y-flipped" variants store
+#               y0 = 1 - y1_pdf / height and y1 = 1 - y0_pdf / height
+#
+# OCR, text extraction and redaction application convert whole pages of
+# boxes at once here instead of converting word by word in Python.
+
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+_EMPTY = np.zeros((0, 4), dtype=np.float64)
+
+
+def as_boxes(rows: Any) -> np.ndarray:
+    """Anything array-like of 4-tuples -> (N, 4) float64."""
+    boxes = np.asarray(rows, dtype=np.float64)
+    if boxes.size == 0:
+        return _EMPTY.copy()
+    return boxes.reshape(-1, 4)
+
+
+def xywh_to_boxes(left: Sequence[float], top: Sequence[float], width: Sequence[float], height: Sequence[float]) -> np.ndarray:
+    """Tesseract-style columns -> (x0, y0, x1, y1) boxes."""
+    x = np.asarray(left, dtype=np.float64)
+    y = np.asarray(top, dtype=np.float64)
+    return np.stack([x, y, x + np.asarray(width, dtype=np.float64), y + np.asarray(height, dtype=np.float64)], axis=1)
+
+
+# ------------------------------------------------------------
+# pixel <-> pdf <-> normalized
+# ------------------------------------------------------------
+def pixel_to_pdf(boxes: np.ndarray, img_w: float, img_h: float, page_w: float, page_h: float) -> np.ndarray:
+    """Proportional mapping of raster pixels onto the page rect."""
+    scale = np.array([page_w / img_w, page_h / img_h, page_w / img_w, page_h / img_h])
+    return boxes * scale
+
+
+def pdf_to_normalized(boxes: np.ndarray, page_w: float, page_h: float, flip_y: bool = True) -> np.ndarray:
+    """
+    Absolute PDF boxes -> 0..1 fractions (Y-flipped by default).
+    A zero page dimension yields 0.0 for that axis instead of dividing by zero.
+    """
+    out = np.zeros_like(boxes, dtype=np.float64)
+    if page_w:
+        out[:, 0] = boxes[:, 0] / page_w
+        out[:, 2] = boxes[:, 2] / page_w
+    if page_h:
+        if flip_y:
+            out[:, 1] = 1 - boxes[:, 3] / page_h
+            out[:, 3] = 1 - boxes[:, 1] / page_h
+        else:
+            out[:, 1] = boxes[:, 1] / page_h
+            out[:, 3] = boxes[:, 3] / page_h
+    return out
+
+
+def pixel_to_normalized(
+    boxes: np.ndarray,
+    img_w: float,
+    img_h: float,
+    page_w: float,
+    page_h: float,
+    flip_y: bool = True,
+) -> np.ndarray:
+    return pdf_to_normalized(pixel_to_pdf(boxes, img_w, img_h, page_w, page_h), page_w, page_h, flip_y=flip_y)
+
+
+def normalized_to_pdf(
+    boxes: np.ndarray,
+    page_w: float,
+    page_h: float,
+    flip_y: bool = True,
+    order: bool = False,
+) -> np.ndarray:
+    """
+    0..1 fractions -> absolute PDF boxes.
+    order=True sorts each box's corners first (x0 <= x1, y0 <= y1).
+    """
+    b = boxes
+    if order:
+        b = np.stack(
+            [
+                np.minimum(b[:, 0], b[:, 2]),
+                np.minimum(b[:, 1], b[:, 3]),
+                np.maximum(b[:, 0], b[:, 2]),
+                np.maximum(b[:, 1], b[:, 3]),
+            ],
+            axis=1,
+        )
+
+    out = np.empty_like(b, dtype=np.float64)
+    out[:, 0] = b[:, 0] * page_w
+    out[:, 2] = b[:, 2] * page_w
+    if flip_y:
+        out[:, 1] = (1 - b[:, 3]) * page_h
+        out[:, 3] = (1 - b[:, 1]) * page_h
+    else:
+        out[:, 1] = b[:, 1] * page_h
+        out[:, 3] = b[:, 3] * page_h
+    return out
+
+
+def clamp_unit(boxes: np.ndarray) -> np.ndarray:
+    """Clamp to 0..1; NaN becomes 1.0 like max(0.0, min(1.0, nan)) did."""
+    return np.where(np.isnan(boxes), 1.0, np.clip(boxes, 0.0, 1.0))
+
+
+# ------------------------------------------------------------
+# dict rects (API payloads) <-> arrays
+# ------------------------------------------------------------
+_RECT_KEYS = ("x0", "y0", "x1", "y1")
+_RECT_DEFAULTS = (0.0, 0.0, 1.0, 1.0)
+
+
+def rects_to_boxes(rects: Iterable[Dict[str, Any]], skip_invalid: bool = False) -> Tuple[np.ndarray, List[int]]:
+    """
+    Parse {x0, y0, x1, y1} dicts (missing keys default to the full page).
+
+    Unparseable values become 0.0, or drop the whole rect when
+    skip_invalid=True. Returns (boxes, indices of the rects kept).
+    """
+    rows: List[Tuple[float, float, float, float]] = []
+    kept: List[int] = []
+    for i, r in enumerate(rects or []):
+        row = []
+        ok = True
+        for key, default in zip(_RECT_KEYS, _RECT_DEFAULTS):
+            try:
+                row.append(float(r.get(key, default)))
+            except Exception:
+                if skip_invalid:
+                    ok = False
+                    break
+                row.append(0.0)
+        if ok:
+            rows.append(tuple(row))
+            kept.append(i)
+    return (as_boxes(rows) if rows else _EMPTY.copy()), kept
+
+
+def boxes_to_rects(boxes: np.ndarray) -> List[Dict[str, float]]:
+    return [dict(zip(_RECT_KEYS, row)) for row in boxes.tolist()]
+
+
+# ------------------------------------------------------------
+# Region helpers (OCR regions of interest)
+# ------------------------------------------------------------
+def expand_boxes(boxes: np.ndarray, margin: float) -> np.ndarray:
+    """Order corners and grow every box by `margin` on each side."""
+    b = as_boxes(boxes)
+    lo = np.minimum(b[:, :2], b[:, 2:]) - margin
+    hi = np.maximum(b[:, :2], b[:, 2:]) + margin
+    return np.concatenate([lo, hi], axis=1)
+
+
+def merge_overlapping(boxes: np.ndarray) -> np.ndarray:
+    """
+    Replace every group of overlapping/touching boxes by its bounding box.
+    Repeats until stable, so chains of overlaps collapse into one box.
+    Boxes must be ordered (x0 <= x1, y0 <= y1).
+    """
+    cur = as_boxes(boxes)
+    if len(cur) <= 1:
+        return cur.copy()
+
+    changed = True
+    while changed:
+        changed = False
+        out: List[np.ndarray] = []
+        for b in cur[np.argsort(cur[:, 0], kind="stable")]:
+            for i, o in enumerate(out):
+                if b[0] <= o[2] and o[0] <= b[2] and b[1] <= o[3] and o[1] <= b[3]:
+                    out[i] = np.concatenate([np.minimum(o[:2], b[:2]), np.maximum(o[2:], b[2:])])
+                    changed = True
+                    break
+            else:
+                out.append(b.copy())
+        cur = np.stack(out)
+    return cur
+
+
+def order_boxes(boxes: np.ndarray) -> np.ndarray:
+    """Sort each box's corners so x0 <= x1 and y0 <= y1."""
+    b = as_boxes(boxes)
+    return np.concatenate([np.minimum(b[:, :2], b[:, 2:]), np.maximum(b[:, :2], b[:, 2:])], axis=1)
+
+
+def coalesce_boxes(boxes: np.ndarray, tol: float = 0.0) -> np.ndarray:
+    """
+    Sweep-line union of boxes sharing a row band: boxes with the same
+    y0/y1 (within `tol`) whose x-intervals overlap or abut (gap <= tol)
+    become one box. Only merges whose union is exactly a rectangle are
+    made, so the covered area never grows (beyond `tol` slivers).
+    Typical input: word rects of one redacted phrase.
+    """
+    b = order_boxes(boxes)
+    if len(b) <= 1:
+        return b
+
+    b = b[np.lexsort((b[:, 0], b[:, 3], b[:, 1]))]
+    out: List[List[float]] = []
+    cur = b[0].tolist()
+    for x0, y0, x1, y1 in b[1:].tolist():
+        same_band = abs(y0 - cur[1]) <= tol and abs(y1 - cur[3]) <= tol
+        if same_band and x0 <= cur[2] + tol and x1 >= cur[0] - tol:
+            cur[0] = min(cur[0], x0)
+            cur[2] = max(cur[2], x1)
+            # never shrink coverage: keep the outer edges of the band
+            cur[1] = min(cur[1], y0)
+            cur[3] = max(cur[3], y1)
+        else:
+            out.append(cur)
+            cur = [x0, y0, x1, y1]
+    out.append(cur)
+    return as_boxes(out)
+
+
+def drop_contained(boxes: np.ndarray) -> np.ndarray:
+    """
+    Remove boxes lying inside another box, and duplicates.
+    Sorted sweep on x0 (wider boxes first), checking only the boxes still
+    open at the current x0.
+    """
+    b = order_boxes(boxes)
+    if len(b) <= 1:
+        return b
+
+    order = np.lexsort((-(b[:, 3] - b[:, 1]), -b[:, 2], b[:, 0]))
+    kept: List[List[float]] = []
+    active: List[List[float]] = []
+    for x0, y0, x1, y1 in b[order].tolist():
+        active = [a for a in active if a[2] >= x0]
+        if any(a[0] <= x0 and a[1] <= y0 and x1 <= a[2] and y1 <= a[3] for a in active):
+            continue
+        box = [x0, y0, x1, y1]
+        kept.append(box)
+        active.append(box)
+    return as_boxes(kept)
+
+
+def cover_boxes(boxes: np.ndarray, tol: float = 0.0) -> np.ndarray:
+    """
+    Small set of boxes covering exactly the union of the input boxes:
+      1. drop nested/duplicate boxes
+      2. exact row-band merges (coalesce_boxes)
+      3. overlapping or abutting boxes are replaced by their bounding box
+         only when that bounding box *is* their union (same row band or
+         same column band), repeated until stable
+    Never uncovers anything and, with tol=0, never covers anything extra:
+    redacting area nobody selected would destroy content.
+    """
+    b = coalesce_boxes(drop_contained(boxes), tol)
+    if len(b) <= 1:
+        return b
+
+    changed = True
+    while changed:
+        changed = False
+        out: List[List[float]] = []
+        active: List[List[float]] = []  # boxes still open at the sweep position
+        for x0, y0, x1, y1 in b[np.argsort(b[:, 0], kind="stable")].tolist():
+            area = (x1 - x0) * (y1 - y0)
+            active = [o for o in active if o[2] + tol >= x0]
+            for o in active:
+                if x0 > o[2] + tol or o[0] > x1 + tol or y0 > o[3] + tol or o[1] > y1 + tol:
+                    continue
+                iw = max(0.0, min(x1, o[2]) - max(x0, o[0]))
+                ih = max(0.0, min(y1, o[3]) - max(y0, o[1]))
+                union = area + (o[2] - o[0]) * (o[3] - o[1]) - iw * ih
+                bx0, by0, bx1, by1 = min(x0, o[0]), min(y0, o[1]), max(x1, o[2]), max(y1, o[3])
+                if (bx1 - bx0) * (by1 - by0) <= union + 1e-9 * max(1.0, union) + tol * tol:
+                    o[:] = [bx0, by0, bx1, by1]
+                    changed = True
+                    break
+            else:
+                box = [x0, y0, x1, y1]
+                out.append(box)
+                active.append(box)
+        b = drop_contained(as_boxes(out))
+    return b
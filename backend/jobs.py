@@ -0,0 +1,505 @@
+# ------------------------------------------------------------
+# backend/jobs.py — Local background jobs (no external broker)
+# ------------------------------------------------------------
+#
+# Long operations (OCR of big scans, template suggest, batch redaction)
+# can be submitted as jobs instead of holding the HTTP connection open:
+#
+#   submit -> job row + input files on disk -> worker process runs it,
+#   reporting per-page/per-document progress -> result file on disk
+#
+# State lives in a small SQLite database (WAL) next to the job folders, so
+# every uvicorn worker and the job processes see the same jobs.
+#
+# Queued/running jobs only live in the executor of the server process that
+# submitted them (the row's `owner` pid). When a JobManager starts, jobs
+# whose owner is gone are marked failed; jobs that made no progress within
+# JOB_TTL_HOURS are treated as abandoned and purged like finished ones.
+#
+# Configuration (env):
+#   JOBS_DIR          directory holding jobs.sqlite3 and <job_id>/ folders
+#   JOB_WORKERS       worker processes per server process (default 1)
+#   JOB_TTL_HOURS     finished/abandoned jobs older than this are purged (default 24)
+#   BATCH_MAX_FILES   documents per batch, here and in /api/batch/redact (default 100)
+
+import json
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+_DEFAULT_JOBS_DIR = os.path.join(_PROJECT_ROOT, ".cache", "jobs")
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+FINISHED_STATES = (JOB_DONE, JOB_FAILED)
+ACTIVE_STATES = (JOB_QUEUED, JOB_RUNNING)
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _default_batch_max_files() -> int:
+    """BATCH_MAX_FILES env: documents accepted per batch request (default: 100)."""
+    try:
+        n = int(os.environ.get("BATCH_MAX_FILES", "0"))
+    except ValueError:
+        n = 0
+    return n if n > 0 else 100
+
+
+BATCH_MAX_FILES = _default_batch_max_files()
+
+
+def _pid_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    if os.name == "nt":
+        # os.kill(pid, 0) would terminate the process on Windows; leave
+        # these jobs to the TTL instead.
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # exists, owned by another user
+        return True
+    return True
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    status: str
+    params: Dict[str, Any]
+    inputs: List[str]
+    done: int = 0
+    total: int = 0
+    message: str = ""
+    error: Optional[str] = None
+    result_path: Optional[str] = None
+    result_media_type: Optional[str] = None
+    result_filename: Optional[str] = None
+    created: float = 0.0
+    updated: float = 0.0
+    owner: Optional[int] = None   # pid of the server process running it
+
+    def to_public(self) -> Dict[str, Any]:
+        """Status payload for the API (no server paths)."""
+        data = asdict(self)
+        for key in ("params", "inputs", "result_path", "owner"):
+            data.pop(key, None)
+        data["has_result"] = self.status == JOB_DONE and bool(self.result_path)
+        return data
+
+
+class JobStore:
+    """SQLite-backed job table plus one folder per job for inputs/results."""
+
+    def __init__(self, jobs_dir: Optional[str] = None):
+        self.jobs_dir = jobs_dir or os.environ.get("JOBS_DIR") or _DEFAULT_JOBS_DIR
+        self.path = os.path.join(self.jobs_dir, "jobs.sqlite3")
+
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_pid: Optional[int] = None
+
+    # ------------------------------------------------------------
+    # Connection (one per process; sqlite handles are not fork-safe)
+    # ------------------------------------------------------------
+    def _connect(self) -> sqlite3.Connection:
+        pid = os.getpid()
+        if self._conn is not None and self._conn_pid == pid:
+            return self._conn
+
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10.0, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id                TEXT PRIMARY KEY,
+                kind              TEXT NOT NULL,
+                status            TEXT NOT NULL,
+                params            TEXT NOT NULL,
+                inputs            TEXT NOT NULL,
+                done              INTEGER NOT NULL DEFAULT 0,
+                total             INTEGER NOT NULL DEFAULT 0,
+                message           TEXT NOT NULL DEFAULT '',
+                error             TEXT,
+                result_path       TEXT,
+                result_media_type TEXT,
+                result_filename   TEXT,
+                created           REAL NOT NULL,
+                updated           REAL NOT NULL,
+                owner             INTEGER
+            )
+            """
+        )
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+        if "owner" not in columns:
+            # job tables created before owners were recorded
+            conn.execute("ALTER TABLE jobs ADD COLUMN owner INTEGER")
+        conn.commit()
+
+        self._conn = conn
+        self._conn_pid = pid
+        return conn
+
+    def job_dir(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, job_id)
+
+    @staticmethod
+    def _row_to_job(row: sqlite3.Row) -> Job:
+        data = dict(row)
+        data["params"] = json.loads(data["params"] or "{}")
+        data["inputs"] = json.loads(data["inputs"] or "[]")
+        return Job(**data)
+
+    # ------------------------------------------------------------
+    # CRUD
+    # ------------------------------------------------------------
+    def create(self, kind: str, params: Dict[str, Any], files: List[tuple]) -> Job:
+        """
+        Create a queued job. `files` is a list of (filename, bytes); they are
+        written to the job folder so worker processes can read them.
+        """
+        job_id = uuid.uuid4().hex
+        folder = self.job_dir(job_id)
+        os.makedirs(folder, exist_ok=True)
+
+        inputs: List[str] = []
+        names: List[str] = []
+        for i, (filename, data) in enumerate(files):
+            path = os.path.join(folder, f"input_{i}.pdf")
+            with open(path, "wb") as f:
+                f.write(data)
+            inputs.append(path)
+            names.append(filename or f"document_{i}.pdf")
+
+        params = dict(params, filenames=names)
+        now = time.time()
+        job = Job(
+            id=job_id,
+            kind=kind,
+            status=JOB_QUEUED,
+            params=params,
+            inputs=inputs,
+            created=now,
+            updated=now,
+            owner=os.getpid(),
+        )
+
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT INTO jobs (id, kind, status, params, inputs, created, updated, owner) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job.id, kind, job.status, json.dumps(params), json.dumps(inputs), now, now, job.owner),
+            )
+            conn.commit()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._connect().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row is not None else None
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        if not fields:
+            return
+        fields["updated"] = time.time()
+        cols = ", ".join(f"{k} = ?" for k in fields)
+        with self._lock:
+            conn = self._connect()
+            conn.execute(f"UPDATE jobs SET {cols} WHERE id = ?", (*fields.values(), job_id))
+            conn.commit()
+
+    def set_progress(self, job_id: str, done: int, total: int, message: str = "") -> None:
+        self.update(job_id, done=int(done), total=int(total), message=message)
+
+    def delete(self, job_id: str) -> bool:
+        with self._lock:
+            conn = self._connect()
+            cur = conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+            conn.commit()
+        if cur.rowcount <= 0:
+            return False
+        shutil.rmtree(self.job_dir(job_id), ignore_errors=True)
+        return True
+
+    def purge_expired(self, ttl_seconds: float) -> int:
+        """
+        Delete jobs (and their files) not updated within ttl_seconds: finished
+        ones, and queued/running ones nobody has reported progress on.
+        """
+        if ttl_seconds <= 0:
+            return 0
+        cutoff = time.time() - ttl_seconds
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT id FROM jobs WHERE updated < ?", (cutoff,)
+            ).fetchall()
+        for row in rows:
+            self.delete(row["id"])
+        return len(rows)
+
+    def fail_orphaned(self, starting: bool = False) -> int:
+        """
+        Mark queued/running jobs whose owning server process is gone as
+        failed and drop their inputs. With starting=True the caller has not
+        submitted anything yet, so jobs carrying its own (reused) pid are
+        leftovers from a previous run too.
+        """
+        me = os.getpid()
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT * FROM jobs WHERE status IN (?, ?)", ACTIVE_STATES
+            ).fetchall()
+        failed = 0
+        for row in rows:
+            job = self._row_to_job(row)
+            if job.owner is not None and _pid_alive(job.owner) and not (starting and job.owner == me):
+                continue
+            self.update(job.id, status=JOB_FAILED, error="Server restarted before the job finished")
+            for path in job.inputs:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            failed += 1
+        return failed
+
+
+# ------------------------------------------------------------
+# Job handlers (run inside worker processes)
+# ------------------------------------------------------------
+# Each handler gets (store, job, report) and returns
+# (result_path, media_type, download_filename). `report(done, total, msg)`
+# updates the job's progress.
+Report = Callable[[int, int, str], None]
+
+
+def _read_input(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _write_json_result(store: JobStore, job: Job, payload: Any) -> str:
+    path = os.path.join(store.job_dir(job.id), "result.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f)
+    return path
+
+
+def _handle_ocr(store: JobStore, job: Job, report: Report):
+    import fitz  # PyMuPDF
+    from backend.ocr_engine import OCREngine
+
+    pdf_bytes = _read_input(job.inputs[0])
+    engine = OCREngine()
+    words: List[Dict[str, Any]] = []
+
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    try:
+        total = len(doc)
+        report(0, total, "ocr")
+        # Pool-sized chunks keep page parallelism while progress moves per chunk.
+        step = max(1, engine.workers)
+        for start in range(0, total, step):
+            chunk = list(range(start, min(total, start + step)))
+            for w in engine.ocr_document(doc, chunk, pdf_bytes=pdf_bytes):
+                words.append(
+                    {"page": w.page, "text": w.text, "x0": w.x0, "y0": w.y0, "x1": w.x1, "y1": w.y1}
+                )
+            report(chunk[-1] + 1, total, "ocr")
+    finally:
+        doc.close()
+
+    return _write_json_result(store, job, words), "application/json", None
+
+
+def _handle_suggest_template(store: JobStore, job: Job, report: Report):
+    from backend.api.auto_suggest import _suggest_template_candidates
+
+    pdf_bytes = _read_input(job.inputs[0])
+    suggestions = _suggest_template_candidates(
+        pdf_bytes,
+        job.params.get("company_id"),
+        int(job.params.get("sensitivity", 50)),
+        progress=lambda done, total: report(done, total, "analyze"),
+        ocr_mode=job.params.get("ocr_mode", "full"),
+    )
+    return _write_json_result(store, job, {"candidates": suggestions}), "application/json", None
+
+
+def _handle_batch_redact(store: JobStore, job: Job, report: Report):
+    import zipfile
+    from backend.ocr_report import _process_batch_file
+
+    names = job.params.get("filenames") or []
+    total = len(job.inputs)
+    processed: List[Dict[str, Any]] = []
+    report(0, total, "redact")
+
+    path = os.path.join(store.job_dir(job.id), "batch_redacted.zip")
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for i, input_path in enumerate(job.inputs):
+            original_name = names[i] if i < len(names) else f"document_{i}.pdf"
+            arcname, data, record = _process_batch_file(
+                _read_input(input_path),
+                original_name,
+                bool(job.params.get("auto_apply", True)),
+                bool(job.params.get("scrub_metadata", True)),
+                int(job.params.get("sensitivity", 50)),
+            )
+            if arcname is not None:
+                zf.writestr(arcname, data)
+            processed.append(record)
+            report(i + 1, total, original_name)
+
+        # Always include a processing summary.
+        zf.writestr("batch_summary.json", json.dumps({"processed": processed}, indent=2))
+
+    return path, "application/zip", "batch_redacted.zip"
+
+
+JOB_HANDLERS: Dict[str, Callable[[JobStore, Job, Report], tuple]] = {
+    "ocr": _handle_ocr,
+    "suggest_template": _handle_suggest_template,
+    "batch_redact": _handle_batch_redact,
+}
+
+
+def _run_job(job_id: str, jobs_dir: str) -> None:
+    """Worker-process entry point."""
+    store = JobStore(jobs_dir)
+    job = store.get(job_id)
+    if job is None:
+        return
+
+    handler = JOB_HANDLERS.get(job.kind)
+    if handler is None:
+        store.update(job_id, status=JOB_FAILED, error=f"Unknown job kind: {job.kind}")
+        return
+
+    store.update(job_id, status=JOB_RUNNING)
+
+    def report(done: int, total: int, message: str = "") -> None:
+        store.set_progress(job_id, done, total, message)
+
+    try:
+        result_path, media_type, filename = handler(store, job, report)
+        store.update(
+            job_id,
+            status=JOB_DONE,
+            result_path=result_path,
+            result_media_type=media_type,
+            result_filename=filename,
+        )
+    except Exception as e:
+        print(f"[jobs] WARNING: job {job_id} ({job.kind}) failed: {e}")
+        store.update(job_id, status=JOB_FAILED, error=str(e))
+    finally:
+        # Inputs are no longer needed once the job has finished.
+        for path in job.inputs:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+# ------------------------------------------------------------
+# Submission (server side)
+# ------------------------------------------------------------
+class JobManager:
+    def __init__(self, store: Optional[JobStore] = None, workers: Optional[int] = None):
+        self.store = store or JobStore()
+        if workers is None:
+            workers = int(_env_float("JOB_WORKERS", 1))
+        self.workers = max(1, workers)
+        self.ttl_seconds = _env_float("JOB_TTL_HOURS", 24) * 3600
+
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+        try:
+            stale = self.store.fail_orphaned(starting=True)
+            if stale:
+                print(f"[jobs] WARNING: marked {stale} job(s) from a previous server run as failed")
+        except Exception as e:
+            print(f"[jobs] WARNING: stale job check failed: {e}")
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # spawn: a forked child could inherit a lock held by a server thread
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._pool
+
+    def submit(self, kind: str, params: Dict[str, Any], files: List[tuple]) -> Job:
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f"Unknown job kind: {kind}")
+
+        try:
+            self.store.purge_expired(self.ttl_seconds)
+        except Exception as e:
+            print(f"[jobs] WARNING: purge failed: {e}")
+
+        job = self.store.create(kind, params, files)
+        future = self._get_pool().submit(_run_job, job.id, self.store.jobs_dir)
+        future.add_done_callback(lambda f, job_id=job.id: self._on_done(job_id, f))
+        return job
+
+    def _on_done(self, job_id: str, future) -> None:
+        # A crashed worker process never reaches its own failure handler.
+        exc = RuntimeError("job cancelled") if future.cancelled() else future.exception()
+        if exc is not None:
+            print(f"[jobs] WARNING: worker for job {job_id} died: {exc}")
+            try:
+                self.store.update(job_id, status=JOB_FAILED, error=str(exc))
+            except Exception:
+                pass
+            if isinstance(exc, BrokenExecutor):
+                # Only a broken pool is replaced; other jobs' errors leave it running.
+                with self._lock:
+                    old, self._pool = self._pool, None
+                if old is not None:
+                    old.shutdown(wait=False, cancel_futures=True)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.store.get(job_id)
+
+    def delete(self, job_id: str) -> bool:
+        return self.store.delete(job_id)
+
+
+_default_manager: Optional[JobManager] = None
+
+
+def get_job_manager() -> JobManager:
+    global _default_manager
+    if _default_manager is None:
+        _default_manager = JobManager()
+    return _default_manager
@@ -17,7 +17,9 @@ from backend.api.routes.redaction_barcodes import router as barcode_router
 from backend.api.ocr import router as ocr_router
 from backend.template_loader import TemplateLoader
 from backend.rules.merge_engine import detect_company
+from backend.cpu_executor import run_blocking
 from backend.api.ai_training import router as ai_training_router
+from backend.api.jobs import router as jobs_router
 
 app = FastAPI()
 
@@ -67,6 +69,10 @@ app.include_router(barcode_router, prefix="/api")
 #   POST /ocr
 app.include_router(ocr_router, prefix="/api")
 
+# Background jobs (submit / poll progress / fetch result):
+#   POST /api/jobs/{ocr,redact-template,batch-redact}, GET /api/jobs/{id}[/result]
+app.include_router(jobs_router)
+
 # ------------------------------------------------------------
 # Fallback /detect-company endpoint (used by Template_Detect_Backend.js)
 # ------------------------------------------------------------
@@ -179,18 +185,9 @@ async def api_save_rule(rule: str = Form(...)):
     return {"status": "ok", "saved_to": path, "company_id": company_id}
 
 
-@app.post("/detect-company")
-async def detect_company_endpoint(file: UploadFile = File(...)):
-    """
-    Simple backend company detection used by Template_Detect_Backend.js.
-    - Extracts text from PDF with PyMuPDF (via api_server's PDFTextExtractor if needed)
-    - Uses merge_engine.detect_company over config/rules/company_rules/*.json
-    - Returns { company_id, display_name } or nulls
-    """
+def _detect_company_from_pdf(pdf_bytes: bytes) -> dict:
     import fitz  # local import to avoid unused at module level
 
-    pdf_bytes = await file.read()
-
     # Extract text from PDF
     text_chunks = []
     try:
@@ -217,6 +214,18 @@ async def detect_company_endpoint(file: UploadFile = File(...)):
     }
 
 
+@app.post("/detect-company")
+async def detect_company_endpoint(file: UploadFile = File(...)):
+    """
+    Simple backend company detection used by Template_Detect_Backend.js.
+    - Extracts text from PDF with PyMuPDF (via api_server's PDFTextExtractor if needed)
+    - Uses merge_engine.detect_company over config/rules/company_rules/*.json
+    - Returns { company_id, display_name } or nulls
+    """
+    pdf_bytes = await file.read()
+    return await run_blocking(_detect_company_from_pdf, pdf_bytes)
+
+
 # Mount OCR + Redaction + Plugin API LAST.
 # Mounting at "/" can otherwise shadow non-mounted routes (notably /api/templates)
 # depending on Starlette route ordering.
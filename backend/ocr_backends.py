@@ -0,0 +1,127 @@
+# ------------------------------------------------------------
+# backend/ocr_backends.py — Resident Tesseract workers (tesserocr)
+# ------------------------------------------------------------
+#
+# pytesseract starts a `tesseract` process per page, writes the image to a
+# temp file, reloads the language model and parses TSV output. With the
+# optional tesserocr bindings (Tesseract C-API) we keep initialized
+# TessBaseAPI handles alive in the process and reuse them for every page
+# and request; only SetImage + Recognize run per page.
+#
+# Selected through OCR_BACKEND=tesserocr (see OCREngine). When tesserocr is
+# not installed the engine falls back to pytesseract.
+#
+#   pip install tesserocr     (optional)
+#
+# Configuration (env):
+#   TESSDATA_PREFIX   tessdata directory (standard Tesseract variable)
+
+import os
+import queue
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image
+
+# Optional C-API bindings
+try:
+    import tesserocr
+    HAS_TESSEROCR = True
+except ImportError:
+    tesserocr = None
+    HAS_TESSEROCR = False
+
+BACKEND_PYTESSERACT = "pytesseract"
+BACKEND_TESSEROCR = "tesserocr"
+OCR_BACKENDS = (BACKEND_PYTESSERACT, BACKEND_TESSEROCR)
+
+
+def resolve_backend(name: Optional[str] = None) -> str:
+    """
+    Backend to use: explicit name, else OCR_BACKEND env, else pytesseract.
+    tesserocr silently degrades to pytesseract when it isn't installed.
+    """
+    name = (name or os.environ.get("OCR_BACKEND") or BACKEND_PYTESSERACT).strip().lower()
+    if name not in OCR_BACKENDS:
+        print(f"[ocr_backends] WARNING: unknown OCR backend {name!r}, using {BACKEND_PYTESSERACT}")
+        return BACKEND_PYTESSERACT
+    if name == BACKEND_TESSEROCR and not HAS_TESSEROCR:
+        print("[ocr_backends] WARNING: tesserocr not installed, using pytesseract")
+        return BACKEND_PYTESSERACT
+    return name
+
+
+class TesserocrPool:
+    """
+    Per-process pool of initialized TessBaseAPI handles, keyed by language.
+
+    A handle is not thread-safe, so each call checks one out for the
+    duration of a page; handles are created on demand and never torn down
+    (the loaded model is the whole point).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._idle: Dict[Tuple[str, str], "queue.LifoQueue"] = {}
+
+    def _queue(self, key: Tuple[str, str]) -> "queue.LifoQueue":
+        with self._lock:
+            q = self._idle.get(key)
+            if q is None:
+                q = self._idle[key] = queue.LifoQueue()
+            return q
+
+    def _create(self, lang: str, path: str):
+        if path:
+            return tesserocr.PyTessBaseAPI(path=path, lang=lang)
+        return tesserocr.PyTessBaseAPI(lang=lang)
+
+    def image_to_data(self, img: Image.Image, lang: str) -> Dict[str, List]:
+        """
+        Recognize one image and return word boxes in the same shape as
+        pytesseract.image_to_data(output_type=DICT): text/left/top/width/height.
+        """
+        path = os.environ.get("TESSDATA_PREFIX", "")
+        q = self._queue((lang, path))
+        try:
+            api = q.get_nowait()
+        except queue.Empty:
+            api = self._create(lang, path)
+
+        data: Dict[str, List] = {"text": [], "left": [], "top": [], "width": [], "height": []}
+        try:
+            api.SetImage(img)
+            api.Recognize()
+
+            level = tesserocr.RIL.WORD
+            for word in tesserocr.iterate_level(api.GetIterator(), level):
+                text = word.GetUTF8Text(level)
+                box = word.BoundingBox(level)
+                if text is None or box is None:
+                    continue
+                x0, y0, x1, y1 = box
+                data["text"].append(text)
+                data["left"].append(x0)
+                data["top"].append(y0)
+                data["width"].append(x1 - x0)
+                data["height"].append(y1 - y0)
+        finally:
+            try:
+                api.Clear()
+            except Exception:
+                pass
+            q.put(api)
+
+        return data
+
+
+_default_pool: Optional[TesserocrPool] = None
+_default_pool_lock = threading.Lock()
+
+
+def get_tesserocr_pool() -> TesserocrPool:
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = TesserocrPool()
+        return _default_pool
@@ -0,0 +1,238 @@
+# ------------------------------------------------------------
+# backend/ocr_cache.py — Persistent per-page OCR result cache
+# ------------------------------------------------------------
+#
+# OCR results are stored in a small SQLite database so every uvicorn
+# worker (and the CLI tools) share the same cache across restarts.
+#
+# Keys are content-addressed: (page content hash, DPI, lang,
+# preprocessing version, OCR backend when not the default). Values are the OCR words in normalized,
+# Y-flipped page coordinates, so a page that appears in several
+# uploads (suggest -> redact -> train-from-pair) is OCR'd only once.
+#
+# Configuration (env):
+#   OCR_CACHE_DIR     directory holding ocr_cache.sqlite3
+#   OCR_CACHE_MAX_MB  size budget before LRU eviction (0 disables the cache)
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import fitz  # PyMuPDF
+
+_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+_DEFAULT_CACHE_DIR = os.path.join(_PROJECT_ROOT, ".cache", "ocr")
+_DEFAULT_MAX_MB = 256
+
+# (text, x0, y0, x1, y1) in normalized page coordinates
+CachedWord = Tuple[str, float, float, float, float]
+
+
+def page_content_hash(page: fitz.Page) -> str:
+    """
+    Hash everything that influences how a page rasterizes:
+    page geometry, the content stream, and the raw streams of the images
+    and form XObjects it draws. Cheap compared to a render + Tesseract run.
+    """
+    h = hashlib.sha256()
+    h.update(repr((tuple(page.rect), page.rotation)).encode("utf-8"))
+
+    try:
+        h.update(page.read_contents() or b"")
+    except Exception:
+        pass
+
+    doc = page.parent
+    xrefs = set()
+    try:
+        for img in page.get_images(full=True):
+            xrefs.add(img[0])
+        for xo in page.get_xobjects():
+            xrefs.add(xo[0])
+    except Exception:
+        pass
+
+    for xref in sorted(xrefs):
+        try:
+            h.update(doc.xref_stream_raw(xref) or b"")
+        except Exception:
+            continue
+
+    return h.hexdigest()
+
+
+class OCRPageCache:
+    """
+    Disk-backed LRU cache of per-page OCR words.
+
+    - SQLite in WAL mode: safe for concurrent readers/writers across processes
+    - LRU eviction by last access time once the size budget is exceeded
+    - Never raises: a broken cache degrades to "always miss"
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.cache_dir = cache_dir or os.environ.get("OCR_CACHE_DIR") or _DEFAULT_CACHE_DIR
+
+        if max_bytes is None:
+            try:
+                max_mb = float(os.environ.get("OCR_CACHE_MAX_MB", _DEFAULT_MAX_MB))
+            except ValueError:
+                max_mb = _DEFAULT_MAX_MB
+            max_bytes = int(max_mb * 1024 * 1024)
+        self.max_bytes = max(0, int(max_bytes))
+
+        self.enabled = self.max_bytes > 0
+        self.path = os.path.join(self.cache_dir, "ocr_cache.sqlite3")
+
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_pid: Optional[int] = None
+
+    # ------------------------------------------------------------
+    # Key helper
+    # ------------------------------------------------------------
+    @staticmethod
+    def make_key(
+        page_hash: str,
+        dpi: int,
+        lang: str,
+        preprocess_version: int,
+        backend: str = "pytesseract",
+    ) -> str:
+        key = f"{page_hash}:{int(dpi)}:{lang}:v{int(preprocess_version)}"
+        # Backends segment words slightly differently; keep their results apart.
+        # The default backend keeps the original key so existing entries stay valid.
+        if backend and backend != "pytesseract":
+            key += f":{backend}"
+        return key
+
+    # ------------------------------------------------------------
+    # Connection (one per process; sqlite handles are not fork-safe)
+    # ------------------------------------------------------------
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if not self.enabled:
+            return None
+
+        pid = os.getpid()
+        if self._conn is not None and self._conn_pid == pid:
+            return self._conn
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS ocr_pages (
+                    key         TEXT PRIMARY KEY,
+                    payload     BLOB NOT NULL,
+                    size        INTEGER NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_ocr_pages_access ON ocr_pages(last_access)"
+            )
+            conn.commit()
+        except Exception as e:
+            print(f"[ocr_cache] WARNING: cache disabled ({self.path}): {e}")
+            self.enabled = False
+            return None
+
+        self._conn = conn
+        self._conn_pid = pid
+        return conn
+
+    # ------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------
+    def get(self, key: str) -> Optional[List[CachedWord]]:
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return None
+            try:
+                row = conn.execute(
+                    "SELECT payload FROM ocr_pages WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                conn.execute(
+                    "UPDATE ocr_pages SET last_access = ? WHERE key = ?",
+                    (time.time(), key),
+                )
+                conn.commit()
+                return [tuple(w) for w in json.loads(row[0])]
+            except Exception as e:
+                print(f"[ocr_cache] WARNING: read failed: {e}")
+                return None
+
+    def put(self, key: str, words: List[CachedWord]) -> None:
+        payload = json.dumps([list(w) for w in words], separators=(",", ":")).encode("utf-8")
+        if len(payload) > self.max_bytes:
+            return
+
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO ocr_pages (key, payload, size, last_access) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, payload, len(payload), time.time()),
+                )
+                self._evict(conn)
+                conn.commit()
+            except Exception as e:
+                print(f"[ocr_cache] WARNING: write failed: {e}")
+
+    def clear(self) -> None:
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            try:
+                conn.execute("DELETE FROM ocr_pages")
+                conn.commit()
+            except Exception as e:
+                print(f"[ocr_cache] WARNING: clear failed: {e}")
+
+    # ------------------------------------------------------------
+    # LRU eviction
+    # ------------------------------------------------------------
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM ocr_pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        # Trim to 90% of the budget so we don't evict on every insert.
+        target = int(self.max_bytes * 0.9)
+        rows = conn.execute("SELECT key, size FROM ocr_pages ORDER BY last_access ASC")
+        doomed = []
+        for key, size in rows:
+            if total <= target:
+                break
+            doomed.append((key,))
+            total -= size
+
+        conn.executemany("DELETE FROM ocr_pages WHERE key = ?", doomed)
+
+
+# ------------------------------------------------------------
+# Process-wide default instance
+# ------------------------------------------------------------
+_default_cache: Optional[OCRPageCache] = None
+
+
+def get_default_page_cache() -> OCRPageCache:
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = OCRPageCache()
+    return _default_cache
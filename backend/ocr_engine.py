@@ -2,15 +2,147 @@
 # FIXED: Y-flip, PDF-space transform, preprocessing, span grouping, caching
 
 import io
+import multiprocessing
 import os
+import threading
 from dataclasses import dataclass
-from typing import List, Dict, Optional
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor
+from typing import List, Dict, Optional, Tuple
 
 import fitz  # PyMuPDF
+import numpy as np
 import pytesseract
 from PIL import Image, ImageFilter, ImageOps, UnidentifiedImageError
 import shutil
-import hashlib
+
+from backend.geometry import (
+    clamp_unit,
+    expand_boxes,
+    merge_overlapping,
+    normalized_to_pdf,
+    pdf_to_normalized,
+    pixel_to_normalized,
+    pixel_to_pdf,
+    rects_to_boxes,
+    xywh_to_boxes,
+)
+from backend.ocr_backends import BACKEND_TESSEROCR, get_tesserocr_pool, resolve_backend
+from backend.ocr_cache import OCRPageCache, get_default_page_cache, page_content_hash
+from backend.raster import render
+
+# Bump whenever _preprocess / rasterization changes so cached OCR
+# results produced by the old pipeline are not reused.
+PREPROCESS_VERSION = 1
+
+# (text, x0, y0, x1, y1) in normalized, Y-flipped page coordinates
+WordTuple = Tuple[str, float, float, float, float]
+
+
+def _default_ocr_workers() -> int:
+    """
+    OCR_WORKERS env: number of OCR worker processes.
+    1 (default) keeps OCR in-process; 0 means one worker per CPU core.
+    """
+    try:
+        n = int(os.environ.get("OCR_WORKERS", "1"))
+    except ValueError:
+        n = 1
+    if n <= 0:
+        n = os.cpu_count() or 1
+    return n
+
+
+def _default_roi_dpi() -> int:
+    """OCR_ROI_DPI env: raster DPI for region-of-interest OCR (default 300)."""
+    try:
+        n = int(os.environ.get("OCR_ROI_DPI", "300"))
+    except ValueError:
+        n = 300
+    return n if n > 0 else 300
+
+
+# Grow every region of interest by this page fraction so words straddling
+# a zone edge are still recognized whole.
+ROI_MARGIN = 0.015
+
+
+# ------------------------------------------------------------
+# Adaptive resolution (cheap low-res probe before OCR)
+# ------------------------------------------------------------
+# A grayscale render at PROBE_DPI tells us whether a page is blank (then
+# it is not OCR'd at all) and roughly how tall its text lines are, from
+# which we pick the DPI that gives Tesseract ~TARGET_XHEIGHT_PX x-height.
+PROBE_DPI = 72
+BLANK_INK_RATIO = 0.001        # below this share of dark pixels: blank page
+TARGET_XHEIGHT_PX = 20
+XHEIGHT_PER_LINE = 0.5         # x-height as a share of a text line's ink height
+ADAPTIVE_MIN_DPI = 150
+ADAPTIVE_MAX_DPI = 400
+
+
+def _default_adaptive() -> bool:
+    """OCR_ADAPTIVE env: adaptive DPI + blank page skip (opt-in, default off)."""
+    return os.environ.get("OCR_ADAPTIVE", "0").strip().lower() in ("1", "true", "yes", "on")
+
+
+@dataclass
+class PageProbe:
+    blank: bool
+    ink_ratio: float
+    line_height_pt: Optional[float] = None
+    dpi: Optional[int] = None
+
+
+def probe_gray(gray: np.ndarray, dpi: float) -> PageProbe:
+    """
+    Classify a low-res grayscale raster (H x W uint8).
+    Ink = pixels clearly darker than the page background; line height is
+    the median height of the row bands that contain ink.
+    """
+    if gray.size == 0:
+        return PageProbe(blank=True, ink_ratio=0.0)
+
+    background = float(np.median(gray))
+    if background < 100:
+        # Dark/inverted scan: can't separate ink from paper, OCR as usual.
+        return PageProbe(blank=False, ink_ratio=1.0)
+
+    ink = gray < min(160.0, background - 50.0)
+    ink_ratio = float(ink.mean())
+    if ink_ratio < BLANK_INK_RATIO:
+        return PageProbe(blank=True, ink_ratio=ink_ratio)
+
+    rows = ink.sum(axis=1) > max(1, int(0.002 * gray.shape[1]))
+    edges = np.diff(np.concatenate(([0], rows.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    if not len(starts):
+        return PageProbe(blank=False, ink_ratio=ink_ratio)
+
+    line_height_pt = float(np.median(ends - starts)) * 72.0 / dpi
+    xheight_pt = max(line_height_pt * XHEIGHT_PER_LINE, 1.0)
+    target = TARGET_XHEIGHT_PX * 72.0 / xheight_pt
+    chosen = int(round(target / 25.0) * 25)
+    chosen = max(ADAPTIVE_MIN_DPI, min(ADAPTIVE_MAX_DPI, chosen))
+    return PageProbe(blank=False, ink_ratio=ink_ratio, line_height_pt=line_height_pt, dpi=chosen)
+
+
+def probe_page(page: fitz.Page, clip: Optional[fitz.Rect] = None) -> Optional[PageProbe]:
+    """Render (part of) a page in grayscale at PROBE_DPI and classify it."""
+    try:
+        raster = render(page, dpi=PROBE_DPI, clip=clip, gray=True)
+    except Exception as e:
+        print(f"⚠ WARNING: page probe failed on page {page.number + 1}: {e}")
+        return None
+    return probe_gray(raster.array, PROBE_DPI)
+
+
+def probe_image(img: Image.Image, dpi: float) -> PageProbe:
+    """Same as probe_page() for an already rendered raster (downscaled first)."""
+    factor = max(1, int(dpi // PROBE_DPI))
+    gray = img if img.mode == "L" else img.convert("L")
+    small = gray.reduce(factor) if factor > 1 else gray
+    return probe_gray(np.asarray(small, dtype=np.uint8), dpi / factor)
 
 
 @dataclass
@@ -31,11 +163,31 @@ class OCREngine:
     - PDF-space coordinate transform
     - Preprocessing (deskew + denoise)
     - Span grouping
-    - Caching
+    - Caching (persistent, per page, shared across workers)
+    - Optional process pool for multi-page documents (OCR_WORKERS)
+    - Region-of-interest OCR at high DPI (ocr_page_regions)
+    - Adaptive DPI per page + blank page skip (OCR_ADAPTIVE)
+    - Optional resident Tesseract workers (OCR_BACKEND=tesserocr) instead of
+      one tesseract subprocess per page
     """
 
-    def __init__(self, lang: str = "eng", tesseract_path: Optional[str] = None):
+    def __init__(
+        self,
+        lang: str = "eng",
+        tesseract_path: Optional[str] = None,
+        dpi: int = 200,
+        page_cache: Optional[OCRPageCache] = None,
+        workers: Optional[int] = None,
+        backend: Optional[str] = None,
+        adaptive: Optional[bool] = None,
+    ):
         self.lang = lang
+        self.dpi = dpi
+        self.workers = max(1, workers) if workers is not None else _default_ocr_workers()
+        self.backend = resolve_backend(backend)
+        self.roi_dpi = _default_roi_dpi()
+        # When adaptive, `dpi` is only the fallback for pages the probe can't size.
+        self.adaptive = _default_adaptive() if adaptive is None else bool(adaptive)
 
         # Try to locate Tesseract even when it's not on PATH.
         # This prevents "OCR works only on machines where tesseract is already in PATH".
@@ -62,18 +214,22 @@ class OCREngine:
         # so we also verify os.path.isfile.
         cmd = getattr(pytesseract.pytesseract, "tesseract_cmd", "")
         self.tesseract_available = bool(shutil.which(cmd) or (cmd and os.path.isfile(cmd)))
+        # tesserocr links libtesseract directly; no executable needed
+        if self.backend == BACKEND_TESSEROCR:
+            self.tesseract_available = True
         if not self.tesseract_available:
             print("⚠ WARNING: Tesseract not found. OCR will return empty results.")
 
-        # FIXED: simple in-memory cache
-        self.cache: Dict[str, List[OCRWord]] = {}
+        # FIXED: persistent per-page cache (see backend/ocr_cache.py)
+        self.page_cache = page_cache if page_cache is not None else get_default_page_cache()
 
     # ------------------------------------------------------------
     # Preprocess image (deskew + denoise)
     # ------------------------------------------------------------
     def _preprocess(self, img: Image.Image) -> Image.Image:
         try:
-            img = img.convert("L")  # grayscale
+            if img.mode != "L":
+                img = img.convert("L")  # grayscale
             img = ImageOps.autocontrast(img)
             img = img.filter(ImageFilter.MedianFilter(size=3))
             return img
@@ -82,123 +238,293 @@ class OCREngine:
 
     # ------------------------------------------------------------
     # Convert PDF page → PIL image
+    # Rendered directly in grayscale (all OCR needs); the image is a view
+    # of the Pixmap's memory, not a copy.
     # ------------------------------------------------------------
-    def _page_to_image(self, page: fitz.Page, dpi: int = 200) -> Optional[Image.Image]:
+    def _page_to_image(
+        self,
+        page: fitz.Page,
+        dpi: int = 200,
+        clip: Optional[fitz.Rect] = None,
+    ) -> Optional[Image.Image]:
         try:
-            zoom = dpi / 72.0
-            mat = fitz.Matrix(zoom, zoom)
-            pix = page.get_pixmap(matrix=mat, alpha=False)
-            img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-            return img
+            return render(page, dpi=dpi, clip=clip, gray=True).image()
         except Exception as e:
             print(f"❌ ERROR: Failed to rasterize page {page.number}: {e}")
             return None
 
     # ------------------------------------------------------------
-    # Convert OCR pixel coords → normalized PDF coords
+    # Tesseract image_to_data → normalized word tuples
+    # Pixel boxes are mapped onto the page rect and normalized + Y-flipped
+    # (PDF y=0 bottom → normalized y=0 top) for the whole page at once.
+    # With `clip`, the raster covers only that part of the page.
     # ------------------------------------------------------------
-    def _pixel_to_pdf_norm(self, page: fitz.Page, x: float, y: float, w: float, h: float, img_w: float, img_h: float):
-        # Convert pixel → PDF absolute coords
-        # Use page.transform to map image space → PDF space
-        # (PyMuPDF maps pixmap coords directly via inverse matrix)
-        try:
-            # Pixel → PDF absolute
-            abs_x0, abs_y0 = page.transform_pixmap_point((x, y), img_w, img_h)
-            abs_x1, abs_y1 = page.transform_pixmap_point((x + w, y + h), img_w, img_h)
-        except Exception:
-            # Fallback: simple proportional mapping
-            pw, ph = page.rect.width, page.rect.height
-            abs_x0 = (x / img_w) * pw
-            abs_x1 = ((x + w) / img_w) * pw
-            abs_y0 = (y / img_h) * ph
-            abs_y1 = ((y + h) / img_h) * ph
+    def _words_from_data(
+        self,
+        page: fitz.Page,
+        data: Dict,
+        width: int,
+        height: int,
+        clip: Optional[fitz.Rect] = None,
+    ) -> List[WordTuple]:
+        texts = data.get("text", [])
+        keep = [i for i in range(len(texts)) if texts[i].strip()]
+        if not keep:
+            return []
 
-        # FIXED: Normalize + Y-flip
-        pw, ph = page.rect.width, page.rect.height
+        boxes = xywh_to_boxes(
+            [data["left"][i] for i in keep],
+            [data["top"][i] for i in keep],
+            [data["width"][i] for i in keep],
+            [data["height"][i] for i in keep],
+        )
+        if clip is None:
+            norm = pixel_to_normalized(boxes, width, height, page.rect.width, page.rect.height)
+        else:
+            pdf = pixel_to_pdf(boxes, width, height, clip.width, clip.height)
+            pdf += (clip.x0, clip.y0, clip.x0, clip.y0)
+            norm = pdf_to_normalized(pdf, page.rect.width, page.rect.height)
 
-        nx0 = abs_x0 / pw
-        nx1 = abs_x1 / pw
+        return [
+            (texts[i].strip(), nx0, ny0, nx1, ny1)
+            for i, (nx0, ny0, nx1, ny1) in zip(keep, norm.tolist())
+        ]
 
-        # PDF y=0 bottom → normalized y=0 top
-        ny0 = 1 - (abs_y1 / ph)
-        ny1 = 1 - (abs_y0 / ph)
+    # ------------------------------------------------------------
+    # Rasterize + Tesseract one open page (no cache)
+    # Returns None on failure so callers don't cache a bad result.
+    # `image` may be a pre-rendered (gray or RGB) raster of the page that
+    # accepts_raster() approved; it is OCR'd as-is.
+    # `clip` (+ `dpi`) recognizes only that part of the page.
+    # ------------------------------------------------------------
+    def _recognize_page(
+        self,
+        page: fitz.Page,
+        image: Optional[Image.Image] = None,
+        clip: Optional[fitz.Rect] = None,
+        dpi: Optional[int] = None,
+    ) -> Optional[List[WordTuple]]:
+        if self.adaptive and image is None:
+            # Blank pages/zones are not rasterized at full size, preprocessed or OCR'd.
+            probe = probe_page(page, clip=clip)
+            if probe is not None:
+                if probe.blank:
+                    return []
+                if dpi is None and probe.dpi:
+                    dpi = probe.dpi
+
+        img = image if image is not None else self._page_to_image(page, dpi=dpi or self.dpi, clip=clip)
+        if img is None:
+            return None
+
+        img = self._preprocess(img)
+        width, height = img.size
 
-        return nx0, ny0, nx1, ny1
+        try:
+            data = self._image_to_data(img)
+        except Exception as e:
+            print(f"❌ ERROR: OCR failed on page {page.number + 1}: {e}")
+            return None
+
+        return self._words_from_data(page, data, width, height, clip=clip)
+
+    def accepts_raster(self, img: Image.Image, dpi: int) -> bool:
+        """
+        Whether a page raster the caller already rendered at `dpi` can be
+        OCR'd as-is: at exactly self.dpi, or (adaptive) at least the DPI
+        the probe asks for. Blank pages are left to the engine, which skips
+        them without OCR.
+        """
+        if not self.adaptive:
+            return dpi == self.dpi
+        probe = probe_image(img, dpi)
+        return not probe.blank and (probe.dpi or self.dpi) <= dpi
+
+    def _image_to_data(self, img: Image.Image) -> Dict:
+        if self.backend == BACKEND_TESSEROCR:
+            # Reuses an already-initialized TessBaseAPI (model stays loaded)
+            return get_tesserocr_pool().image_to_data(img, self.lang)
+        return pytesseract.image_to_data(
+            img,
+            lang=self.lang,
+            output_type=pytesseract.Output.DICT,
+        )
+
+    def _cache_key(self, page: fitz.Page, dpi: Optional[int] = None) -> Optional[str]:
+        if self.page_cache is None or not self.page_cache.enabled:
+            return None
+        key = self.page_cache.make_key(
+            page_content_hash(page), dpi or self.dpi, self.lang, PREPROCESS_VERSION, backend=self.backend
+        )
+        # Adaptive results depend on the probe, not only on the fallback DPI.
+        return key + ":adaptive" if self.adaptive else key
 
     # ------------------------------------------------------------
-    # OCR entire PDF (bytes)
+    # OCR several pages of an open document (cache-aware, ordered)
     # ------------------------------------------------------------
-    def ocr_pdf_bytes(self, pdf_bytes: bytes) -> List[OCRWord]:
-        if not self.tesseract_available:
-            return []
+    def _ocr_doc_pages(
+        self,
+        doc: fitz.Document,
+        page_indices: List[int],
+        pdf_bytes: Optional[bytes] = None,
+        images: Optional[Dict[int, Image.Image]] = None,
+    ) -> List[OCRWord]:
+        images = images or {}
+        words_by_page: Dict[int, List[WordTuple]] = {}
+        keys: Dict[int, str] = {}
+        missing: List[int] = []
+
+        for idx in page_indices:
+            key = self._cache_key(doc[idx])
+            if key is not None:
+                keys[idx] = key
+                cached = self.page_cache.get(key)
+                if cached is not None:
+                    words_by_page[idx] = cached
+                    continue
+            missing.append(idx)
+
+        recognized: Dict[int, Optional[List[WordTuple]]] = {}
+        to_pool = [i for i in missing if i not in images]
+        if to_pool and pdf_bytes is not None and self.workers > 1 and len(to_pool) > 1:
+            recognized = self._recognize_pages_parallel(pdf_bytes, to_pool)
+
+        for idx in missing:
+            if idx not in recognized:
+                recognized[idx] = self._recognize_page(doc[idx], image=images.get(idx))
+
+            words = recognized[idx]
+            if words is None:
+                continue
+            words_by_page[idx] = words
+            if idx in keys:
+                self.page_cache.put(keys[idx], words)
+
+        results: List[OCRWord] = []
+        for idx in page_indices:
+            for t, x0, y0, x1, y1 in words_by_page.get(idx, []):
+                results.append(OCRWord(idx + 1, t, x0, y0, x1, y1))
+        return results
 
-        # FIXED: caching
-        key = hashlib.sha256(pdf_bytes).hexdigest()
-        if key in self.cache:
-            return self.cache[key]
+    # ------------------------------------------------------------
+    # Fan pages out to the process pool
+    # ------------------------------------------------------------
+    def _recognize_pages_parallel(
+        self,
+        pdf_bytes: bytes,
+        page_indices: List[int],
+    ) -> Dict[int, Optional[List[WordTuple]]]:
+        # Contiguous chunks: every worker parses the PDF once for its whole chunk.
+        n_chunks = min(self.workers, len(page_indices))
+        size = -(-len(page_indices) // n_chunks)
+        chunks = [page_indices[i:i + size] for i in range(0, len(page_indices), size)]
 
+        cmd = getattr(pytesseract.pytesseract, "tesseract_cmd", "")
+        recognized: Dict[int, Optional[List[WordTuple]]] = {}
+        pool: Optional[ProcessPoolExecutor] = None
         try:
-            doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+            pool = _get_ocr_pool(self.workers)
+            futures = [
+                pool.submit(
+                    _ocr_pages_worker, pdf_bytes, chunk, self.lang, self.dpi, cmd, self.backend, self.adaptive
+                )
+                for chunk in chunks
+            ]
+            for fut in futures:
+                recognized.update(fut.result())
         except Exception as e:
-            print(f"❌ ERROR: Failed to open PDF for OCR: {e}")
+            # Pool unavailable/broken: the caller OCRs the remaining pages in-process.
+            print(f"⚠ WARNING: parallel OCR failed, falling back to sequential: {e}")
+            if isinstance(e, BrokenExecutor) and pool is not None:
+                _discard_ocr_pool(self.workers, pool)
+        return recognized
+
+    # ------------------------------------------------------------
+    # Document-session API: OCR pages of an already-open document
+    # (lets callers that already parsed the PDF avoid reopening it)
+    # ------------------------------------------------------------
+    def ocr_page(self, page: fitz.Page) -> List[OCRWord]:
+        if not self.tesseract_available:
+            return []
+        return self._ocr_doc_pages(page.parent, [page.number])
+
+    def ocr_document(
+        self,
+        doc: fitz.Document,
+        page_indices: Optional[List[int]] = None,
+        pdf_bytes: Optional[bytes] = None,
+        images: Optional[Dict[int, Image.Image]] = None,
+    ) -> List[OCRWord]:
+        """
+        OCR the given pages (default: all) of an open document, in order.
+        Pass pdf_bytes to allow the process pool; without it pages are
+        OCR'd in-process from the open document.
+        `images` maps page index -> raster already rendered at self.dpi,
+        so callers that rasterize anyway don't pay for a second render.
+        """
+        if not self.tesseract_available:
             return []
 
-        results: List[OCRWord] = []
+        if page_indices is None:
+            page_indices = list(range(len(doc)))
+        page_indices = [i for i in page_indices if 0 <= i < len(doc)]
+        if not page_indices:
+            return []
 
-        for page_index in range(len(doc)):
-            page = doc[page_index]
+        return self._ocr_doc_pages(doc, page_indices, pdf_bytes=pdf_bytes, images=images)
 
-            img = self._page_to_image(page)
-            if img is None:
-                continue
+    # ------------------------------------------------------------
+    # Region-of-interest OCR
+    # Only the given zones are rasterized (at self.roi_dpi) and
+    # recognized; the rest of the page is skipped. Regions use the same
+    # normalized, Y-flipped {x0, y0, x1, y1} dicts as suggestions.
+    # ------------------------------------------------------------
+    def ocr_page_regions(
+        self,
+        page: fitz.Page,
+        regions: List[Dict[str, float]],
+        margin: float = ROI_MARGIN,
+    ) -> List[OCRWord]:
+        """
+        OCR the union of `regions` (each grown by `margin`) on one page.
+        Overlapping regions are merged first so no word is read twice.
+        Results are cached per page and region.
+        """
+        if not self.tesseract_available or not regions:
+            return []
 
-            img = self._preprocess(img)
-            width, height = img.size
+        boxes, _ = rects_to_boxes(regions, skip_invalid=True)
+        if not len(boxes):
+            return []
+        boxes = merge_overlapping(clamp_unit(expand_boxes(boxes, margin)))
+        clips = normalized_to_pdf(boxes, page.rect.width, page.rect.height, flip_y=True)
 
-            try:
-                data = pytesseract.image_to_data(
-                    img,
-                    lang=self.lang,
-                    output_type=pytesseract.Output.DICT,
-                )
-            except Exception as e:
-                print(f"❌ ERROR: OCR failed on page {page_index + 1}: {e}")
+        base_key = self._cache_key(page, dpi=self.roi_dpi)
+        results: List[OCRWord] = []
+        for region, clip_box in zip(boxes.tolist(), clips.tolist()):
+            clip = fitz.Rect(*clip_box)
+            if clip.is_empty:
                 continue
 
-            n = len(data.get("text", []))
-            for i in range(n):
-                text = data["text"][i].strip()
-                if not text:
+            key = None
+            if base_key is not None:
+                key = base_key + ":roi:" + ",".join(f"{v:.4f}" for v in region)
+            words = self.page_cache.get(key) if key is not None else None
+            if words is None:
+                words = self._recognize_page(page, clip=clip, dpi=self.roi_dpi)
+                if words is None:
                     continue
+                if key is not None:
+                    self.page_cache.put(key, words)
 
-                x = data["left"][i]
-                y = data["top"][i]
-                w = data["width"][i]
-                h = data["height"][i]
-
-                nx0, ny0, nx1, ny1 = self._pixel_to_pdf_norm(page, x, y, w, h, width, height)
-
-                results.append(
-                    OCRWord(
-                        page=page_index + 1,
-                        text=text,
-                        x0=nx0,
-                        y0=ny0,
-                        x1=nx1,
-                        y1=ny1,
-                    )
-                )
-
-        doc.close()
-
-        # FIXED: cache results
-        self.cache[key] = results
+            for t, x0, y0, x1, y1 in words:
+                results.append(OCRWord(page.number + 1, t, x0, y0, x1, y1))
         return results
 
     # ------------------------------------------------------------
-    # OCR a single page
+    # OCR entire PDF (bytes)
     # ------------------------------------------------------------
-    def ocr_pdf_bytes_per_page(self, pdf_bytes: bytes, page_index: int) -> List[OCRWord]:
+    def ocr_pdf_bytes(self, pdf_bytes: bytes) -> List[OCRWord]:
         if not self.tesseract_available:
             return []
 
@@ -208,56 +534,93 @@ class OCREngine:
             print(f"❌ ERROR: Failed to open PDF for OCR: {e}")
             return []
 
-        if page_index < 0 or page_index >= len(doc):
+        try:
+            return self.ocr_document(doc, pdf_bytes=pdf_bytes)
+        finally:
             doc.close()
-            return []
 
-        page = doc[page_index]
-
-        img = self._page_to_image(page)
-        if img is None:
-            doc.close()
+    # ------------------------------------------------------------
+    # OCR a single page
+    # ------------------------------------------------------------
+    def ocr_pdf_bytes_per_page(self, pdf_bytes: bytes, page_index: int) -> List[OCRWord]:
+        if not self.tesseract_available:
             return []
 
-        img = self._preprocess(img)
-        width, height = img.size
-
         try:
-            data = pytesseract.image_to_data(
-                img,
-                lang=self.lang,
-                output_type=pytesseract.Output.DICT,
-            )
+            doc = fitz.open(stream=pdf_bytes, filetype="pdf")
         except Exception as e:
-            print(f"❌ ERROR: OCR failed on page {page_index + 1}: {e}")
-            doc.close()
+            print(f"❌ ERROR: Failed to open PDF for OCR: {e}")
             return []
 
-        results: List[OCRWord] = []
-        n = len(data.get("text", []))
-
-        for i in range(n):
-            text = data["text"][i].strip()
-            if not text:
-                continue
+        try:
+            if page_index < 0 or page_index >= len(doc):
+                return []
+            return self.ocr_page(doc[page_index])
+        finally:
+            doc.close()
 
-            x = data["left"][i]
-            y = data["top"][i]
-            w = data["width"][i]
-            h = data["height"][i]
-
-            nx0, ny0, nx1, ny1 = self._pixel_to_pdf_norm(page, x, y, w, h, width, height)
-
-            results.append(
-                OCRWord(
-                    page=page_index + 1,
-                    text=text,
-                    x0=nx0,
-                    y0=ny0,
-                    x1=nx1,
-                    y1=ny1,
-                )
-            )
 
+# ------------------------------------------------------------
+# Process pools (shared by all OCREngine instances in a process)
+# One pool per worker count: engines configured differently never
+# shut down each other's pool while it has work in flight. Workers are
+# spawned, not forked, so they never inherit a lock held by a server thread.
+# ------------------------------------------------------------
+_ocr_pools: Dict[int, ProcessPoolExecutor] = {}
+_ocr_pool_lock = threading.Lock()
+
+
+def _get_ocr_pool(workers: int) -> ProcessPoolExecutor:
+    with _ocr_pool_lock:
+        pool = _ocr_pools.get(workers)
+        if pool is None:
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _ocr_pools[workers] = pool
+        return pool
+
+
+def _discard_ocr_pool(workers: int, pool: ProcessPoolExecutor) -> None:
+    """Drop a broken pool so the next call starts a fresh one."""
+    with _ocr_pool_lock:
+        # another caller may already have replaced it
+        if _ocr_pools.get(workers) is pool:
+            del _ocr_pools[workers]
+    try:
+        pool.shutdown(wait=False, cancel_futures=True)
+    except Exception:
+        pass
+
+
+def _ocr_pages_worker(
+    pdf_bytes: bytes,
+    page_indices: List[int],
+    lang: str,
+    dpi: int,
+    tesseract_cmd: str,
+    backend: Optional[str] = None,
+    adaptive: Optional[bool] = None,
+) -> Dict[int, Optional[List[WordTuple]]]:
+    """
+    Pool task: open the PDF once and OCR a chunk of pages.
+    Caching is left to the parent so only one process writes each entry.
+    With the tesserocr backend the worker process keeps its TessBaseAPI
+    handles between tasks, so the model loads once per worker.
+    """
+    engine = OCREngine(
+        lang=lang,
+        tesseract_path=tesseract_cmd or None,
+        dpi=dpi,
+        page_cache=OCRPageCache(max_bytes=0),
+        workers=1,
+        backend=backend,
+        adaptive=adaptive,
+    )
+
+    out: Dict[int, Optional[List[WordTuple]]] = {}
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    try:
+        for idx in page_indices:
+            out[idx] = engine._recognize_page(doc[idx])
+    finally:
         doc.close()
-        return results
+    return out
@@ -7,20 +7,22 @@
 # - Plugin system (tools)
 #
 # Requires:
-#   pip install pymupdf pillow pytesseract fastapi uvicorn pdf2image pyzbar
+#   pip install pymupdf pillow numpy pytesseract fastapi uvicorn pyzbar
 
 import io
 import os
 import re
 import json
+import asyncio
+import tempfile
 import zipfile
-from typing import Dict, Any, List, Optional
+from dataclasses import dataclass
+from typing import IO, Dict, Any, AsyncIterator, List, Optional, Tuple
 
 import fitz  # PyMuPDF
-from PIL import Image
 import pytesseract
 from fastapi import FastAPI, File, UploadFile, Form
-from fastapi.responses import JSONResponse, Response
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 
 # Plugin system
 from backend.plugins.manager import load_plugins
@@ -32,10 +34,16 @@ from backend.suggestions import (
 )
 from backend.rules.merge_engine import detect_company
 from backend.pdf_engine import build_redacted_filename
-
-# Barcode libs
-from pyzbar.pyzbar import decode
-from pdf2image import convert_from_bytes
+from backend.cpu_executor import ExecutorSaturated, run_blocking, thread_lane
+from backend.jobs import BATCH_MAX_FILES
+from backend.document_cache import document_id_for, get_document_cache
+from backend.redaction.span_table import SpanTable
+from backend.geometry import as_boxes, normalized_to_pdf, pdf_to_normalized, rects_to_boxes
+from backend.rules.ocr_regions import REPORT_NUMBER_CLIP
+from backend.redaction.redaction_plan import RedactionPlan
+from backend.ocr_engine import _default_adaptive, probe_page
+from backend.barcode_engine import barcode_suggestions, get_barcode_engine
+from backend.raster import render
 
 # ------------------------------------------------------------
 # Resolve company rules directory
@@ -88,24 +96,33 @@ REPORT_REGEX = re.compile(r"C[0-9A-Z]{4,6}-[0-9A-Z]{4,6}")
 def ocr_region_from_pdf(
     pdf_bytes: bytes,
     page_index: int = 0,
-    rect_frac=(0.55, 0.70, 0.95, 0.90),
-    dpi: int = 300,
+    rect_frac=REPORT_NUMBER_CLIP,
+    dpi: Optional[int] = None,
 ):
     doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-    if page_index >= len(doc):
-        return None, None, None
-
-    page = doc[page_index]
-    page_rect = page.rect
-
-    x0 = page_rect.x0 + rect_frac[0] * page_rect.width
-    y0 = page_rect.y0 + rect_frac[1] * page_rect.height
-    x1 = page_rect.x0 + rect_frac[2] * page_rect.width
-    y1 = page_rect.y0 + rect_frac[3] * page_rect.height
-
-    clip = fitz.Rect(x0, y0, x1, y1)
-    pix = page.get_pixmap(clip=clip, dpi=dpi, alpha=False)
-    img = Image.open(io.BytesIO(pix.tobytes()))
+    try:
+        if page_index >= len(doc):
+            return None, None, None
+
+        page = doc[page_index]
+        page_rect = page.rect
+
+        x0 = page_rect.x0 + rect_frac[0] * page_rect.width
+        y0 = page_rect.y0 + rect_frac[1] * page_rect.height
+        x1 = page_rect.x0 + rect_frac[2] * page_rect.width
+        y1 = page_rect.y0 + rect_frac[3] * page_rect.height
+
+        clip = fitz.Rect(x0, y0, x1, y1)
+        if dpi is None and _default_adaptive():
+            # OCR_ADAPTIVE: low-res probe first, skip an empty clip and
+            # size the DPI to the text.
+            probe = probe_page(page, clip=clip)
+            if probe is not None and probe.blank:
+                return "", clip, page_rect
+            dpi = probe.dpi if probe is not None else None
+        img = render(page, dpi=dpi or 300, clip=clip, gray=True).image()
+    finally:
+        doc.close()
     # If Tesseract isn't installed/available, keep frontend working.
     try:
         text = pytesseract.image_to_string(img)
@@ -118,7 +135,7 @@ def ocr_region_from_pdf(
 async def ocr_report(file: UploadFile = File(...)):
     pdf_bytes = await file.read()
     try:
-        text, clip, page_rect = ocr_region_from_pdf(pdf_bytes)
+        text, clip, page_rect = await run_blocking(ocr_region_from_pdf, pdf_bytes)
         if not text:
             return JSONResponse({"ok": False, "message": "no text"}, status_code=200)
 
@@ -142,6 +159,8 @@ async def ocr_report(file: UploadFile = File(...)):
         }
         return JSONResponse({"ok": True, "candidate": candidate}, status_code=200)
 
+    except ExecutorSaturated:
+        raise
     except Exception as e:
         return JSONResponse({"ok": False, "message": str(e)}, status_code=500)
 
@@ -153,7 +172,7 @@ async def ocr_report(file: UploadFile = File(...)):
 def extract_ocr_structure(pdf_bytes: bytes) -> Dict[str, Any]:
     doc = fitz.open(stream=pdf_bytes, filetype="pdf")
     pages_text: List[str] = []
-    spans_by_page: Dict[int, List[Dict[str, Any]]] = {}
+    spans_by_page: Dict[int, SpanTable] = {}
 
     for i, page in enumerate(doc):
         page_num = i + 1
@@ -162,26 +181,16 @@ def extract_ocr_structure(pdf_bytes: bytes) -> Dict[str, Any]:
         text = page.get_text("text") or ""
         pages_text.append(text)
 
-        spans: List[Dict[str, Any]] = []
+        spans = SpanTable()
         # PyMuPDF returns tuples like:
         #   (x0, y0, x1, y1, word, block_no, line_no, word_no)
         # so we must tolerate extra fields and normalize coords to 0..1.
-        for w in page.get_text("words") or []:
-            x0, y0, x1, y1, word_text, *_ = w
-            word_text = (word_text or "").strip()
-            if not word_text:
-                continue
-
+        words = [w for w in (page.get_text("words") or []) if (w[4] or "").strip()]
+        if words:
             # Convert PyMuPDF's bottom-origin coords to frontend top-origin normalized coords.
-            spans.append(
-                {
-                    "text": word_text,
-                    "x0": float(x0) / width if width else 0.0,
-                    "y0": 1 - (float(y1) / height) if height else 0.0,
-                    "x1": float(x1) / width if width else 0.0,
-                    "y1": 1 - (float(y0) / height) if height else 0.0,
-                }
-            )
+            norm = pdf_to_normalized(as_boxes([w[:4] for w in words]), width, height)
+            for w, (x0, y0, x1, y1) in zip(words, norm.tolist()):
+                spans.append(w[4].strip(), x0, y0, x1, y1)
 
         spans_by_page[page_num] = spans
 
@@ -195,17 +204,22 @@ def extract_ocr_structure(pdf_bytes: bytes) -> Dict[str, Any]:
 # 3) Company detection
 # ------------------------------------------------------------
 
+def _detect_company_id(pdf_bytes: bytes) -> Optional[str]:
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    all_text = "\n".join(page.get_text("text") or "" for page in doc)
+
+    company_rules = detect_company(all_text, COMPANY_RULES_DIR)
+    return company_rules.get("company_id") if company_rules else None
+
+
 @app.post("/api/templates/detect-company")
 async def api_detect_company(file: UploadFile = File(...)):
     pdf_bytes = await file.read()
     try:
-        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-        all_text = "\n".join(page.get_text("text") or "" for page in doc)
-
-        company_rules = detect_company(all_text, COMPANY_RULES_DIR)
-        company_id = company_rules.get("company_id") if company_rules else None
-
+        company_id = await run_blocking(_detect_company_id, pdf_bytes)
         return {"ok": True, "company_id": company_id}
+    except ExecutorSaturated:
+        raise
     except Exception as e:
         return {"ok": False, "company_id": None, "error": str(e)}
 
@@ -220,8 +234,32 @@ async def _run_template_suggest_internal(
     sensitivity: int = 50,
 ):
     pdf_bytes = await file.read()
+    return await run_blocking(_template_suggest_sync, pdf_bytes, company_id, sensitivity)
+
 
-    ocr_result = extract_ocr_structure(pdf_bytes)
+def _template_suggest_sync(
+    pdf_bytes: bytes,
+    company_id: Optional[str] = None,
+    sensitivity: int = 50,
+) -> Dict[str, Any]:
+    # Keep the extracted spans so /api/redact/re-suggest can skip extraction.
+    document_id = document_id_for(pdf_bytes)
+    cache = get_document_cache()
+    ocr_result = cache.get(document_id)
+    if ocr_result is None:
+        ocr_result = extract_ocr_structure(pdf_bytes)
+        cache.put(document_id, ocr_result)
+
+    result = _suggest_from_ocr_result(ocr_result, company_id, sensitivity)
+    result["document_id"] = document_id
+    return result
+
+
+def _suggest_from_ocr_result(
+    ocr_result: Dict[str, Any],
+    company_id: Optional[str] = None,
+    sensitivity: int = 50,
+) -> Dict[str, Any]:
     full_text = "\n".join(ocr_result.get("pages_text") or [])
 
     final_rules = build_final_rules_for_document(
@@ -249,6 +287,8 @@ async def api_auto_suggest(file: UploadFile = File(...)):
     try:
         result = await _run_template_suggest_internal(file, company_id=None)
         return JSONResponse(result, status_code=200)
+    except ExecutorSaturated:
+        raise
     except Exception as e:
         return JSONResponse({"ok": False, "error": str(e)}, status_code=500)
 
@@ -258,6 +298,36 @@ async def api_auto_suggest_ocr(file: UploadFile = File(...)):
     try:
         result = await _run_template_suggest_internal(file, company_id=None)
         return JSONResponse(result, status_code=200)
+    except ExecutorSaturated:
+        raise
+    except Exception as e:
+        return JSONResponse({"ok": False, "error": str(e)}, status_code=500)
+
+
+@app.post("/api/redact/re-suggest")
+async def api_re_suggest(
+    document_id: str = Form(...),
+    company_id: Optional[str] = Form(None),
+    sensitivity: int = Form(50),
+):
+    """
+    Re-run suggestions for a previously uploaded document (its `document_id`
+    from auto-suggest) against the current rules, without re-extracting text.
+    Returns 404 once the cached spans have expired; re-upload in that case.
+    """
+    ocr_result = get_document_cache().get(document_id)
+    if ocr_result is None:
+        return JSONResponse(
+            {"ok": False, "error": "Unknown or expired document_id; re-upload the PDF"},
+            status_code=404,
+        )
+
+    try:
+        result = await run_blocking(_suggest_from_ocr_result, ocr_result, company_id or None, sensitivity)
+        result["document_id"] = document_id
+        return JSONResponse(result, status_code=200)
+    except ExecutorSaturated:
+        raise
     except Exception as e:
         return JSONResponse({"ok": False, "error": str(e)}, status_code=500)
 
@@ -266,82 +336,14 @@ async def api_auto_suggest_ocr(file: UploadFile = File(...)):
 # 5) Barcode / QR detection
 # ------------------------------------------------------------
 
-def find_poppler_path():
-    env_path = os.environ.get("POPPLER_PATH")
-    if env_path:
-        pdfinfo = os.path.join(env_path, "pdfinfo.exe")
-        if os.path.isfile(pdfinfo):
-            return env_path
-
-    candidates = [
-        r"C:\poppler\bin",
-        r"C:\poppler\Library\bin",
-        r"C:\poppler\Library\mingw64\bin",
-        r"C:\Program Files\poppler\bin",
-        r"C:\Program Files (x86)\poppler\bin",
-        r"C:\Program Files\poppler\Library\bin",
-        r"C:\Program Files (x86)\poppler\Library\bin",
-    ]
-    for path in candidates:
-        if os.path.isfile(os.path.join(path, "pdfinfo.exe")):
-            return path
-    return None
+def _detect_barcodes(pdf_bytes: bytes) -> List[Dict[str, Any]]:
+    return barcode_suggestions(get_barcode_engine().detect(pdf_bytes))
 
 
 @app.post("/api/redact/auto-suggest-barcodes")
 async def auto_suggest_barcodes(file: UploadFile = File(...)):
     pdf_bytes = await file.read()
-
-    poppler_path = find_poppler_path()
-    if poppler_path:
-        pages_or_images = convert_from_bytes(
-            pdf_bytes,
-            dpi=200,
-            poppler_path=poppler_path
-        )
-    else:
-        # Fallback: render with PyMuPDF when Poppler/pdfinfo isn't installed.
-        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-        pages_or_images = []
-        try:
-            zoom = 200 / 72.0
-            mat = fitz.Matrix(zoom, zoom)
-            for page in doc:
-                pix = page.get_pixmap(matrix=mat, alpha=False)
-                img = Image.open(io.BytesIO(pix.tobytes("png"))).convert("RGB")
-                pages_or_images.append(img)
-        finally:
-            doc.close()
-
-    suggestions: List[Dict[str, Any]] = []
-    page_number = 1
-
-    for img in pages_or_images:
-        decoded = decode(img)
-
-        for d in decoded:
-            x, y, w, h = d.rect
-            width, height = img.size
-
-            norm = {
-                "x0": x / width,
-                "y0": y / height,
-                "x1": (x + w) / width,
-                "y1": (y + h) / height
-            }
-
-            suggestions.append({
-                "id": f"barcode-{page_number}-{x}-{y}",
-                "page": page_number,
-                "rects": [norm],
-                "selected": True,
-                "type": "barcode",
-                "group": "barcode",
-                "label": "BARCODE"
-            })
-
-        page_number += 1
-
+    suggestions = await run_blocking(_detect_barcodes, pdf_bytes)
     return {"ok": True, "suggestions": suggestions}
 
 
@@ -358,28 +360,22 @@ def _apply_redactions_to_pdf(
     try:
         doc = fitz.open(stream=pdf_bytes, filetype="pdf")
 
+        # One plan per document: rects grouped per page, coalesced, and
+        # applied with a single apply_redactions() per page.
+        plan = RedactionPlan()
         for r in redactions:
             page_index = int(r.get("page", 1)) - 1
             if page_index < 0 or page_index >= len(doc):
                 continue
 
-            page = doc[page_index]
-            page_rect = page.rect
+            page_rect = doc[page_index].rect
 
-            rects = r.get("rects") or []
-            for nr in rects:
-                try:
-                    x0 = float(nr.get("x0", 0.0)) * page_rect.width
-                    y0 = float(nr.get("y0", 0.0)) * page_rect.height
-                    x1 = float(nr.get("x1", 1.0)) * page_rect.width
-                    y1 = float(nr.get("y1", 1.0)) * page_rect.height
-                except Exception:
-                    continue
-
-                rect = fitz.Rect(x0, y0, x1, y1)
-                page.add_redact_annot(rect, fill=(0, 0, 0))
+            # Rects with unparseable coordinates are skipped.
+            boxes, _ = rects_to_boxes(r.get("rects") or [], skip_invalid=True)
+            abs_boxes = normalized_to_pdf(boxes, page_rect.width, page_rect.height, flip_y=False)
+            plan.page(page_index).add((0, 0, 0), abs_boxes)
 
-            page.apply_redactions()
+        plan.apply(doc, lambda page, rect, fill: page.add_redact_annot(rect, fill=fill))
 
         if scrub_metadata:
             try:
@@ -423,13 +419,13 @@ def _unlock_pdf_via_render_to_images(pdf_bytes: bytes, zoom: float = 2.0) -> byt
         try:
             for i in range(len(src)):
                 page = src[i]
-                pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+                raster = render(page, dpi=72.0 * zoom)
                 w = float(page.rect.width)
                 h = float(page.rect.height)
 
                 new_page = new_doc.new_page(width=w, height=h)
-                img_bytes = pix.tobytes("png")
-                new_page.insert_image(fitz.Rect(0, 0, w, h), stream=img_bytes)
+                # pixmap goes in as-is: no PNG encode/decode per page
+                new_page.insert_image(fitz.Rect(0, 0, w, h), pixmap=raster.pixmap)
         finally:
             out_bytes = new_doc.tobytes()
             new_doc.close()
@@ -449,16 +445,14 @@ async def api_manual_redact(
         redactions_list = json.loads(redactions) if redactions else []
         scrub = scrub_metadata.lower() == "true"
 
-        out_bytes = _apply_redactions_to_pdf(
-            pdf_bytes=pdf_bytes,
-            redactions=redactions_list,
-            scrub_metadata=scrub,
-        )
+        out_bytes = await run_blocking(_apply_redactions_to_pdf, pdf_bytes, redactions_list, scrub)
 
         return Response(
             content=out_bytes,
             media_type="application/pdf",
         )
+    except ExecutorSaturated:
+        raise
     except Exception as e:
         return JSONResponse({"ok": False, "error": str(e)}, status_code=500)
 
@@ -466,12 +460,295 @@ async def api_manual_redact(
 # ------------------------------------------------------------
 # 7) Batch redaction (auto-apply using suggestion engine)
 # ------------------------------------------------------------
+def _default_batch_workers() -> int:
+    """BATCH_REDACT_WORKERS env (default: up to 4, bounded by CPU count)."""
+    try:
+        n = int(os.environ.get("BATCH_REDACT_WORKERS", "0"))
+    except ValueError:
+        n = 0
+    if n <= 0:
+        n = min(4, os.cpu_count() or 1)
+    return max(1, n)
+
+
+BATCH_REDACT_WORKERS = _default_batch_workers()
+
+
+# How long a batch document waits before retrying admission to a full lane,
+# and how long it keeps retrying before it is reported as failed (503).
+BATCH_ADMIT_RETRY_SECONDS = 0.5
+BATCH_ADMIT_TIMEOUT_SECONDS = 60.0
+UPLOAD_SPOOL_CHUNK = 1024 * 1024
+
+
+def _process_batch_file(
+    pdf_bytes: bytes,
+    original_name: str,
+    auto_apply: bool,
+    scrub_metadata: bool,
+    sensitivity: int,
+) -> Tuple[Optional[str], Optional[bytes], Dict[str, Any]]:
+    """
+    Suggest + (optionally) apply redactions for one batch document.
+
+    Returns (zip entry name, entry bytes, summary record); entry name/bytes
+    are None when the document failed.
+    """
+    safe_name = os.path.splitext(os.path.basename(original_name))[0]
+
+    try:
+        ocr_result = extract_ocr_structure(pdf_bytes)
+        full_text = "\n".join(ocr_result.get("pages_text") or [])
+        final_rules = build_final_rules_for_document(
+            ocr_text=full_text,
+            company_hint=None,
+        )
+
+        suggestions = generate_suggestions(
+            pdf_pages=None,
+            ocr_result=ocr_result,
+            final_rules=final_rules,
+            sensitivity=sensitivity,
+        )
+
+        if not auto_apply:
+            # Save suggestions for later manual review.
+            out_json = {
+                "status": "ok",
+                "company_id": getattr(final_rules, "company_id", None),
+                "suggestions": suggestions,
+            }
+            return (
+                f"{safe_name}_redactions.json",
+                json.dumps(out_json, indent=2).encode("utf-8"),
+                {"file": original_name, "status": "suggestions"},
+            )
+
+        redactions_by_page: Dict[int, List[Dict[str, Any]]] = {}
+        for s in suggestions:
+            if s.get("group") == "layout_zone":
+                continue
+            rects = s.get("rects") or []
+            if not rects:
+                continue
+            page = int(s.get("page") or 1)
+            redactions_by_page.setdefault(page, []).extend(rects)
+
+        redactions_list = [
+            {"page": p, "rects": rects}
+            for p, rects in sorted(redactions_by_page.items(), key=lambda x: x[0])
+            if rects
+        ]
+
+        out_bytes = _apply_redactions_to_pdf(
+            pdf_bytes=pdf_bytes,
+            redactions=redactions_list,
+            scrub_metadata=scrub_metadata,
+            allow_unlock=True,
+        )
+
+        return (
+            build_redacted_filename(original_name),
+            out_bytes,
+            {"file": original_name, "status": "success"},
+        )
+    except Exception as e:
+        return (
+            None,
+            None,
+            {
+                "file": original_name,
+                "status": "failed",
+                "error": str(e),
+            },
+        )
+
+
+def _process_spooled_file(
+    fileobj: IO[bytes],
+    original_name: str,
+    auto_apply: bool,
+    scrub_metadata: bool,
+    sensitivity: int,
+) -> Tuple[Optional[str], Optional[bytes], Dict[str, Any]]:
+    """_process_batch_file for a spooled upload (read in the worker thread)."""
+    fileobj.seek(0)
+    pdf_bytes = fileobj.read()
+    return _process_batch_file(pdf_bytes, original_name, auto_apply, scrub_metadata, sensitivity)
+
+
+@dataclass
+class _SpooledUpload:
+    name: str
+    file: Optional[IO[bytes]] = None
+    error: Optional[str] = None
+    # lane call currently reading `file` (outlives a cancelled request)
+    work: Optional["asyncio.Future"] = None
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def close_when_idle(self) -> None:
+        """Close now, or once the worker thread reading the file is done."""
+        if self.work is not None and not self.work.done():
+            self.work.add_done_callback(self._close_after)
+        else:
+            self.close()
+
+    def _close_after(self, work: "asyncio.Future") -> None:
+        if not work.cancelled():
+            work.exception()  # nobody awaits it any more; don't log it as lost
+        self.close()
+
+
+async def _spool_uploads(files: List[UploadFile]) -> List[_SpooledUpload]:
+    """
+    Copy every upload to a temp file while the request form is still open.
+
+    A streamed response body runs after the handler returns, when FastAPI
+    may already have closed the UploadFiles; the batch works from these
+    copies instead (on disk, so memory stays bounded).
+    """
+    spooled: List[_SpooledUpload] = []
+    for f in files:
+        up = _SpooledUpload(name=f.filename or "document.pdf")
+        spooled.append(up)
+        try:
+            up.file = tempfile.TemporaryFile()
+            while True:
+                chunk = await f.read(UPLOAD_SPOOL_CHUNK)
+                if not chunk:
+                    break
+                up.file.write(chunk)
+        except Exception as e:
+            up.close()
+            up.error = str(e)
+    return spooled
+
+
+class _ZipChunkSink:
+    """
+    Write-only, non-seekable file object for zipfile: collects the bytes
+    written so far so they can be streamed out and dropped.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        out = b"".join(self._chunks)
+        self._chunks.clear()
+        return out
+
+
+async def _iter_batch_results(
+    uploads: List[_SpooledUpload],
+    auto_apply: bool,
+    scrub_metadata: bool,
+    sensitivity: int,
+) -> AsyncIterator[Tuple[int, Tuple[Optional[str], Optional[bytes], Dict[str, Any]]]]:
+    """
+    Process the batch in the shared thread lane, at most BATCH_REDACT_WORKERS
+    documents at a time, yielding (input index, result) as each finishes.
+    Spooled uploads are only read once a slot is free, so memory stays bounded.
+
+    Every document is admitted to the lane on its own: while the lane is
+    saturated the batch waits and retries, so other requests still get in
+    between its documents. A document still not admitted after
+    BATCH_ADMIT_TIMEOUT_SECONDS is reported as failed with a 503.
+    """
+    slots = asyncio.Semaphore(BATCH_REDACT_WORKERS)
+    loop = asyncio.get_running_loop()
+
+    async def run(index: int, up: _SpooledUpload):
+        async with slots:
+            if up.file is None:
+                return index, (None, None, {"file": up.name, "status": "failed", "error": up.error})
+            deadline = loop.time() + BATCH_ADMIT_TIMEOUT_SECONDS
+            while True:
+                up.work = asyncio.ensure_future(
+                    thread_lane.run(
+                        _process_spooled_file,
+                        up.file,
+                        up.name,
+                        auto_apply,
+                        scrub_metadata,
+                        sensitivity,
+                    )
+                )
+                try:
+                    # Shielded: if the client goes away, the worker thread keeps
+                    # reading up.file until it is done; close_when_idle() waits.
+                    result = await asyncio.shield(up.work)
+                    break
+                except ExecutorSaturated as e:
+                    if loop.time() >= deadline:
+                        up.close()
+                        record = {"file": up.name, "status": "failed", "status_code": e.status_code, "error": e.detail}
+                        return index, (None, None, record)
+                    await asyncio.sleep(BATCH_ADMIT_RETRY_SECONDS)
+            up.close()
+            return index, result
+
+    tasks = [asyncio.ensure_future(run(i, up)) for i, up in enumerate(uploads)]
+    try:
+        for fut in asyncio.as_completed(tasks):
+            yield await fut
+    finally:
+        for t in tasks:
+            t.cancel()
+
+
+async def _stream_batch_zip(
+    uploads: List[_SpooledUpload],
+    auto_apply: bool,
+    scrub_metadata: bool,
+    sensitivity: int,
+) -> AsyncIterator[bytes]:
+    """Emit ZIP entries as documents finish; the summary is written last."""
+    sink = _ZipChunkSink()
+    processed: List[Optional[Dict[str, Any]]] = [None] * len(uploads)
+
+    try:
+        with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            async for index, (arcname, data, record) in _iter_batch_results(
+                uploads, auto_apply, scrub_metadata, sensitivity
+            ):
+                processed[index] = record
+                if arcname is not None:
+                    # Deflate off the event loop; entries are still written one at a
+                    # time. Short work for an already admitted document: no re-queue.
+                    await thread_lane.run(zf.writestr, arcname, data, force=True)
+                chunk = sink.drain()
+                if chunk:
+                    yield chunk
+
+            # Always include a processing summary (in upload order).
+            zf.writestr("batch_summary.json", json.dumps({"processed": processed}, indent=2))
+
+        yield sink.drain()
+    finally:
+        # Uploads still being read by a worker thread close when it finishes.
+        for up in uploads:
+            up.close_when_idle()
+
+
 @app.post("/api/batch/redact")
 async def api_batch_redact(
     files: List[UploadFile] = File(...),
     auto_apply: str = Form("true"),
     scrub_metadata: str = Form("true"),
     sensitivity: int = Form(50),
+    stream: str = Form("true"),
 ):
     """
     Batch redaction pipeline:
@@ -479,91 +756,46 @@ async def api_batch_redact(
       - Convert suggestions to redaction rectangles.
       - Apply redactions to each PDF.
 
+    Documents are processed concurrently (BATCH_REDACT_WORKERS at a time,
+    at most BATCH_MAX_FILES per request).
+    With stream=true (default) the ZIP is streamed as documents finish;
+    stream=false buffers it and returns a regular response.
+
     Output:
       - A .zip containing `<original>_Redacted.pdf` for each file (auto_apply=true),
         or `<original>_redactions.json` (auto_apply=false).
     """
     auto_apply_bool = str(auto_apply).lower() == "true"
     scrub_bool = str(scrub_metadata).lower() == "true"
+    headers = {"Content-Disposition": 'attachment; filename="batch_redacted.zip"'}
 
-    zip_buf = io.BytesIO()
-    with zipfile.ZipFile(zip_buf, "w", compression=zipfile.ZIP_DEFLATED) as zf:
-        processed = []
-
-        for f in files:
-            pdf_bytes = await f.read()
-            original_name = f.filename or "document.pdf"
-            safe_name = os.path.splitext(os.path.basename(original_name))[0]
+    if len(files) > BATCH_MAX_FILES:
+        return JSONResponse(
+            {"ok": False, "message": f"Too many files in one batch (max {BATCH_MAX_FILES})"},
+            status_code=413,
+        )
 
-            try:
-                ocr_result = extract_ocr_structure(pdf_bytes)
-                full_text = "\n".join(ocr_result.get("pages_text") or [])
-                final_rules = build_final_rules_for_document(
-                    ocr_text=full_text,
-                    company_hint=None,
-                )
+    # Back-pressure: refuse the whole batch (503) while the CPU lane is saturated.
+    thread_lane.check_capacity()
 
-                suggestions = generate_suggestions(
-                    pdf_pages=None,
-                    ocr_result=ocr_result,
-                    final_rules=final_rules,
-                    sensitivity=sensitivity,
-                )
+    # Read the uploads now: the streamed body outlives this handler.
+    uploads = await _spool_uploads(files)
 
-                if not auto_apply_bool:
-                    # Save suggestions for later manual review.
-                    out_json = {
-                        "status": "ok",
-                        "company_id": getattr(final_rules, "company_id", None),
-                        "suggestions": suggestions,
-                    }
-                    zf.writestr(f"{safe_name}_redactions.json", json.dumps(out_json, indent=2))
-                    processed.append({"file": original_name, "status": "suggestions"})
-                    continue
-
-                redactions_by_page: Dict[int, List[Dict[str, Any]]] = {}
-                for s in suggestions:
-                    if s.get("group") == "layout_zone":
-                        continue
-                    rects = s.get("rects") or []
-                    if not rects:
-                        continue
-                    page = int(s.get("page") or 1)
-                    redactions_by_page.setdefault(page, []).extend(rects)
-
-                redactions_list = [
-                    {"page": p, "rects": rects}
-                    for p, rects in sorted(redactions_by_page.items(), key=lambda x: x[0])
-                    if rects
-                ]
-
-                out_bytes = _apply_redactions_to_pdf(
-                    pdf_bytes=pdf_bytes,
-                    redactions=redactions_list,
-                    scrub_metadata=scrub_bool,
-                    allow_unlock=True,
-                )
-
-                out_filename = build_redacted_filename(original_name)
-                zf.writestr(out_filename, out_bytes)
-                processed.append({"file": original_name, "status": "success"})
-            except Exception as e:
-                processed.append(
-                    {
-                        "file": original_name,
-                        "status": "failed",
-                        "error": str(e),
-                    }
-                )
+    if str(stream).lower() == "true":
+        return StreamingResponse(
+            _stream_batch_zip(uploads, auto_apply_bool, scrub_bool, sensitivity),
+            media_type="application/zip",
+            headers=headers,
+        )
 
-        # Always include a processing summary.
-        zf.writestr("batch_summary.json", json.dumps({"processed": processed}, indent=2))
+    zip_buf = io.BytesIO()
+    async for chunk in _stream_batch_zip(uploads, auto_apply_bool, scrub_bool, sensitivity):
+        zip_buf.write(chunk)
 
-    zip_bytes = zip_buf.getvalue()
     return Response(
-        content=zip_bytes,
+        content=zip_buf.getvalue(),
         media_type="application/zip",
-        headers={"Content-Disposition": 'attachment; filename="batch_redacted.zip"'},
+        headers=headers,
     )
 
 
@@ -593,26 +825,28 @@ def list_tools():
 import tempfile
 import shutil
 
-@app.post("/api/tools/run/{tool_id}")
-async def run_tool(tool_id: str, file: UploadFile = File(...), options: str = Form("{}")):
-    if tool_id not in PLUGINS:
-        return {"ok": False, "error": "Unknown tool"}
-
-    plugin = PLUGINS[tool_id]
-
+def _run_plugin(plugin, upload: IO[bytes], opts: dict) -> bytes:
     # Save uploaded file to temp
     temp_in = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
-    shutil.copyfileobj(file.file, temp_in)
+    shutil.copyfileobj(upload, temp_in)
     temp_in.close()
 
-    opts = json.loads(options)
-
     # Run plugin
     output_path = plugin.run(temp_in.name, opts)
 
     # Return output PDF
     with open(output_path, "rb") as f:
-        data = f.read()
+        return f.read()
+
+
+@app.post("/api/tools/run/{tool_id}")
+async def run_tool(tool_id: str, file: UploadFile = File(...), options: str = Form("{}")):
+    if tool_id not in PLUGINS:
+        return {"ok": False, "error": "Unknown tool"}
+
+    plugin = PLUGINS[tool_id]
+    opts = json.loads(options)
+    data = await run_blocking(_run_plugin, plugin, file.file, opts)
 
     return Response(
         content=data,
@@ -0,0 +1,110 @@
+# ------------------------------------------------------------
+# backend/raster.py — Shared page rasterization with zero-copy views
+# ------------------------------------------------------------
+#
+# Consumers used to render RGB, copy pix.samples into a PIL image and then
+# convert or PNG-encode from there (OCR, pyzbar, pixel effects, the unlock
+# fallback). Here pages are rendered straight into the colorspace the
+# consumer needs, and the fitz.Pixmap's own memory is handed out:
+#
+#   Raster.array        NumPy view (H x W gray, H x W x n colour), writable
+#   Raster.image()      PIL image over the same memory (gray; colour
+#                       rasters are copied once, PIL stores RGB padded)
+#   Raster.zbar_input() (pixels, width, height) for pyzbar, no copy
+#   Raster.pixmap       page.insert_image(pixmap=...) embeds it without a
+#                       PNG encode/decode round-trip
+#
+# Views point into the Pixmap, so they are only valid while it is alive:
+# a Raster holds its Pixmap and images from Raster.image() hold their
+# Raster. Keep the Raster (not just .array) around while a view is used.
+
+import ctypes
+from dataclasses import dataclass
+from typing import Any, Optional, Tuple
+
+import fitz  # PyMuPDF
+import numpy as np
+from PIL import Image
+
+
+@dataclass
+class Raster:
+    pixmap: fitz.Pixmap
+    dpi: Optional[float] = None   # None for images not rendered from a page
+
+    @property
+    def width(self) -> int:
+        return self.pixmap.width
+
+    @property
+    def height(self) -> int:
+        return self.pixmap.height
+
+    @property
+    def channels(self) -> int:
+        return self.pixmap.n
+
+    @property
+    def is_gray(self) -> bool:
+        return self.pixmap.n == 1
+
+    @property
+    def array(self) -> np.ndarray:
+        pix = self.pixmap
+        a = np.frombuffer(pix.samples_mv, dtype=np.uint8).reshape(pix.height, pix.stride)
+        a = a[:, : pix.width * pix.n]
+        return a if pix.n == 1 else a.reshape(pix.height, pix.width, pix.n)
+
+    def image(self) -> Image.Image:
+        pix = self.pixmap
+        if pix.n == 1:
+            img = Image.frombuffer("L", (pix.width, pix.height), pix.samples_mv, "raw", "L", pix.stride, 1)
+            # the image reads Pixmap memory; keep it alive as long as the image
+            img._raster = self
+            return img
+        mode = "RGBA" if pix.alpha else "RGB"
+        return Image.frombytes(mode, (pix.width, pix.height), pix.samples_mv, "raw", mode, pix.stride)
+
+    def zbar_input(self) -> Tuple[Any, int, int]:
+        """pyzbar's (pixels, width, height) form; pixels alias the Pixmap (gray only)."""
+        pix = self.pixmap
+        if pix.n != 1 or pix.stride != pix.width:
+            raise ValueError("zbar_input needs an unpadded 8-bit gray raster")
+        pixels = (ctypes.c_ubyte * len(pix.samples_mv)).from_buffer(pix.samples_mv)
+        return pixels, pix.width, pix.height
+
+
+def render(
+    page: fitz.Page,
+    dpi: float = 72.0,
+    clip: Optional[fitz.Rect] = None,
+    gray: bool = False,
+) -> Raster:
+    """Rasterize (part of) a page without alpha, directly in gray or RGB."""
+    zoom = dpi / 72.0
+    pix = page.get_pixmap(
+        matrix=fitz.Matrix(zoom, zoom),
+        clip=clip,
+        colorspace=fitz.csGRAY if gray else fitz.csRGB,
+        alpha=False,
+    )
+    return Raster(pix, dpi)
+
+
+def as_array(img: Image.Image) -> np.ndarray:
+    """Pixels of a PIL image: a view for Raster.image() results, else a copy."""
+    raster = getattr(img, "_raster", None)
+    if raster is not None:
+        return raster.array
+    return np.asarray(img)
+
+
+def gray_pixmap(pix: fitz.Pixmap) -> Optional[fitz.Pixmap]:
+    """An 8-bit gray, alpha-free version of `pix` (None for stencil masks)."""
+    if pix.colorspace is None:
+        return None
+    if pix.alpha:
+        pix = fitz.Pixmap(pix, 0)
+    if pix.colorspace.n != 1:
+        pix = fitz.Pixmap(fitz.csGRAY, pix)
+    return pix
@@ -0,0 +1,201 @@
+# ------------------------------------------------------------
+# document_analysis.py — single-pass per-page document analysis
+# ------------------------------------------------------------
+#
+# Opens the PDF once and, per page, collects everything the auto-suggest
+# detectors need:
+#   - text spans (native words; OCR for scanned pages and for untexted
+#     scanned regions of hybrid pages, see page_classifier)
+#   - image blocks (PyMuPDF image placements)
+#   - one grayscale rasterization shared by OCR and pyzbar
+#
+# Raster consumers (e.g. pyzbar) run through `on_raster(pa, page)` as each
+# page is rendered, so only rasters still needed for OCR stay in memory.
+# `progress(done, total)` is called as pages finish (used by background jobs).
+# With `ocr_regions` (an OCRRegionPlan for a known company), OCR pages are
+# first read only inside the rule/learned zones; a page falls back to
+# full-page OCR only when that targeted pass finds no words.
+#
+# Replaces the old flow where /redact/template opened and walked the same
+# PDF separately for text, image blocks and barcode rendering.
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+import fitz  # PyMuPDF
+from PIL import Image
+
+from backend.raster import render
+from backend.redaction.page_classifier import (
+    PAGE_HYBRID,
+    PAGE_NATIVE,
+    PAGE_OCR,
+    classify_page,
+    merge_hybrid_spans,
+)
+from backend.redaction.text_finder import TextFinder, TextSpan
+from backend.rules.ocr_regions import OCRRegionPlan
+
+DEFAULT_RASTER_DPI = 200
+
+
+@dataclass
+class PageAnalysis:
+    index: int
+    width: float
+    height: float
+    spans: List[TextSpan] = field(default_factory=list)
+    image_blocks: List[Dict[str, float]] = field(default_factory=list)
+    raster: Optional[Image.Image] = None
+    mode: str = PAGE_NATIVE
+
+
+@dataclass
+class DocumentAnalysis:
+    pages: List[PageAnalysis]
+    raster_dpi: int
+
+    @property
+    def spans(self) -> List[TextSpan]:
+        return [s for p in self.pages for s in p.spans]
+
+    @property
+    def rasters(self) -> List[Optional[Image.Image]]:
+        return [p.raster for p in self.pages]
+
+    def image_block_candidates(self) -> List[Dict[str, Any]]:
+        """Same shape as TextFinder.find_barcodes()."""
+        return [
+            {"page": p.index + 1, "text": "", "rects": [rect]}
+            for p in self.pages
+            for rect in p.image_blocks
+        ]
+
+
+def _render_gray(page: fitz.Page, dpi: int) -> Optional[Image.Image]:
+    # Both consumers work on gray; render it directly and skip the RGB copy.
+    try:
+        return render(page, dpi=dpi, gray=True).image()
+    except Exception as e:
+        print(f"[document_analysis] WARNING: failed to rasterize page {page.number + 1}: {e}")
+        return None
+
+
+def analyze_document(
+    pdf_bytes: bytes,
+    finder: Optional[TextFinder] = None,
+    auto_ocr: bool = True,
+    rasterize: bool = True,
+    raster_dpi: int = DEFAULT_RASTER_DPI,
+    on_raster: Optional[Callable[[PageAnalysis, fitz.Page], None]] = None,
+    keep_rasters: bool = False,
+    progress: Optional[Callable[[int, int], None]] = None,
+    ocr_regions: Optional[OCRRegionPlan] = None,
+) -> DocumentAnalysis:
+    finder = finder or TextFinder()
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+
+    try:
+        pages: List[PageAnalysis] = []
+        ocr_pages: List[int] = []
+        hybrid_regions: Dict[int, List[Dict[str, float]]] = {}
+        total = len(doc)
+        done = 0
+
+        # Hand our rasters to OCR when their resolution is what the engine
+        # would render (for an adaptive engine: at least the probed DPI);
+        # with an OCR pool the workers render their own pages in parallel.
+        # Rasters OCR can't use are dropped as soon as the page is classified.
+        engine = finder.ocr_engine
+        accepts = getattr(engine, "accepts_raster", None)
+        share_rasters = rasterize and accepts is not None and getattr(engine, "workers", 1) <= 1
+        images: Dict[int, Image.Image] = {}
+
+        for page_index in range(len(doc)):
+            page = doc[page_index]
+            pa = PageAnalysis(
+                index=page_index,
+                width=page.rect.width,
+                height=page.rect.height,
+                spans=finder._extract_pdf_words(doc, page_index),
+                image_blocks=finder._image_block_rects(page),
+            )
+            if rasterize:
+                pa.raster = _render_gray(page, raster_dpi)
+                if on_raster is not None and pa.raster is not None:
+                    on_raster(pa, page)
+
+            if auto_ocr and finder.ocr_engine:
+                page_class = classify_page(pa.spans, pa.image_blocks)
+                pa.mode = page_class.mode
+                if pa.mode == PAGE_HYBRID:
+                    hybrid_regions[page_index] = page_class.ocr_regions
+
+            if pa.mode == PAGE_OCR:
+                ocr_pages.append(page_index)
+                if share_rasters and pa.raster is not None and accepts(pa.raster, raster_dpi):
+                    images[page_index] = pa.raster
+                elif not keep_rasters:
+                    pa.raster = None
+            else:
+                if not keep_rasters:
+                    pa.raster = None
+                done += 1
+                if progress is not None:
+                    progress(done, total)
+            pages.append(pa)
+
+        if hybrid_regions:
+            # Region OCR renders its own clips; counted as done above.
+            region_spans = finder._extract_ocr_region_words(doc, hybrid_regions)
+            for page_index, regions in hybrid_regions.items():
+                pages[page_index].spans = merge_hybrid_spans(
+                    pages[page_index].spans, region_spans.get(page_index, []), regions
+                )
+
+        if ocr_pages and ocr_regions:
+            targeted = finder._extract_ocr_region_words(
+                doc, {i: ocr_regions.for_page(i) for i in ocr_pages}
+            )
+            for page_index, spans in targeted.items():
+                if spans:
+                    pages[page_index].spans = spans
+            found = [i for i in ocr_pages if targeted.get(i)]
+            if found:
+                for i in found:
+                    images.pop(i, None)
+                    if not keep_rasters:
+                        pages[i].raster = None
+                ocr_pages = [i for i in ocr_pages if not targeted.get(i)]
+                done += len(found)
+                if progress is not None:
+                    progress(done, total)
+
+        if ocr_pages:
+            # With a progress callback, OCR in pool-sized chunks so progress
+            # moves per page without giving up pool parallelism.
+            step = len(ocr_pages)
+            if progress is not None:
+                step = max(1, int(getattr(engine, "workers", 1) or 1))
+
+            for k in range(0, len(ocr_pages), step):
+                chunk = ocr_pages[k:k + step]
+                chunk_images = {i: images.pop(i) for i in chunk if i in images} if images else None
+                ocr_spans = finder._extract_ocr_words(doc, chunk, pdf_bytes=pdf_bytes, images=chunk_images)
+                for page_index, spans in ocr_spans.items():
+                    pages[page_index].spans = spans
+                if not keep_rasters:
+                    for i in chunk:
+                        pages[i].raster = None
+
+                done += len(chunk)
+                if progress is not None:
+                    progress(done, total)
+
+        if not keep_rasters:
+            for pa in pages:
+                pa.raster = None
+
+        return DocumentAnalysis(pages=pages, raster_dpi=raster_dpi)
+    finally:
+        doc.close()
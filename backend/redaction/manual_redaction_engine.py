@@ -6,9 +6,13 @@
 import os
 import uuid
 import fitz  # PyMuPDF
+import numpy as np
 from typing import List, Dict, Any, Optional, Tuple
-import io
-from PIL import Image
+
+from backend.geometry import clamp_unit, normalized_to_pdf, rects_to_boxes
+from backend.raster import render
+from backend.redaction.pdf_output import document_bytes, get_temp_reaper, save_document
+from backend.redaction.redaction_plan import RedactionPlan
 
 
 class ManualRedactionEngine:
@@ -23,11 +27,13 @@ class ManualRedactionEngine:
     - remove mode
     - full-page redaction
     - metadata scrubbing
+    - in-memory output with save profiles (fast / archival)
     """
 
     def __init__(self, output_dir: str = "temp_redacted"):
         self.output_dir = output_dir
         os.makedirs(self.output_dir, exist_ok=True)
+        self.reaper = get_temp_reaper(self.output_dir)
 
     # ------------------------------------------------------------
     # Color helpers
@@ -47,50 +53,47 @@ class ManualRedactionEngine:
         return (r, g, b)
 
     # ------------------------------------------------------------
-    # Rect validation
+    # Rect validation + conversion (batched)
     # ------------------------------------------------------------
     @staticmethod
-    def _validate_rect(r: Dict[str, float]) -> Dict[str, float]:
-        def clamp(v):
-            try:
-                v = float(v)
-            except Exception:
-                return 0.0
-            return max(0.0, min(1.0, v))
-
-        return {
-            "x0": clamp(r.get("x0", 0)),
-            "y0": clamp(r.get("y0", 0)),
-            "x1": clamp(r.get("x1", 1)),
-            "y1": clamp(r.get("y1", 1)),
-        }
+    def _rects_to_pdf(rects: List[Dict[str, float]], pw: float, ph: float) -> np.ndarray:
+        """
+        Normalized rects → absolute PDF boxes for one page.
+        Invalid values become 0.0 and everything is clamped to 0–1.
+        FIXED: Y-FLIP
+        """
+        boxes, _ = rects_to_boxes(rects)
+        return normalized_to_pdf(clamp_unit(boxes), pw, ph, flip_y=True)
 
     # ------------------------------------------------------------
     # Blur / pixelate helpers
     # ------------------------------------------------------------
+    @staticmethod
+    def _pixelate(a: np.ndarray, block: int) -> None:
+        """Replace every block x block tile of `a` (H x W x n) by its mean, in place."""
+        h, w = a.shape[:2]
+        ys = np.arange(0, h, block)
+        xs = np.arange(0, w, block)
+        hs = np.diff(np.append(ys, h))
+        ws = np.diff(np.append(xs, w))
+
+        sums = np.add.reduceat(np.add.reduceat(a, ys, axis=0, dtype=np.uint32), xs, axis=1)
+        counts = np.outer(hs, ws)[..., None]
+        means = ((sums + counts // 2) // counts).astype(np.uint8)
+        a[:] = np.repeat(np.repeat(means, hs, axis=0), ws, axis=1)
+
     def _apply_pixel_effect(self, page, rect, intensity: int):
         """
         FIXED: Pixelation applied AFTER redaction annotation is added.
         This prevents leaking underlying text.
+
+        The effect is computed in the Pixmap's own memory and the Pixmap is
+        inserted as-is (no PIL copy, no PNG round-trip).
         """
         try:
-            zoom = 2
-            mat = fitz.Matrix(zoom, zoom)
-            pix = page.get_pixmap(matrix=mat, clip=rect)
-
-            img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-
-            small_w = max(1, pix.width // intensity)
-            small_h = max(1, pix.height // intensity)
-
-            img_small = img.resize((small_w, small_h), Image.Resampling.LANCZOS)
-            img_pixel = img_small.resize((pix.width, pix.height), Image.Resampling.NEAREST)
-
-            buf = io.BytesIO()
-            img_pixel.save(buf, format="PNG")
-            buf.seek(0)
-
-            page.insert_image(rect, stream=buf.read())
+            raster = render(page, dpi=2 * 72, clip=rect)
+            self._pixelate(raster.array, max(1, intensity))
+            page.insert_image(rect, pixmap=raster.pixmap)
         except Exception as e:
             print(f"[manual_redaction_engine] Pixel effect failed: {e}")
             page.add_redact_annot(rect, fill=(0, 0, 0))
@@ -151,56 +154,42 @@ class ManualRedactionEngine:
     # Apply all redactions to a document
     # ------------------------------------------------------------
     def _apply_redactions_to_doc(self, doc, redactions, scrub_metadata=True):
-        by_page = {}
+        # Rects are collected per page and (mode, colour), coalesced, and
+        # applied with one apply_redactions() per page (see redaction_plan).
+        plan = RedactionPlan()
         for r in redactions:
-            p = int(r.get("page", 1))
-            by_page.setdefault(p, []).append(r)
-
-        for page_index in range(len(doc)):
-            page_num = page_index + 1
+            page_index = int(r.get("page", 1)) - 1
+            if page_index < 0 or page_index >= len(doc):
+                continue
             page = doc[page_index]
             pw, ph = page.rect.width, page.rect.height
 
-            items = by_page.get(page_num, [])
-            if not items:
-                continue
-
-            for r in items:
-                rtype = r.get("type", "box")
-                mode = r.get("mode", "black").lower()
-                rgb = self._hex_to_rgb01(r.get("color", "#000000"))
-
-                # Full-page redaction
-                if rtype == "page":
-                    rect = fitz.Rect(0, 0, pw, ph)
-                    self._apply_redaction(page, rect, mode, rgb)
-
-                # Box / text / search / auto
-                elif rtype in ("box", "text", "search", "auto"):
-                    for rd in r.get("rects", []):
-                        rd = self._validate_rect(rd)
-
-                        # FIXED: Y-FLIP
-                        x0 = rd["x0"] * pw
-                        x1 = rd["x1"] * pw
-                        y0 = (1 - rd["y1"]) * ph
-                        y1 = (1 - rd["y0"]) * ph
-
-                        rect = fitz.Rect(x0, y0, x1, y1)
-                        self._apply_redaction(page, rect, mode, rgb)
-
-                # Polygon / Ink
-                elif rtype in ("ink", "polygon"):
-                    pts = r.get("points", [])
-                    if len(pts) >= 3:
-                        path = self._polygon_to_path(page, pts, pw, ph)
-                        path.finish(color=None, fill=rgb)
-                        path.commit()
-
-            page.apply_redactions(
-                images=fitz.PDF_REDACT_IMAGE_NONE,
-                graphics=fitz.PDF_REDACT_LINE_ART_IF_COVERED
-            )
+            rtype = r.get("type", "box")
+            mode = r.get("mode", "black").lower()
+            rgb = self._hex_to_rgb01(r.get("color", "#000000"))
+
+            # Full-page redaction
+            if rtype == "page":
+                plan.page(page_index).add((mode, rgb), [(0, 0, pw, ph)])
+
+            # Box / text / search / auto
+            elif rtype in ("box", "text", "search", "auto"):
+                plan.page(page_index).add((mode, rgb), self._rects_to_pdf(r.get("rects", []), pw, ph))
+
+            # Polygon / Ink
+            elif rtype in ("ink", "polygon"):
+                pts = r.get("points", [])
+                if len(pts) >= 3:
+                    path = self._polygon_to_path(page, pts, pw, ph)
+                    path.finish(color=None, fill=rgb)
+                    path.commit()
+
+        plan.apply(
+            doc,
+            lambda page, rect, style: self._apply_redaction(page, rect, *style),
+            images=fitz.PDF_REDACT_IMAGE_NONE,
+            graphics=fitz.PDF_REDACT_LINE_ART_IF_COVERED,
+        )
 
         # FIXED: metadata scrubbing
         if scrub_metadata:
@@ -212,25 +201,36 @@ class ManualRedactionEngine:
     # ------------------------------------------------------------
     # Public API
     # ------------------------------------------------------------
-    def apply_redactions(self, pdf_bytes, redactions, scrub_metadata=True, base_filename=None):
+    def _redact_doc(self, doc, redactions, scrub_metadata):
         # Allow empty redactions: simply save the PDF unchanged
+        if redactions:
+            # Apply real redactions
+            self._apply_redactions_to_doc(doc, redactions, scrub_metadata)
+        else:
+            # Still scrub metadata if requested
+            if scrub_metadata:
+                meta = doc.metadata or {}
+                for k in list(meta.keys()):
+                    meta[k] = None
+                doc.set_metadata(meta)
+
+    def apply_redactions(self, pdf_bytes, redactions, scrub_metadata=True, base_filename=None, save_profile=None):
+        # Temp outputs are deleted after REDACT_TEMP_TTL_SECONDS
+        self.reaper.maybe_reap()
+
         safe_name = os.path.splitext(os.path.basename(base_filename or "document"))[0]
         out_name = f"{safe_name}_redacted_{uuid.uuid4().hex[:8]}.pdf"
         out_path = os.path.join(self.output_dir, out_name)
 
         with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
-            if redactions:
-                # Apply real redactions
-                self._apply_redactions_to_doc(doc, redactions, scrub_metadata)
-            else:
-                # Still scrub metadata if requested
-                if scrub_metadata:
-                    meta = doc.metadata or {}
-                    for k in list(meta.keys()):
-                        meta[k] = None
-                    doc.set_metadata(meta)
-
-            doc.save(out_path, garbage=4, deflate=True, clean=True, linear=True)
+            self._redact_doc(doc, redactions, scrub_metadata)
+            save_document(doc, out_path, save_profile)
 
         return out_path
 
+    def apply_redactions_to_bytes(self, pdf_bytes, redactions, scrub_metadata=True, save_profile=None) -> bytes:
+        """In-memory variant of apply_redactions: returns the PDF, writes no file."""
+        with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+            self._redact_doc(doc, redactions, scrub_metadata)
+            return document_bytes(doc, save_profile)
+
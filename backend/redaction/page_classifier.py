@@ -0,0 +1,112 @@
+# ------------------------------------------------------------
+# page_classifier.py — native text vs scanned content, per page
+# ------------------------------------------------------------
+#
+# Decides how each page gets its text:
+#   native  the PDF text layer covers the page (no OCR)
+#   ocr     no usable text layer: OCR the whole page
+#   hybrid  native text plus scanned images that carry no text layer
+#           (e.g. a typed header over a scanned body): OCR only those
+#           image regions and keep the native words elsewhere
+#
+# Works on what extraction already collected — native word boxes and
+# image placements (get_image_info), both as normalized Y-flipped rects —
+# so classifying costs no extra PDF parsing.
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from backend.geometry import as_boxes, boxes_to_rects, clamp_unit, merge_overlapping, rects_to_boxes
+
+PAGE_NATIVE = "native"
+PAGE_OCR = "ocr"
+PAGE_HYBRID = "hybrid"
+
+# Images smaller than this page share (logos, barcodes, stamps) never trigger OCR.
+MIN_SCAN_IMAGE_AREA = 0.04
+# An image region with fewer native words than this has no text layer.
+MIN_WORDS_IN_IMAGE = 3
+# Untexted image regions covering at least this share of the page: full-page OCR.
+FULL_OCR_COVERAGE = 0.6
+
+
+@dataclass
+class PageClassification:
+    mode: str
+    text_coverage: float
+    image_coverage: float
+    # Regions to OCR for hybrid pages (normalized, Y-flipped)
+    ocr_regions: List[Dict[str, float]] = field(default_factory=list)
+
+
+def _area(boxes: np.ndarray) -> np.ndarray:
+    return np.clip(boxes[:, 2] - boxes[:, 0], 0, None) * np.clip(boxes[:, 3] - boxes[:, 1], 0, None)
+
+
+def _span_boxes(spans: Sequence) -> np.ndarray:
+    return as_boxes([(s.x0, s.y0, s.x1, s.y1) for s in spans])
+
+
+def _centers_inside(span_boxes: np.ndarray, regions: np.ndarray) -> np.ndarray:
+    """(N spans, M regions) bool matrix: span center lies inside region."""
+    cx = ((span_boxes[:, 0] + span_boxes[:, 2]) / 2)[:, None]
+    cy = ((span_boxes[:, 1] + span_boxes[:, 3]) / 2)[:, None]
+    return (
+        (cx >= regions[None, :, 0]) & (cx <= regions[None, :, 2])
+        & (cy >= regions[None, :, 1]) & (cy <= regions[None, :, 3])
+    )
+
+
+def classify_page(spans: Sequence, image_rects: List[Dict[str, float]]) -> PageClassification:
+    """
+    `spans`: native words of the page (anything with x0/y0/x1/y1).
+    `image_rects`: image placements from TextFinder._image_block_rects().
+    """
+    span_boxes = _span_boxes(spans)
+    text_coverage = float(min(1.0, _area(clamp_unit(span_boxes)).sum())) if len(span_boxes) else 0.0
+
+    images, _ = rects_to_boxes(image_rects, skip_invalid=True)
+    images = merge_overlapping(clamp_unit(images)) if len(images) else images
+    image_coverage = float(min(1.0, _area(images).sum())) if len(images) else 0.0
+
+    if not len(span_boxes):
+        return PageClassification(PAGE_OCR, 0.0, image_coverage)
+
+    scans = images[_area(images) >= MIN_SCAN_IMAGE_AREA] if len(images) else images
+    if not len(scans):
+        return PageClassification(PAGE_NATIVE, text_coverage, image_coverage)
+
+    words_inside = _centers_inside(span_boxes, scans).sum(axis=0)
+    untexted = scans[words_inside < MIN_WORDS_IN_IMAGE]
+    if not len(untexted):
+        return PageClassification(PAGE_NATIVE, text_coverage, image_coverage)
+
+    if float(_area(untexted).sum()) >= FULL_OCR_COVERAGE:
+        return PageClassification(PAGE_OCR, text_coverage, image_coverage)
+
+    return PageClassification(PAGE_HYBRID, text_coverage, image_coverage, boxes_to_rects(untexted))
+
+
+def merge_hybrid_spans(native: List, ocr: List, regions: List[Dict[str, float]]) -> List:
+    """
+    Native words outside the OCR'd regions + OCR words inside them, so a
+    word is never reported twice (region OCR reads a small margin around
+    each region).
+    """
+    boxes, _ = rects_to_boxes(regions, skip_invalid=True)
+    if not len(boxes):
+        return list(native)
+
+    keep_native = list(native)
+    if native:
+        inside = _centers_inside(_span_boxes(native), boxes).any(axis=1)
+        keep_native = [s for s, hit in zip(native, inside.tolist()) if not hit]
+
+    keep_ocr: List = []
+    if ocr:
+        inside = _centers_inside(_span_boxes(ocr), boxes).any(axis=1)
+        keep_ocr = [s for s, hit in zip(ocr, inside.tolist()) if hit]
+
+    return keep_native + keep_ocr
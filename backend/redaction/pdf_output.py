@@ -0,0 +1,131 @@
+# ------------------------------------------------------------
+# pdf_output.py — Save profiles + temp output housekeeping
+# ------------------------------------------------------------
+#
+# Redacted documents are serialized with one of two profiles:
+#
+#   fast      garbage=1 + deflate: drops unreferenced objects (so content
+#             replaced by apply_redactions() never survives in the file)
+#             but skips the expensive full clean / dedup / linearization
+#   archival  garbage=4 + deflate + clean + linear (the historical output)
+#
+# API handlers keep the result in memory (document_bytes) instead of
+# writing a temp file and reading it back. Engines that still write under
+# temp_redacted/ (legacy file endpoints) have old files reaped.
+#
+# Configuration (env):
+#   REDACT_SAVE_PROFILE        default profile          (default: archival)
+#   REDACT_TEMP_TTL_SECONDS    age before temp outputs are deleted (default: 3600)
+
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import quote
+
+import fitz  # PyMuPDF
+
+SAVE_PROFILES: Dict[str, Dict[str, Any]] = {
+    "fast": {"garbage": 1, "deflate": True},
+    "archival": {"garbage": 4, "deflate": True, "clean": True, "linear": True},
+}
+
+DEFAULT_SAVE_PROFILE = os.environ.get("REDACT_SAVE_PROFILE", "archival").strip().lower()
+if DEFAULT_SAVE_PROFILE not in SAVE_PROFILES:
+    print(f"[pdf_output] WARNING: unknown REDACT_SAVE_PROFILE {DEFAULT_SAVE_PROFILE!r}, using archival")
+    DEFAULT_SAVE_PROFILE = "archival"
+
+
+def save_options(profile: Optional[str] = None) -> Dict[str, Any]:
+    name = (profile or DEFAULT_SAVE_PROFILE).strip().lower()
+    if name not in SAVE_PROFILES:
+        raise ValueError(f"Unknown save profile: {profile}")
+    return dict(SAVE_PROFILES[name])
+
+
+def document_bytes(doc: fitz.Document, profile: Optional[str] = None) -> bytes:
+    """Serialize an open document in memory with the given save profile."""
+    return doc.tobytes(**save_options(profile))
+
+
+def save_document(doc: fitz.Document, path: str, profile: Optional[str] = None) -> None:
+    doc.save(path, **save_options(profile))
+
+
+def content_disposition(filename: str) -> str:
+    """
+    Attachment header for in-memory responses, built like Starlette's
+    FileResponse: names that aren't plain ASCII (or contain quotes) go out
+    RFC 5987-encoded, since headers are sent as latin-1.
+    """
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+
+# ------------------------------------------------------------
+# Temp directory reaper
+# ------------------------------------------------------------
+def _env_seconds(name: str, default: float) -> float:
+    try:
+        value = float(os.environ.get(name, ""))
+    except ValueError:
+        return default
+    return value if value > 0 else default
+
+
+class TempDirReaper:
+    """
+    Deletes files older than `ttl_seconds` from one directory.
+    maybe_reap() is cheap to call on every write: it scans at most once
+    per `interval_seconds`.
+    """
+
+    def __init__(self, directory: str, ttl_seconds: float, interval_seconds: float = 300.0):
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.interval_seconds = interval_seconds
+        self._lock = threading.Lock()
+        self._last_run = 0.0
+
+    def maybe_reap(self) -> int:
+        now = time.time()
+        with self._lock:
+            if now - self._last_run < self.interval_seconds:
+                return 0
+            self._last_run = now
+        return self.reap(now)
+
+    def reap(self, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        removed = 0
+        try:
+            entries = list(os.scandir(self.directory))
+        except OSError:
+            return 0
+        for entry in entries:
+            try:
+                if entry.is_file() and now - entry.stat().st_mtime > self.ttl_seconds:
+                    os.remove(entry.path)
+                    removed += 1
+            except OSError as e:
+                # Still being served / already gone: try again next round.
+                print(f"[pdf_output] WARNING: could not remove {entry.path}: {e}")
+        return removed
+
+
+_reapers: Dict[str, TempDirReaper] = {}
+_reapers_lock = threading.Lock()
+
+
+def get_temp_reaper(directory: str) -> TempDirReaper:
+    key = os.path.abspath(directory)
+    with _reapers_lock:
+        reaper = _reapers.get(key)
+        if reaper is None:
+            reaper = _reapers[key] = TempDirReaper(
+                directory,
+                ttl_seconds=_env_seconds("REDACT_TEMP_TTL_SECONDS", 3600.0),
+            )
+        return reaper
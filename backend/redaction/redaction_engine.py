@@ -6,8 +6,13 @@
 import os
 import uuid
 import fitz  # PyMuPDF
+import numpy as np
 from typing import List, Dict, Any, Optional
 
+from backend.geometry import clamp_unit, normalized_to_pdf, rects_to_boxes
+from backend.redaction.pdf_output import document_bytes, get_temp_reaper, save_document
+from backend.redaction.redaction_plan import RedactionPlan
+
 
 class RedactionEngine:
     """
@@ -18,54 +23,27 @@ class RedactionEngine:
     - Multi-rect redactions
     - Image-based black box redaction
     - Metadata scrubbing
+    - In-memory output with save profiles (fast / archival)
     """
 
     def __init__(self, output_dir: str = "temp_redacted"):
         self.output_dir = output_dir
         os.makedirs(self.output_dir, exist_ok=True)
+        self.reaper = get_temp_reaper(self.output_dir)
 
     # ------------------------------------------------------------
     # Internal helpers
     # ------------------------------------------------------------
     @staticmethod
-    def _validate_rect(rect: Dict[str, float]) -> Dict[str, float]:
-        """Ensure rect values are valid floats between 0–1."""
-        def clamp(v):
-            try:
-                v = float(v)
-            except Exception:
-                return 0.0
-            return max(0.0, min(1.0, v))
-
-        return {
-            "x0": clamp(rect.get("x0", 0)),
-            "y0": clamp(rect.get("y0", 0)),
-            "x1": clamp(rect.get("x1", 1)),
-            "y1": clamp(rect.get("y1", 1)),
-        }
-
-    @staticmethod
-    def _normalize_rect(rect: Dict[str, float], page_width: float, page_height: float):
+    def _rects_to_pdf(rects: List[Dict[str, float]], page_width: float, page_height: float) -> np.ndarray:
         """
-        Convert normalized rect (0–1) to absolute PDF coordinates.
+        Convert normalized rects (0–1) to absolute PDF coordinates, in one batch.
+        - invalid values become 0.0, everything is clamped to 0–1
+        - corners are ordered (x0 <= x1, y0 <= y1)
         FIXED: Apply Y-axis inversion (PDF y=0 is bottom).
         """
-        rect = RedactionEngine._validate_rect(rect)
-
-        # Normalized coordinates
-        x0n = min(rect["x0"], rect["x1"])
-        x1n = max(rect["x0"], rect["x1"])
-
-        # FIXED: Y inversion
-        y0n = 1 - max(rect["y0"], rect["y1"])
-        y1n = 1 - min(rect["y0"], rect["y1"])
-
-        x0 = x0n * page_width
-        x1 = x1n * page_width
-        y0 = y0n * page_height
-        y1 = y1n * page_height
-
-        return fitz.Rect(x0, y0, x1, y1)
+        boxes, _ = rects_to_boxes(rects)
+        return normalized_to_pdf(clamp_unit(boxes), page_width, page_height, flip_y=True, order=True)
 
     # ------------------------------------------------------------
     # Apply redactions to a document
@@ -87,44 +65,32 @@ class RedactionEngine:
         }
         """
 
-        # Group by page
-        by_page: Dict[int, List[Dict[str, Any]]] = {}
+        # Collect rects per page and colour; one apply_redactions() per page
+        plan = RedactionPlan()
         for r in redactions:
-            p = int(r.get("page", 1))
-            by_page.setdefault(p, []).append(r)
-
-        # Process each page
-        for page_index in range(len(doc)):
-            page_num = page_index + 1
-            page = doc[page_index]
-            pw, ph = page.rect.width, page.rect.height
-
-            items = by_page.get(page_num, [])
-            if not items:
+            page_index = int(r.get("page", 1)) - 1
+            if page_index < 0 or page_index >= len(doc):
                 continue
+            page_rect = doc[page_index].rect
 
-            for r in items:
-                rtype = r.get("type", "box")
-                rects = r.get("rects", [])
-                color_hex = r.get("color", "#000000")
-
-                # FIXED: Convert hex → RGB tuple
-                try:
-                    rgb = tuple(int(color_hex[i:i+2], 16) for i in (1, 3, 5))
-                except Exception:
-                    rgb = (0, 0, 0)
+            rects = r.get("rects", [])
+            color_hex = r.get("color", "#000000")
 
-                for rect in rects:
-                    abs_rect = self._normalize_rect(rect, pw, ph)
+            # FIXED: Convert hex → RGB tuple
+            try:
+                rgb = tuple(int(color_hex[i:i+2], 16) for i in (1, 3, 5))
+            except Exception:
+                rgb = (0, 0, 0)
 
-                    # FIXED: Respect color
-                    page.add_redact_annot(abs_rect, fill=rgb)
+            plan.page(page_index).add(rgb, self._rects_to_pdf(rects, page_rect.width, page_rect.height))
 
-            # Apply all redactions for this page
-            page.apply_redactions(
-                images=fitz.PDF_REDACT_IMAGE_NONE,
-                graphics=fitz.PDF_REDACT_LINE_ART_IF_COVERED,
-            )
+        # FIXED: Respect color
+        plan.apply(
+            doc,
+            lambda page, rect, rgb: page.add_redact_annot(rect, fill=rgb),
+            images=fitz.PDF_REDACT_IMAGE_NONE,
+            graphics=fitz.PDF_REDACT_LINE_ART_IF_COVERED,
+        )
 
         # FIXED: Metadata scrubbing
         if scrub_metadata:
@@ -161,25 +127,41 @@ class RedactionEngine:
         redactions: List[Dict[str, Any]],
         scrub_metadata: bool = True,
         base_filename: Optional[str] = None,
+        save_profile: Optional[str] = None,
     ) -> str:
         """
         Apply redactions to a PDF (bytes) and return output path.
+        Files under output_dir are deleted after REDACT_TEMP_TTL_SECONDS.
         """
         if not redactions:
             raise ValueError("No redactions provided")
 
+        self.reaper.maybe_reap()
+
         safe_name = os.path.splitext(os.path.basename(base_filename or "document"))[0]
         out_name = f"{safe_name}_redacted_{uuid.uuid4().hex[:8]}.pdf"
         out_path = os.path.join(self.output_dir, out_name)
 
         with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
             self._apply_redactions_to_doc(doc, redactions, scrub_metadata)
-            doc.save(
-                out_path,
-                garbage=4,
-                deflate=True,
-                clean=True,
-                linear=True,
-            )
+            save_document(doc, out_path, save_profile)
 
         return out_path
+
+    def apply_redactions_to_bytes(
+        self,
+        pdf_bytes: bytes,
+        redactions: List[Dict[str, Any]],
+        scrub_metadata: bool = True,
+        save_profile: Optional[str] = None,
+    ) -> bytes:
+        """
+        Same as apply_redactions, but returns the redacted PDF in memory
+        (no temp file). save_profile: "fast" or "archival" (default: env).
+        """
+        if not redactions:
+            raise ValueError("No redactions provided")
+
+        with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+            self._apply_redactions_to_doc(doc, redactions, scrub_metadata)
+            return document_bytes(doc, save_profile)
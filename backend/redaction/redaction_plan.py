@@ -0,0 +1,77 @@
+# ------------------------------------------------------------
+# redaction_plan.py — Per-page redaction plans
+# ------------------------------------------------------------
+#
+# Every redaction path (manual engine, template engine, ocr_report batch /
+# manual endpoints) first collects its rects per page and per style, then
+# reduces each group to a small exact cover (geometry.cover_boxes: nested
+# and duplicate rects dropped, touching words of one phrase joined, rects
+# merged only where their bounding box equals their union, so nothing
+# outside the selected area is redacted) and applies them with a single
+# page.apply_redactions() call per page. Apply time therefore scales with
+# pages, not with the number of redaction items or rects.
+#
+# Boxes are absolute PDF coordinates. A "style" is whatever the caller's
+# annotation callback needs (fill colour, (mode, colour), ...) and must be
+# hashable; rects are only merged within the same style.
+
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Tuple
+
+import fitz  # PyMuPDF
+import numpy as np
+
+from backend.geometry import as_boxes, cover_boxes
+
+
+class PageRedactionPlan:
+    def __init__(self):
+        self._boxes: Dict[Hashable, List[np.ndarray]] = {}
+
+    def add(self, style: Hashable, boxes: Any) -> None:
+        boxes = as_boxes(boxes)
+        if len(boxes):
+            self._boxes.setdefault(style, []).append(boxes)
+
+    def __bool__(self) -> bool:
+        return bool(self._boxes)
+
+    def items(self) -> Iterator[Tuple[Hashable, List[fitz.Rect]]]:
+        """(style, coalesced rects) in insertion order of the styles."""
+        for style, chunks in self._boxes.items():
+            merged = cover_boxes(np.concatenate(chunks))
+            yield style, [fitz.Rect(*box) for box in merged.tolist()]
+
+
+class RedactionPlan:
+    def __init__(self):
+        self.pages: Dict[int, PageRedactionPlan] = {}
+
+    def page(self, page_index: int) -> PageRedactionPlan:
+        plan = self.pages.get(page_index)
+        if plan is None:
+            plan = self.pages[page_index] = PageRedactionPlan()
+        return plan
+
+    def apply(
+        self,
+        doc: fitz.Document,
+        annotate: Callable[[fitz.Page, fitz.Rect, Hashable], None],
+        **apply_kwargs: Any,
+    ) -> int:
+        """
+        annotate(page, rect, style) for every planned rect, then one
+        page.apply_redactions(**apply_kwargs) per page. Returns the number
+        of annotations added.
+        """
+        count = 0
+        for page_index in sorted(self.pages):
+            plan = self.pages[page_index]
+            if not plan or not 0 <= page_index < len(doc):
+                continue
+            page = doc[page_index]
+            for style, rects in plan.items():
+                for rect in rects:
+                    annotate(page, rect, style)
+                    count += 1
+            page.apply_redactions(**apply_kwargs)
+        return count
@@ -0,0 +1,110 @@
+# ------------------------------------------------------------
+# span_table.py — compact per-page span storage
+# ------------------------------------------------------------
+#
+# Every producer (extract_ocr_structure, /redact/template, train-from-pair)
+# used to build one dict per word — five boxed values plus a hash table —
+# and the suggestion engine only ever reads them. Spans now live in
+# __slots__ records grouped into a SpanTable per page.
+#
+# SpanRecord keeps the read-only dict protocol the suggestion engine uses
+# (`span.get("x0", 0.0)`, `span["text"]`), and records compare by value
+# with each other like the dicts did (line.index(span)), so
+# generate_suggestions() consumes tables directly. Like those dicts, records
+# are mutable and unhashable. No endpoint returns spans, so no per-word
+# dicts are built; SpanRecord.to_dict() gives the plain form where needed.
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+SPAN_FIELDS = ("text", "x0", "y0", "x1", "y1")
+
+
+class SpanRecord:
+    __slots__ = SPAN_FIELDS
+
+    def __init__(self, text: str, x0: float, y0: float, x1: float, y1: float):
+        self.text = text
+        self.x0 = x0
+        self.y0 = y0
+        self.x1 = x1
+        self.y1 = y1
+
+    # Read-only mapping protocol (what suggestions.py expects from a span)
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in SPAN_FIELDS:
+            return getattr(self, key)
+        return default
+
+    def __getitem__(self, key: str) -> Any:
+        if key in SPAN_FIELDS:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in SPAN_FIELDS
+
+    def keys(self):
+        return SPAN_FIELDS
+
+    def _values(self) -> tuple:
+        return (self.text, self.x0, self.y0, self.x1, self.y1)
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, SpanRecord):
+            return self._values() == other._values()
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"SpanRecord(text={self.text!r}, x0={self.x0}, y0={self.y0}, x1={self.x1}, y1={self.y1})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"text": self.text, "x0": self.x0, "y0": self.y0, "x1": self.x1, "y1": self.y1}
+
+
+class SpanTable:
+    """The spans of one page, in reading/extraction order."""
+
+    __slots__ = ("_records",)
+
+    def __init__(self, records: Optional[Iterable[SpanRecord]] = None):
+        self._records: List[SpanRecord] = list(records) if records is not None else []
+
+    def append(self, text: str, x0: float, y0: float, x1: float, y1: float) -> None:
+        self._records.append(SpanRecord(text, x0, y0, x1, y1))
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __iter__(self) -> Iterator[SpanRecord]:
+        return iter(self._records)
+
+    def __getitem__(self, index):
+        return self._records[index]
+
+    def __repr__(self) -> str:
+        return f"SpanTable({len(self._records)} spans)"
+
+
+def group_spans_by_page(spans: Iterable[Any]) -> Dict[int, SpanTable]:
+    """TextSpan-like objects (page, text, x0..y1) -> {page: SpanTable}."""
+
+    def _coord(s: Any, name: str, default: float) -> float:
+        value = getattr(s, name, None)
+        return float(value) if value is not None else default
+
+    spans_by_page: Dict[int, SpanTable] = {}
+    for s in spans or []:
+        page = int(getattr(s, "page", 1) or 1)
+        table = spans_by_page.get(page)
+        if table is None:
+            table = spans_by_page[page] = SpanTable()
+        table.append(
+            str(getattr(s, "text", "") or ""),
+            _coord(s, "x0", 0.0),
+            _coord(s, "y0", 0.0),
+            _coord(s, "x1", 1.0),
+            _coord(s, "y1", 1.0),
+        )
+    return spans_by_page
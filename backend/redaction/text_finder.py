@@ -7,6 +7,9 @@ from typing import List, Dict, Any, Optional
 import re
 import fitz  # PyMuPDF
 
+from backend.geometry import as_boxes, pdf_to_normalized
+from backend.redaction.page_classifier import PAGE_HYBRID, PAGE_OCR, classify_page, merge_hybrid_spans
+
 # Optional OCR import
 try:
     from backend.ocr_engine import OCREngine, OCRWord
@@ -17,7 +20,7 @@ except ImportError:
     OCRWord = None
 
 
-@dataclass
+@dataclass(slots=True)
 class TextSpan:
     page: int
     text: str
@@ -45,40 +48,58 @@ class TextFinder:
         if not words:
             return []
 
-        width = page.rect.width
-        height = page.rect.height
+        words = [w for w in words if w[4].strip()]
+        if not words:
+            return []
 
-        spans: List[TextSpan] = []
-        for w in words:
-            x0, y0, x1, y1, text, *_ = w
-            if not text.strip():
-                continue
+        norm = pdf_to_normalized(as_boxes([w[:4] for w in words]), page.rect.width, page.rect.height)
 
-            spans.append(
-                TextSpan(
-                    page=page_index + 1,
-                    text=text,
-                    x0=x0 / width,
-                    y0=1 - (y1 / height),
-                    x1=x1 / width,
-                    y1=1 - (y0 / height),
-                )
-            )
-        return spans
+        return [
+            TextSpan(page=page_index + 1, text=w[4], x0=x0, y0=y0, x1=x1, y1=y1)
+            for w, (x0, y0, x1, y1) in zip(words, norm.tolist())
+        ]
 
     # ------------------------------------------------------------
-    # OCR fallback
+    # OCR fallback (reuses the already-open document)
     # ------------------------------------------------------------
-    def _extract_ocr_words(self, pdf_bytes: bytes, page_index: int) -> List[TextSpan]:
-        if not self.ocr_engine or not HAS_OCR:
-            return []
-
-        ocr_words: List[OCRWord] = self.ocr_engine.ocr_pdf_bytes_per_page(
-            pdf_bytes, page_index
+    def _extract_ocr_words(
+        self,
+        doc: fitz.Document,
+        page_indices: List[int],
+        pdf_bytes: Optional[bytes] = None,
+        images: Optional[Dict[int, Any]] = None,
+    ) -> Dict[int, List[TextSpan]]:
+        if not self.ocr_engine or not HAS_OCR or not page_indices:
+            return {}
+
+        ocr_words: List[OCRWord] = self.ocr_engine.ocr_document(
+            doc, page_indices, pdf_bytes=pdf_bytes, images=images
         )
-        spans: List[TextSpan] = []
+        return self._ocr_words_to_spans(ocr_words)
+
+    # ------------------------------------------------------------
+    # Targeted OCR: only the regions of interest of each page
+    # (`regions` maps page index -> normalized Y-flipped rects)
+    # ------------------------------------------------------------
+    def _extract_ocr_region_words(
+        self,
+        doc: fitz.Document,
+        regions: Dict[int, List[Dict[str, float]]],
+    ) -> Dict[int, List[TextSpan]]:
+        if not self.ocr_engine or not HAS_OCR or not regions:
+            return {}
+
+        ocr_words: List[OCRWord] = []
+        for page_index, rects in regions.items():
+            if 0 <= page_index < len(doc) and rects:
+                ocr_words.extend(self.ocr_engine.ocr_page_regions(doc[page_index], rects))
+        return self._ocr_words_to_spans(ocr_words)
+
+    @staticmethod
+    def _ocr_words_to_spans(ocr_words: List[OCRWord]) -> Dict[int, List[TextSpan]]:
+        spans_by_index: Dict[int, List[TextSpan]] = {}
         for w in ocr_words:
-            spans.append(
+            spans_by_index.setdefault(w.page - 1, []).append(
                 TextSpan(
                     page=w.page,
                     text=w.text,
@@ -88,7 +109,7 @@ class TextFinder:
                     y1=w.y1,
                 )
             )
-        return spans
+        return spans_by_index
 
     # ------------------------------------------------------------
     # Extract all spans
@@ -101,21 +122,91 @@ class TextFinder:
     ) -> List[TextSpan]:
 
         doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-        all_spans: List[TextSpan] = []
+        try:
+            return self.find_text_spans_in_doc(
+                doc, use_ocr=use_ocr, auto_ocr=auto_ocr, pdf_bytes=pdf_bytes
+            )
+        finally:
+            doc.close()
+
+    def find_text_spans_in_doc(
+        self,
+        doc: fitz.Document,
+        use_ocr: bool = False,
+        auto_ocr: bool = True,
+        pdf_bytes: Optional[bytes] = None,
+    ) -> List[TextSpan]:
+        """
+        Same as find_text_spans, for a document the caller already opened.
+        Each page is classified (see page_classifier): native pages keep
+        their text layer, scanned pages are OCR'd, and hybrid pages OCR
+        only their untexted image regions. Full-page OCR is handed to the
+        OCR engine in one batch so the PDF is parsed exactly once
+        (pdf_bytes only enables the OCR pool). use_ocr=True enables OCR
+        even when auto_ocr is off; pages with a full text layer still
+        skip it.
+        """
+        native: Dict[int, List[TextSpan]] = {}
+        ocr_pages: List[int] = []
+        hybrid_regions: Dict[int, List[Dict[str, float]]] = {}
+        ocr_enabled = bool((use_ocr or auto_ocr) and self.ocr_engine)
 
         for page_index in range(len(doc)):
-            if use_ocr:
-                spans = self._extract_ocr_words(pdf_bytes, page_index)
-            else:
-                spans = self._extract_pdf_words(doc, page_index)
-                if auto_ocr and not spans and self.ocr_engine:
-                    spans = self._extract_ocr_words(pdf_bytes, page_index)
+            spans = self._extract_pdf_words(doc, page_index)
+            native[page_index] = spans
+            if not ocr_enabled:
+                continue
 
-            all_spans.extend(spans)
+            page_class = classify_page(spans, self._image_block_rects(doc[page_index]))
+            if page_class.mode == PAGE_OCR:
+                ocr_pages.append(page_index)
+            elif page_class.mode == PAGE_HYBRID:
+                hybrid_regions[page_index] = page_class.ocr_regions
+
+        ocr_spans = self._extract_ocr_words(doc, ocr_pages, pdf_bytes=pdf_bytes)
+        region_spans = self._extract_ocr_region_words(doc, hybrid_regions)
+
+        all_spans: List[TextSpan] = []
+        for page_index in range(len(doc)):
+            if page_index in ocr_spans:
+                all_spans.extend(ocr_spans[page_index])
+            elif page_index in hybrid_regions:
+                all_spans.extend(
+                    merge_hybrid_spans(
+                        native[page_index],
+                        region_spans.get(page_index, []),
+                        hybrid_regions[page_index],
+                    )
+                )
+            else:
+                all_spans.extend(native.get(page_index, []))
 
-        doc.close()
         return all_spans
 
+    # ------------------------------------------------------------
+    # Image blocks of one page → normalized rects
+    # ------------------------------------------------------------
+    def _image_block_rects(self, page: fitz.Page) -> List[Dict[str, float]]:
+        # get_image_info() reports image placements without the per-character
+        # text extraction that get_text("rawdict") would also do.
+        width = page.rect.width
+        height = page.rect.height
+
+        rects: List[Dict[str, float]] = []
+        for info in page.get_image_info():
+            try:
+                x0, y0, x1, y1 = info["bbox"]
+            except Exception:
+                continue
+
+            rects.append({
+                "x0": x0 / width,
+                "y0": 1 - (y1 / height),
+                "x1": x1 / width,
+                "y1": 1 - (y0 / height)
+            })
+        return rects
+
     # ------------------------------------------------------------
     # SAFE barcode detection via PyMuPDF (image blocks)
     # ------------------------------------------------------------
@@ -124,30 +215,11 @@ class TextFinder:
         results = []
 
         for page_index in range(len(doc)):
-            page = doc[page_index]
-            raw = page.get_text("rawdict")
-
-            width = page.rect.width
-            height = page.rect.height
-
-            for block in raw.get("blocks", []):
-                if block.get("type") != 1:
-                    continue
-
-                try:
-                    x0, y0, x1, y1 = block["bbox"]
-                except Exception:
-                    continue
-
+            for rect in self._image_block_rects(doc[page_index]):
                 results.append({
                     "page": page_index + 1,
                     "text": "",
-                    "rects": [{
-                        "x0": x0 / width,
-                        "y0": 1 - (y1 / height),
-                        "x1": x1 / width,
-                        "y1": 1 - (y0 / height)
-                    }]
+                    "rects": [rect]
                 })
 
         doc.close()
@@ -1,7 +1,10 @@
 # backend/rules/merge_engine.py
+import hashlib
 import json
 import os
-from typing import Optional, List
+import re
+import threading
+from typing import Any, Dict, Optional, List, Tuple
 
 from .types import (
     UniversalRules,
@@ -51,26 +54,154 @@ def load_json(path: str):
         return {}
 
 
-def detect_company(doc_text: str, company_rules_dir: str) -> Optional[CompanyRules]:
+# -------------------------------------------------------------------
+# mtime-validated caches
+# -------------------------------------------------------------------
+# Rule JSONs change rarely (editor saves, /api/templates/save-rule,
+# learned_ai training) but are read on every suggest request. We keep
+# the parsed JSON and the merged rule sets in memory and revalidate them
+# with os.stat() (mtime + size), so steady-state requests do no JSON I/O.
+#
+# Cached objects are shared between requests: treat them as read-only.
+
+FileSig = Optional[Tuple[int, int]]
+
+_cache_lock = threading.Lock()
+_json_cache: Dict[str, Tuple[FileSig, Any]] = {}
+_merged_cache: Dict[Tuple[str, Optional[str], str], Tuple[Tuple[FileSig, ...], MergedRuleSet]] = {}
+
+
+def _file_sig(path: str) -> FileSig:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def load_json_cached(path: str):
     """
-    Scan all company JSONs and pick the highest-priority match
-    whose detection.match_strings appear in doc_text.
+    Same contract as load_json(), but re-parses only when the file's
+    mtime/size changed since the last read.
     """
-    best: Optional[CompanyRules] = None
-    best_score = -1
+    sig = _file_sig(path)
+    with _cache_lock:
+        hit = _json_cache.get(path)
+        if hit is not None and hit[0] == sig:
+            return hit[1]
+
+    data = load_json(path) if sig is not None else {}
+    if sig is None:
+        print(f"[merge_engine] WARNING: JSON file not found: {path}")
+
+    with _cache_lock:
+        _json_cache[path] = (sig, data)
+    return data
 
-    if not os.path.isdir(company_rules_dir):
-        print(f"[merge_engine] WARNING: company_rules_dir does not exist: {company_rules_dir}")
-        return None
 
+def clear_rule_caches() -> None:
+    with _cache_lock:
+        _json_cache.clear()
+        _merged_cache.clear()
+        _company_indexes.clear()
+
+
+# -------------------------------------------------------------------
+# Company detection index
+# -------------------------------------------------------------------
+class CompanyIndex:
+    """
+    Multi-pattern index over every company's detection.match_strings.
+
+    All (lower-cased) match strings are compiled into one alternation,
+    longest first, wrapped in a lookahead so one regex scan reports the
+    longest match string starting at each position. Shorter strings
+    contained in a reported one are implied matches, so the result equals
+    testing every string with `in`. `re` still tries the alternatives at
+    each position (worst case text x patterns); the gain is doing that in
+    C in one call instead of one Python `in` per string.
+    """
+
+    def __init__(self, companies: List[Tuple[CompanyRules, int, List[str]]]):
+        # (rules, priority, lower-cased match strings), in directory order
+        self.companies = companies
+
+        owners: Dict[str, set] = {}
+        self.always: set = set()  # companies with an empty match string
+        for idx, (_rules, _priority, strings) in enumerate(companies):
+            for s in strings:
+                if s:
+                    owners.setdefault(s, set()).add(idx)
+                else:
+                    self.always.add(idx)
+
+        # Every company whose match string is contained in `s`.
+        self._implied: Dict[str, set] = {}
+        for s in owners:
+            hit = set()
+            for other, other_owners in owners.items():
+                if other in s:
+                    hit |= other_owners
+            self._implied[s] = hit
+
+        self._scanner: Optional[re.Pattern] = None
+        if owners:
+            alternation = "|".join(
+                re.escape(s) for s in sorted(owners, key=len, reverse=True)
+            )
+            self._scanner = re.compile(f"(?=({alternation}))")
+
+    def matching_companies(self, doc_text: str) -> set:
+        found = set(self.always)
+        if self._scanner is None:
+            return found
+
+        for m in self._scanner.finditer((doc_text or "").lower()):
+            found |= self._implied[m.group(1)]
+        return found
+
+    def detect(self, doc_text: str) -> Optional[CompanyRules]:
+        """Highest priority wins; ties go to the first file (same as before)."""
+        best: Optional[CompanyRules] = None
+        best_score = -1
+        for idx in sorted(self.matching_companies(doc_text)):
+            rules, priority, _strings = self.companies[idx]
+            if priority > best_score:
+                best = rules
+                best_score = priority
+        return best
+
+
+_company_indexes: Dict[str, Tuple[Tuple, CompanyIndex]] = {}
+
+
+def _company_dir_sig(company_rules_dir: str) -> Tuple:
+    entries = []
     for fname in os.listdir(company_rules_dir):
         if not fname.endswith(".json"):
             continue
         if fname.lower().startswith("defaults"):
             continue
+        entries.append((fname, _file_sig(os.path.join(company_rules_dir, fname))))
+    return tuple(entries)
 
+
+def get_company_index(company_rules_dir: str) -> CompanyIndex:
+    """
+    Build the detection index once per directory; rebuilt only when a
+    company file is added, removed or modified (listdir + stat per call).
+    """
+    sig = _company_dir_sig(company_rules_dir)
+
+    with _cache_lock:
+        hit = _company_indexes.get(company_rules_dir)
+        if hit is not None and hit[0] == sig:
+            return hit[1]
+
+    companies: List[Tuple[CompanyRules, int, List[str]]] = []
+    for fname, _sig in sig:
         full = os.path.join(company_rules_dir, fname)
-        rules: CompanyRules = load_json(full)
+        rules: CompanyRules = load_json_cached(full)
         if not rules:
             continue
 
@@ -80,13 +211,81 @@ def detect_company(doc_text: str, company_rules_dir: str) -> Optional[CompanyRul
 
         match_strings: List[str] = detection.get("match_strings", [])
         priority: int = detection.get("priority", 0)
+        companies.append((rules, priority, [str(s).lower() for s in match_strings]))
 
-        if any(s.lower() in doc_text.lower() for s in match_strings):
-            if priority > best_score:
-                best = rules
-                best_score = priority
+    index = CompanyIndex(companies)
+    with _cache_lock:
+        _company_indexes[company_rules_dir] = (sig, index)
+    return index
+
+
+def detect_company(doc_text: str, company_rules_dir: str) -> Optional[CompanyRules]:
+    """
+    Scan all company JSONs and pick the highest-priority match
+    whose detection.match_strings appear in doc_text.
+    """
+    if not os.path.isdir(company_rules_dir):
+        print(f"[merge_engine] WARNING: company_rules_dir does not exist: {company_rules_dir}")
+        return None
+
+    return get_company_index(company_rules_dir).detect(doc_text)
 
-    return best
+
+def _resolve_project_root(base_dir: str | None) -> str:
+    # Resolve base_dir safely
+    if base_dir and os.path.isdir(os.path.join(base_dir, "config", "rules")):
+        return base_dir
+    return _PROJECT_ROOT
+
+
+def _merge_input_paths(company: Optional[CompanyRules], project_root: str) -> List[str]:
+    """Every file merge_rules_for_company() may read for this company."""
+    defaults_dir = os.path.join(project_root, "config", "rules", "company_rules", "defaults")
+    paths = [
+        _UNIVERSAL_RULES_PATH,
+        _COMPANY_CONSTANTS_PATH,
+        os.path.join(defaults_dir, "anchors.json"),
+        os.path.join(defaults_dir, "regex.json"),
+        os.path.join(defaults_dir, "layout.json"),
+        os.path.join(defaults_dir, "barcode_qr.json"),
+    ]
+    company_id = company.get("company_id") if company else None
+    if company_id:
+        paths.append(
+            os.path.join(project_root, "config", "rules", "learned_ai", f"{company_id}.json")
+        )
+    return paths
+
+
+def get_merged_rules(company: Optional[CompanyRules], base_dir: str | None = None) -> MergedRuleSet:
+    """
+    Cached merge_rules_for_company().
+
+    Keyed by company id (plus a fingerprint of the company JSON itself, so
+    edited or ad-hoc company dicts never hit a stale entry) and validated
+    against the mtimes of every universal/defaults/constants/learned file.
+    """
+    project_root = _resolve_project_root(base_dir)
+    company_id = company.get("company_id") if company else None
+    fingerprint = (
+        hashlib.sha1(json.dumps(company, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        if company
+        else ""
+    )
+
+    key = (project_root, company_id, fingerprint)
+    sig = tuple(_file_sig(p) for p in _merge_input_paths(company, project_root))
+
+    with _cache_lock:
+        hit = _merged_cache.get(key)
+        if hit is not None and hit[0] == sig:
+            return hit[1]
+
+    merged = merge_rules_for_company(company, base_dir)
+
+    with _cache_lock:
+        _merged_cache[key] = (sig, merged)
+    return merged
 
 
 def merge_rules_for_company(company: Optional[CompanyRules], base_dir: str | None = None) -> MergedRuleSet:
@@ -96,11 +295,7 @@ def merge_rules_for_company(company: Optional[CompanyRules], base_dir: str | Non
     base_dir is optional; if it's wrong or missing, we fall back to the
     project root resolved above so we never end up at C:\\projects\\config\\...
     """
-    # Resolve base_dir safely
-    if base_dir and os.path.isdir(os.path.join(base_dir, "config", "rules")):
-        project_root = base_dir
-    else:
-        project_root = _PROJECT_ROOT
+    project_root = _resolve_project_root(base_dir)
 
     rules_root = os.path.join(project_root, "config", "rules")
     company_rules_dir = os.path.join(rules_root, "company_rules")
@@ -128,13 +323,13 @@ def merge_rules_for_company(company: Optional[CompanyRules], base_dir: str | Non
             "qr_rules": {},
         }
     else:
-        universal = load_json(_UNIVERSAL_RULES_PATH)
+        universal = load_json_cached(_UNIVERSAL_RULES_PATH)
 
-    defaults_anchors: DefaultsAnchors = load_json(anchors_path)
-    defaults_regex: DefaultsRegex = {} if disable_universal else load_json(regex_path)
-    defaults_layout: DefaultsLayout = {} if disable_universal else load_json(layout_path)
-    defaults_barcode_qr: DefaultsBarcodeQr = {} if disable_universal else load_json(barcode_qr_path)
-    global_company_constants = load_json(_COMPANY_CONSTANTS_PATH).get("company_constants", {})
+    defaults_anchors: DefaultsAnchors = load_json_cached(anchors_path)
+    defaults_regex: DefaultsRegex = {} if disable_universal else load_json_cached(regex_path)
+    defaults_layout: DefaultsLayout = {} if disable_universal else load_json_cached(layout_path)
+    defaults_barcode_qr: DefaultsBarcodeQr = {} if disable_universal else load_json_cached(barcode_qr_path)
+    global_company_constants = load_json_cached(_COMPANY_CONSTANTS_PATH).get("company_constants", {})
 
     # -------------------------------------------------------------------
     # 1) TEXT RULES
@@ -259,6 +454,7 @@ def merge_rules_for_company(company: Optional[CompanyRules], base_dir: str | Non
     # override/augment patterns by id.
     learned_regex = []
     learned_layout = []
+    learned_regions = []
     learned_company_id = company.get("company_id") if company else None
     if learned_company_id:
         try:
@@ -267,6 +463,7 @@ def merge_rules_for_company(company: Optional[CompanyRules], base_dir: str | Non
             learned = load_learned_rules(str(learned_company_id), base_dir=project_root)
             learned_regex = learned.get("regex", []) or []
             learned_layout = learned.get("layout", []) or []
+            learned_regions = learned.get("example_regions", []) or []
         except Exception as e:
             print(f"[merge_engine] WARNING: failed to load learned rules: {e}")
 
@@ -360,4 +557,5 @@ def merge_rules_for_company(company: Optional[CompanyRules], base_dir: str | Non
         barcode_zones=barcode_zones,
         qr_zones=qr_zones,
         company_constants=company_constants,
+        learned_regions=learned_regions,
     )
@@ -0,0 +1,77 @@
+# backend/rules/ocr_regions.py
+#
+# Regions of interest for targeted OCR.
+#
+# For a known company the merged rule set already says where the sensitive
+# fields live:
+#   - layout zones (LayoutRule.rect, per page_scope)
+#   - rects of values confirmed during training (learned_ai `examples`)
+#   - the fixed report-number clip read by /api/redact/ocr-report
+#
+# build_ocr_region_plan() collects them per page so OCREngine can OCR only
+# those zones at high DPI instead of whole pages. Rects are normalized,
+# Y-flipped {x0, y0, x1, y1} dicts (the suggestion coordinate space).
+
+from typing import Dict, List
+
+from .types import MergedRuleSet
+
+# (x0, y0, x1, y1) page fractions, top-left origin, on the first page.
+REPORT_NUMBER_CLIP = (0.55, 0.70, 0.95, 0.90)
+
+
+def _report_number_region() -> Dict[str, float]:
+    x0, y0, x1, y1 = REPORT_NUMBER_CLIP
+    return {"x0": x0, "y0": round(1 - y1, 6), "x1": x1, "y1": round(1 - y0, 6)}
+
+
+class OCRRegionPlan:
+    """Regions to OCR: some on every page, some on specific pages (0-based)."""
+
+    def __init__(self):
+        self.all_pages: List[Dict[str, float]] = []
+        self.by_page: Dict[int, List[Dict[str, float]]] = {}
+
+    def add(self, rect: Dict[str, float], page_index: int = -1) -> None:
+        """page_index -1 means every page."""
+        if page_index < 0:
+            self.all_pages.append(dict(rect))
+        else:
+            self.by_page.setdefault(page_index, []).append(dict(rect))
+
+    def for_page(self, page_index: int) -> List[Dict[str, float]]:
+        return self.all_pages + self.by_page.get(page_index, [])
+
+    def __bool__(self) -> bool:
+        return bool(self.all_pages or self.by_page)
+
+
+def build_ocr_region_plan(
+    final_rules: MergedRuleSet,
+    include_report_number: bool = True,
+) -> OCRRegionPlan:
+    plan = OCRRegionPlan()
+
+    for lr in final_rules.layout_rules:
+        rect = getattr(lr, "rect", None)
+        if not isinstance(rect, dict) or not rect:
+            continue
+        # Only page-relative (0..1) zones can be mapped onto every page size
+        if not getattr(lr, "relative", True):
+            continue
+        plan.add(rect, 0 if getattr(lr, "page_scope", "all") == "first_page" else -1)
+
+    for region in getattr(final_rules, "learned_regions", None) or []:
+        rect = region.get("rect")
+        if not isinstance(rect, dict):
+            continue
+        try:
+            page_index = max(0, int(region.get("page") or 1) - 1)
+        except Exception:
+            continue
+        plan.add(rect, page_index)
+
+    if include_report_number:
+        plan.add(_report_number_region(), 0)
+
+    return plan
@@ -0,0 +1,171 @@
+# backend/rules/rule_bank.py
+#
+# Compiled text-rule bank for generate_suggestions().
+#
+# The bank is built once per MergedRuleSet (merged rule sets are cached
+# per company, see merge_engine.get_merged_rules) and holds:
+#   - one compiled regex per usable text rule
+#   - an optional combined scanner: every "compatible" rule wrapped in a
+#     named group and joined into one alternation, so a single pass over a
+#     span tells us whether *any* rule can match it
+#
+# Semantics are unchanged from running each rule's regex.search() on each
+# span: the scanner rejects spans no rule matches, reuses its match for
+# the winning rule (which equals that rule's own leftmost match), and only
+# the remaining active rules are searched individually.
+
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from .types import MergedRuleSet, TextRule
+
+# Flags generate_suggestions has always used for text rules.
+DEFAULT_FLAGS = "im"
+
+# Patterns that can't safely live inside a shared alternation: group
+# references (\1, (?P=name), conditionals (?(1)...)) would point at the
+# wrong group once the pattern is wrapped in the combined scanner.
+_BACKREF_RE = re.compile(r"\\[1-9]|\(\?P=|\(\?\(")
+_GLOBAL_FLAGS_RE = re.compile(r"\(\?[aiLmsux]+\)")
+
+# (value_text, value_span or None)
+RuleHit = Tuple[str, Optional[Tuple[int, int]]]
+
+
+def compile_flags(flags: str) -> int:
+    re_flags = 0
+    if "i" in flags:
+        re_flags |= re.IGNORECASE
+    if "m" in flags:
+        re_flags |= re.MULTILINE
+    if "s" in flags:
+        re_flags |= re.DOTALL
+    return re_flags
+
+
+@dataclass
+class CompiledTextRule:
+    rule: TextRule
+    regex: re.Pattern
+    confidence: float
+    # Index of this rule's wrapper group in the combined scanner (None = not combined)
+    scanner_group: Optional[int] = None
+
+
+def _hit_from_groups(match: re.Match, base: int, n_groups: int) -> RuleHit:
+    """
+    Mirror suggestions._extract_value_from_match() for a rule whose
+    whole match is group `base` and whose own group 1..n is base+1..base+n.
+    """
+    full = match.group(base)
+    participated = any(match.start(base + i) != -1 for i in range(1, n_groups + 1))
+    if not participated:
+        return full.strip(), None
+
+    g1 = match.group(base + 1)
+    value = (g1 or "").strip() or full.strip()
+    return value, match.span(base + 1)
+
+
+class RuleBank:
+    def __init__(self, text_rules: List[TextRule], flags: str = DEFAULT_FLAGS, combine: bool = True):
+        self.entries: List[CompiledTextRule] = []
+        self.scanner: Optional[re.Pattern] = None
+        self._by_scanner_name: Dict[str, int] = {}
+
+        re_flags = compile_flags(flags)
+
+        for rule in text_rules:
+            pattern = rule.pattern or ""
+            if not pattern or rule.action != "suggest":
+                continue
+            try:
+                regex = re.compile(pattern, re_flags)
+            except re.error:
+                continue
+
+            try:
+                conf = float(getattr(rule, "confidence", 0.95) or 0.95)
+            except Exception:
+                conf = 0.95
+
+            self.entries.append(CompiledTextRule(rule=rule, regex=regex, confidence=conf))
+
+        if combine:
+            self._build_scanner(re_flags)
+
+    # ------------------------------------------------------------
+    # Combined alternation scanner
+    # ------------------------------------------------------------
+    @staticmethod
+    def _is_combinable(entry: CompiledTextRule) -> bool:
+        pattern = entry.regex.pattern
+        if entry.regex.groupindex:
+            return False
+        if _BACKREF_RE.search(pattern) or _GLOBAL_FLAGS_RE.search(pattern):
+            return False
+        return True
+
+    def _build_scanner(self, re_flags: int) -> None:
+        parts: List[str] = []
+        members: List[int] = []
+        for idx, entry in enumerate(self.entries):
+            if self._is_combinable(entry):
+                parts.append(f"(?P<r{idx}>{entry.regex.pattern})")
+                members.append(idx)
+
+        if len(members) < 2:
+            return
+
+        try:
+            scanner = re.compile("|".join(parts), re_flags)
+        except re.error:
+            return
+
+        for idx in members:
+            name = f"r{idx}"
+            self.entries[idx].scanner_group = scanner.groupindex[name]
+            self._by_scanner_name[name] = idx
+        self.scanner = scanner
+
+    # ------------------------------------------------------------
+    # Matching
+    # ------------------------------------------------------------
+    def match_span(self, text: str, active: List[bool]) -> Dict[int, RuleHit]:
+        """
+        Return {entry index: (value_text, value_span)} for every active rule
+        whose regex.search(text) succeeds.
+        """
+        hits: Dict[int, RuleHit] = {}
+        winner: Optional[int] = None
+
+        if self.scanner is not None:
+            m = self.scanner.search(text)
+            if m is not None:
+                winner = self._by_scanner_name.get(m.lastgroup or "")
+                if winner is not None and active[winner]:
+                    entry = self.entries[winner]
+                    hits[winner] = _hit_from_groups(m, entry.scanner_group, entry.regex.groups)
+
+        for idx, entry in enumerate(self.entries):
+            if not active[idx] or idx == winner:
+                continue
+            # Scanner found nothing at all → no combined rule can match.
+            if entry.scanner_group is not None and winner is None:
+                continue
+
+            m = entry.regex.search(text)
+            if m is not None:
+                hits[idx] = _hit_from_groups(m, 0, entry.regex.groups)
+
+        return hits
+
+
+def get_rule_bank(final_rules: MergedRuleSet) -> RuleBank:
+    """Build once per MergedRuleSet and keep it on the (cached) rule set."""
+    bank = getattr(final_rules, "rule_bank", None)
+    if bank is None:
+        bank = RuleBank(final_rules.text_rules)
+        final_rules.rule_bank = bank
+    return bank
@@ -150,6 +150,10 @@ class MergedRuleSet:
     barcode_zones: List[BarcodeZone]
     qr_zones: List[BarcodeZone]
     company_constants: Dict[str, List[str]] = field(default_factory=dict)
+    # {page, rect} where learned values were confirmed (learned_ai examples)
+    learned_regions: List[Dict[str, Any]] = field(default_factory=list)
+    # Compiled text rules, built lazily by rules.rule_bank.get_rule_bank()
+    rule_bank: Optional[Any] = field(default=None, repr=False, compare=False)
 
     def to_jsonable(self) -> Dict[str, Any]:
         return {
@@ -1,8 +1,10 @@
+import heapq
 import os
 import re
 from typing import Optional, Dict, Any, List
 
-from backend.rules.merge_engine import detect_company, merge_rules_for_company
+from backend.rules.merge_engine import detect_company, get_merged_rules, load_json_cached
+from backend.rules.rule_bank import get_rule_bank
 from backend.rules.types import (
     MergedRuleSet,
     TextRule,
@@ -25,13 +27,12 @@ def build_final_rules_for_document(
     if company_hint:
         path = os.path.join(company_rules_dir, f"{company_hint}.json")
         if os.path.isfile(path):
-            import json
-            with open(path, "r", encoding="utf-8") as f:
-                company_rules = json.load(f)
+            company_rules = load_json_cached(path) or None
     else:
         company_rules = detect_company(ocr_text, company_rules_dir)
 
-    merged: MergedRuleSet = merge_rules_for_company(company_rules, base_dir)
+    # Cached per company; rebuilt only when a file under config/rules changes.
+    merged: MergedRuleSet = get_merged_rules(company_rules, base_dir)
     return merged
 
 
@@ -215,6 +216,142 @@ def _normalize_ws(text: str) -> str:
     return " ".join((text or "").split()).strip()
 
 
+# ------------------------------------------------------------
+# Label trie (prefix lookups over _LABEL_FIELD_MAP keys)
+# ------------------------------------------------------------
+_TRIE_END = "\0"
+
+
+def _build_label_trie(keys) -> Dict[str, Any]:
+    trie: Dict[str, Any] = {}
+    for order, key in enumerate(keys):
+        node = trie
+        for ch in key:
+            node = node.setdefault(ch, {})
+        node[_TRIE_END] = order
+    return trie
+
+
+_LABEL_KEYS = list(_LABEL_FIELD_MAP.keys())
+_LABEL_TRIE = _build_label_trie(_LABEL_KEYS)
+
+
+def _label_key_accepts(key: str, norm: str) -> bool:
+    """Does `norm` (which starts with `key`) count as that label?"""
+    if norm == key:
+        return True
+    # Avoid accidental matches like "TOWNLINE" -> "TO".
+    if key.endswith(":") or key.endswith(".") or "#" in key:
+        return True
+    # Allow keys with spaces to match merged tokens like
+    # "LAB NUMBER:3029330" (key "LAB NUMBER" + ':...').
+    if " " in key:
+        nxt = norm[len(key)]
+        return nxt in {":", "."} or nxt.isspace()
+    return False
+
+
+def _match_label_key(norm: str) -> Optional[str]:
+    """
+    Label key for a normalized candidate, exact or by prefix when OCR merged
+    the label with its first value token (e.g. "PHONE:905-244-..." -> "PHONE:").
+    Ties go to the first key in _LABEL_FIELD_MAP order.
+    """
+    best: Optional[int] = None
+    node = _LABEL_TRIE
+    depth = 0
+    while True:
+        order = node.get(_TRIE_END)
+        if order is not None and (best is None or order < best):
+            if _label_key_accepts(_LABEL_KEYS[order], norm):
+                best = order
+        if depth >= len(norm):
+            break
+        node = node.get(norm[depth])
+        if node is None:
+            break
+        depth += 1
+    return _LABEL_KEYS[best] if best is not None else None
+
+
+def _label_prefix_viable(prefix: str) -> bool:
+    """
+    Can any text starting with `prefix` still match a label key?
+    True if some key is a prefix of `prefix` or extends it.
+    """
+    node = _LABEL_TRIE
+    for ch in prefix:
+        if _TRIE_END in node:
+            return True
+        node = node.get(ch)
+        if node is None:
+            return False
+    return True
+
+
+_HAS_DIGIT_RE = re.compile(r"\d")
+_HAS_ALPHA_RE = re.compile(r"[A-Z]")
+
+
+# ------------------------------------------------------------
+# Line grouping (sweep over spans sorted by y0)
+# ------------------------------------------------------------
+def _group_spans_into_lines(spans) -> List[List[Dict[str, Any]]]:
+    """
+    Group spans into lines: a span joins the first line (in creation order)
+    whose first span vertically overlaps it.
+
+    Spans are swept top-to-bottom, so a line whose first span ends above the
+    current span's y0 can never be joined again and is retired. Active lines
+    are kept in two heaps (by bottom edge, by creation order), which makes
+    grouping O(n log n) instead of comparing every span with every line.
+    """
+    keyed = []
+    for span in spans:
+        y0 = float(span.get("y0", 0.0))
+        keyed.append((y0, float(span.get("x0", 0.0)), float(span.get("y1", 0.0)), span))
+    # sort spans top-to-bottom, left-to-right
+    keyed.sort(key=lambda k: (k[0], k[1]))
+
+    lines: List[List[Dict[str, Any]]] = []
+    line_bounds: List[tuple] = []
+    by_bottom: List[tuple] = []   # (ly1, line index)
+    by_order: List[int] = []      # active line indexes
+    retired = set()
+
+    for y0, _x0, y1, span in keyed:
+        while by_bottom and by_bottom[0][0] < y0:
+            retired.add(heapq.heappop(by_bottom)[1])
+        while by_order and by_order[0] in retired:
+            heapq.heappop(by_order)
+
+        target = None
+        if by_order:
+            if y1 >= y0:
+                # Every active line starts at or above y0 and ends at or below it.
+                target = by_order[0]
+            else:
+                # Malformed span (y1 < y0): check active lines one by one.
+                for idx in sorted(by_order):
+                    if idx in retired:
+                        continue
+                    ly0, ly1 = line_bounds[idx]
+                    if not (y1 < ly0 or y0 > ly1):
+                        target = idx
+                        break
+
+        if target is not None:
+            lines[target].append(span)
+        else:
+            idx = len(lines)
+            lines.append([span])
+            line_bounds.append((y0, y1))
+            heapq.heappush(by_bottom, (y1, idx))
+            heapq.heappush(by_order, idx)
+
+    return lines
+
+
 def _adjust_rect_x_for_substring(rect: dict[str, float], full_text: str, start: int, end: int) -> dict[str, float]:
     """
     Approximate x0/x1 adjustment for substring [start:end] inside full_text.
@@ -257,29 +394,8 @@ def _label_value_suggestions(spans_by_page):
     suggestions = []
 
     for page_num, spans in spans_by_page.items():
-        # sort spans top-to-bottom, left-to-right
-        spans_sorted = sorted(
-            spans,
-            key=lambda s: (float(s.get("y0", 0.0)), float(s.get("x0", 0.0)))
-        )
-
         # group spans into "lines" by vertical overlap
-        lines: List[List[Dict[str, Any]]] = []
-        for span in spans_sorted:
-            y0 = float(span.get("y0", 0.0))
-            y1 = float(span.get("y1", 0.0))
-
-            placed = False
-            for line in lines:
-                ly0 = float(line[0].get("y0", 0.0))
-                ly1 = float(line[0].get("y1", 0.0))
-                # vertical overlap → same line
-                if not (y1 < ly0 or y0 > ly1):
-                    line.append(span)
-                    placed = True
-                    break
-            if not placed:
-                lines.append([span])
+        lines = _group_spans_into_lines(spans)
 
         # process each line
         for line in lines:
@@ -291,14 +407,20 @@ def _label_value_suggestions(spans_by_page):
             while i < n:
                 # try to build a label from consecutive spans
                 label_spans = [line[i]]
+                first_text = (line[i].get("text") or "").strip()
+                label_parts = [first_text] if first_text else []
                 j = i + 1
 
                 while j < n:
-                    candidate_text = " ".join(
-                        (ls.get("text") or "").strip()
-                        for ls in label_spans + [line[j]]
-                        if (ls.get("text") or "").strip()
-                    )
+                    # Every later candidate starts with the current label
+                    # text + " "; stop once no label key can follow from it.
+                    if label_parts and not _label_prefix_viable(
+                        _normalize_ws(" ".join(label_parts)).upper() + " "
+                    ):
+                        break
+
+                    next_text = (line[j].get("text") or "").strip()
+                    candidate_text = " ".join(label_parts + [next_text] if next_text else label_parts)
                     norm = _normalize_ws(candidate_text).upper()
                     if norm.endswith(":"):
                         norm = norm[:-1].strip()
@@ -306,22 +428,7 @@ def _label_value_suggestions(spans_by_page):
                     # If OCR merges label + first value token into one span,
                     # normalize by prefix (e.g. "PHONE:905-244-..." -> "PHONE:").
                     raw_norm = norm
-                    for key in _LABEL_FIELD_MAP.keys():
-                        if norm == key:
-                            norm = key
-                            break
-                        if norm.startswith(key):
-                            # Avoid accidental matches like "TOWNLINE" -> "TO".
-                            if key.endswith(":") or key.endswith(".") or "#" in key:
-                                norm = key
-                                break
-                            # Allow keys with spaces to match merged tokens like
-                            # "LAB NUMBER:3029330" (key "LAB NUMBER" + ':...').
-                            if " " in key and len(norm) > len(key):
-                                nxt = norm[len(key)]
-                                if nxt in {":", "."} or nxt.isspace():
-                                    norm = key
-                                    break
+                    norm = _match_label_key(norm) or norm
 
                     if norm in _LABEL_FIELD_MAP:
                         # If we only matched by prefix (raw_norm != norm), don't
@@ -329,6 +436,8 @@ def _label_value_suggestions(spans_by_page):
                         # value). For exact label matches, we extend as before.
                         if raw_norm == norm:
                             label_spans.append(line[j])
+                            if next_text:
+                                label_parts.append(next_text)
                         break
 
                     # if adding this span makes it worse, stop extending
@@ -339,41 +448,27 @@ def _label_value_suggestions(spans_by_page):
                     # Skip numeric-ish tokens that are likely values between
                     # label words (e.g. "ACCOUNT 07282 NUMBER").
                     token_norm = _normalize_ws(line[j].get("text", "") or "").upper()
-                    is_numeric_like = bool(re.search(r"\d", token_norm)) and not bool(
-                        re.search(r"[A-Z]", token_norm)
+                    is_numeric_like = bool(_HAS_DIGIT_RE.search(token_norm)) and not bool(
+                        _HAS_ALPHA_RE.search(token_norm)
                     )
                     if is_numeric_like:
                         j += 1
                         continue
 
                     label_spans.append(line[j])
+                    if next_text:
+                        label_parts.append(next_text)
                     j += 1
 
                 # check if we formed a known label
-                label_text = " ".join(
-                    (ls.get("text") or "").strip()
-                    for ls in label_spans
-                    if (ls.get("text") or "").strip()
-                )
+                label_text = " ".join(label_parts)
                 norm_label = label_text.upper().strip()
                 if norm_label.endswith(":"):
                     norm_label = norm_label[:-1].strip()
 
                 # If OCR merges label + first value token into one span,
                 # normalize by prefix (e.g. "Phone:905-..." -> "PHONE:").
-                for key in _LABEL_FIELD_MAP.keys():
-                    if norm_label == key:
-                        norm_label = key
-                        break
-                    if norm_label.startswith(key):
-                        if key.endswith(":") or key.endswith(".") or "#" in key:
-                            norm_label = key
-                            break
-                        if " " in key and len(norm_label) > len(key):
-                            nxt = norm_label[len(key)]
-                            if nxt in {":", "."} or nxt.isspace():
-                                norm_label = key
-                                break
+                norm_label = _match_label_key(norm_label) or norm_label
 
                 if norm_label in _LABEL_FIELD_MAP:
                     field_info = _LABEL_FIELD_MAP[norm_label]
@@ -811,39 +906,22 @@ def generate_suggestions(pdf_pages, ocr_result, final_rules: MergedRuleSet, sens
     # ------------------------------------------------------------
     # 1) TEXT RULES
     # ------------------------------------------------------------
-    for rule in final_rules.text_rules:
-        pattern = rule.pattern or ""
-        if not pattern:
-            continue
-
-        regex = _compile_regex(pattern, "im")
-        if not regex:
-            continue
+    # Regexes are compiled once per (cached) rule set; one scanner pass per
+    # span rejects text no rule can match before any per-rule search.
+    bank = get_rule_bank(final_rules)
 
-        if rule.action != "suggest":
-            continue
-
-        # Sensitivity: learned regex patterns carry confidence; skip low-confidence rules.
-        try:
-            rule_conf = float(getattr(rule, "confidence", 0.95) or 0.95)
-        except Exception:
-            rule_conf = 0.95
-        if rule_conf < min_confidence:
-            continue
-
-        rule_id = rule.id or "rule"
-        label = rule.label or rule_id
-        group = _infer_group_from_id(rule_id)
+    # Sensitivity: learned regex patterns carry confidence; skip low-confidence rules.
+    active = [entry.confidence >= min_confidence for entry in bank.entries]
 
+    hits_by_rule: List[List[Dict[str, Any]]] = [[] for _ in bank.entries]
+    if any(active):
         for page_num, spans in spans_by_page.items():
             for span in spans:
                 text = span.get("text", "") or ""
                 if not text.strip():
                     continue
 
-                m = regex.search(text)
-                if m:
-                    value_text = _extract_value_from_match(m)
+                for idx, (value_text, value_span) in bank.match_span(text, active).items():
                     if not value_text:
                         value_text = text.strip()
 
@@ -863,18 +941,22 @@ def generate_suggestions(pdf_pages, ocr_result, final_rules: MergedRuleSet, sens
 
                     # If regex has capture groups, narrow rect to the captured value.
                     try:
-                        if m.lastindex and m.lastindex >= 1:
-                            start, end = m.span(1)
+                        if value_span is not None:
+                            start, end = value_span
                             rect = _adjust_rect_x_for_substring(rect, text, start, end)
                     except Exception:
                         pass
 
-                    suggestions.append(
+                    rule = bank.entries[idx].rule
+                    rule_id = rule.id or "rule"
+                    label = rule.label or rule_id
+
+                    hits_by_rule[idx].append(
                         {
                             "type": "text",
                             "rule_id": rule_id,
                             "label": label,
-                            "group": group,
+                            "group": _infer_group_from_id(rule_id),
                             "page": int(page_num),
                             "rects": [rect],
                             "text": value_text,
@@ -882,6 +964,10 @@ def generate_suggestions(pdf_pages, ocr_result, final_rules: MergedRuleSet, sens
                         }
                     )
 
+    # Keep rule order (the cleaning step below keeps the first duplicate).
+    for rule_hits in hits_by_rule:
+        suggestions.extend(rule_hits)
+
     # ------------------------------------------------------------
     # 2) LAYOUT RULES
     # ------------------------------------------------------------
@@ -916,7 +1002,8 @@ def generate_suggestions(pdf_pages, ocr_result, final_rules: MergedRuleSet, sens
                     "label": label,
                     "group": "layout_zone",
                     "page": int(p),
-                    "rects": [rect],
+                    # copy: final_rules is cached and shared between requests
+                    "rects": [dict(rect)],
                     "text": "",
                     "reason": f"Matched layout zone: {label}",
                 }
@@ -4,6 +4,7 @@
 # ------------------------------------------------------------
 
 import os
+import re
 import json
 from typing import Dict, Any, List, Optional
 
@@ -25,6 +26,9 @@ class TemplateLoader:
             base_dir, "..", "config", "rules", "company_rules"
         )
         self.templates: Dict[str, Dict[str, Any]] = {}
+        # company_id -> compiled regex rules (kept out of the templates so they
+        # stay JSON-serializable for the API)
+        self.compiled_rules: Dict[str, List[re.Pattern]] = {}
         self.load_templates()
 
     # ---------------------------------------------------------
@@ -78,6 +82,30 @@ class TemplateLoader:
             "action": z.get("action", "redact"),
         }
 
+    @staticmethod
+    def _compile_rule(rule: Dict[str, Any]) -> Optional[re.Pattern]:
+        """Compile a normalized regex rule once (None if not a valid regex rule)."""
+        if rule.get("type") != "regex":
+            return None
+
+        flags = rule.get("flags", "i") or ""
+        re_flags = 0
+        if "i" in flags: re_flags |= re.IGNORECASE
+        if "m" in flags: re_flags |= re.MULTILINE
+        if "s" in flags: re_flags |= re.DOTALL
+
+        try:
+            return re.compile(rule.get("pattern"), re_flags)
+        except TypeError:
+            return None
+        except re.error as e:
+            print(f"[template_loader] WARNING: invalid regex in rule {rule.get('id')}: {e}")
+            return None
+
+    @classmethod
+    def compile_rules(cls, rules: List[Dict[str, Any]]) -> List[re.Pattern]:
+        return [rx for rx in (cls._compile_rule(r) for r in rules or []) if rx is not None]
+
     def _normalize_template(self, t: Dict[str, Any]) -> Dict[str, Any]:
         """Normalize entire template structure."""
         # Map your schema → detector schema
@@ -108,6 +136,7 @@ class TemplateLoader:
             )
 
         self.templates.clear()
+        self.compiled_rules.clear()
 
         for filename in os.listdir(self.templates_dir):
             if not filename.lower().endswith(".json"):
@@ -129,6 +158,7 @@ class TemplateLoader:
                 normalized = self._normalize_template(raw)
                 cid = normalized["company_id"]
                 self.templates[cid] = normalized
+                self.compiled_rules[cid] = self.compile_rules(normalized["rules"])
 
                 print(f"[template_loader] Loaded template: {cid} ({filename})")
 
@@ -152,6 +182,20 @@ class TemplateLoader:
     def get_all_templates(self) -> List[Dict[str, Any]]:
         return list(self.templates.values())
 
+    # ---------------------------------------------------------
+    # Compiled regex rules for a template
+    # ---------------------------------------------------------
+    def get_compiled_rules(self, template: Dict[str, Any]) -> List[re.Pattern]:
+        """
+        Precompiled at load time for the templates this loader holds; any
+        other template dict (e.g. passed in directly) is compiled from its
+        own "rules".
+        """
+        cid = template.get("company_id")
+        if cid in self.compiled_rules and self.templates.get(cid) is template:
+            return self.compiled_rules[cid]
+        return self.compile_rules(template.get("rules", []))
+
     # ---------------------------------------------------------
     # List all template IDs
     # ---------------------------------------------------------
@@ -0,0 +1,45 @@
+import numpy as np
+
+from backend.geometry import cover_boxes
+
+GRID = 40
+
+
+def _mask(boxes) -> np.ndarray:
+    """Cells of a GRID x GRID integer grid covered by the boxes."""
+    m = np.zeros((GRID, GRID), dtype=bool)
+    for x0, y0, x1, y1 in np.asarray(boxes, dtype=int).tolist():
+        m[y0:y1, x0:x1] = True
+    return m
+
+
+def test_cover_does_not_merge_into_unselected_area():
+    boxes = np.array([[0, 0, 100, 100], [90, 0, 200, 95]], dtype=float)
+    cover = cover_boxes(boxes)
+    assert len(cover) == 2
+    assert not any(np.allclose(b, [0, 0, 200, 100]) for b in cover.tolist())
+
+
+def test_cover_merges_exact_unions():
+    # same row band, overlapping / abutting: union is a rectangle
+    cover = cover_boxes(np.array([[0, 0, 10, 5], [10, 0, 20, 5], [15, 0, 30, 5]], dtype=float))
+    assert cover.tolist() == [[0, 0, 30, 5]]
+    # nested box disappears
+    cover = cover_boxes(np.array([[0, 0, 10, 10], [2, 2, 5, 5]], dtype=float))
+    assert cover.tolist() == [[0, 0, 10, 10]]
+
+
+def test_cover_equals_input_union():
+    rng = np.random.default_rng(0)
+    for _ in range(300):
+        n = int(rng.integers(1, 12))
+        xy0 = rng.integers(0, GRID - 1, size=(n, 2))
+        size = rng.integers(1, 12, size=(n, 2))
+        boxes = np.concatenate([xy0, np.minimum(xy0 + size, GRID)], axis=1).astype(float)
+        # row-band and column-band neighbours, so merges actually happen
+        boxes[::3, 1] = boxes[0, 1]
+        boxes[::3, 3] = boxes[0, 3]
+
+        cover = cover_boxes(boxes)
+        assert np.array_equal(_mask(cover), _mask(boxes))
+        assert len(cover) <= len(boxes)